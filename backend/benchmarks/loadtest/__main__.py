@@ -0,0 +1,354 @@
+# backend/benchmarks/loadtest/__main__.py
+"""
+End-to-end load test: fake upstreams + a bridge process + open-loop load.
+
+1. Starts the fake GoTo and JobDiva servers (fake_upstreams.py) in a
+   background thread.
+2. Drops and re-seeds the load-test database (--db-name, default
+   "bridge_loadtest"; never point it at a real database) with recruiter
+   mappings.
+3. Starts the bridge (`uvicorn server:app`) against that database, with
+   the GoTo / JobDiva URLs and credentials pointed at the fakes.
+4. Warms up, then drives the scenario mix at --rps for --duration seconds,
+   waits for queued webhooks to drain, and prints a JSON report (or writes
+   it to --output). With --baseline, exits 1 when the run regressed.
+
+Run from backend/ with MONGO_URL set (or in .env):
+
+    python -m benchmarks.loadtest --rps 50 --duration 30 --output loadtest.json
+    python -m benchmarks.loadtest --rps 50 --duration 30 --baseline loadtest.json --max-regression 0.2
+    python -m benchmarks.loadtest --mix messages=1 --jobdiva-latency lognormal:120:900 --jobdiva-error-rate 0.02
+
+The default mix leaves out the call_start scenario (/api/call/start): GoTo
+call control is not wired up yet, so every such request fails. Add it with
+--mix ...,call_start=1 once it is.
+
+With --replay, recorded production webhooks (see replay.py) are sent
+instead of the synthetic mix, and the recording's recruiter numbers are
+seeded as mappings.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+import uvicorn
+from dotenv import load_dotenv
+
+from benchmarks.loadtest import driver, replay
+from benchmarks.loadtest.fake_upstreams import Behavior, Latency, goto_app, jobdiva_app
+from models.mapping_models import UserMapping
+from services import database
+from utils.phone_utils import normalize_phone_e164
+
+logger = logging.getLogger("loadtest")
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+HOST = "127.0.0.1"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+class FakeUpstreams:
+    """Both fakes served by uvicorn on one event loop in a background thread."""
+
+    def __init__(self, goto, jobdiva) -> None:
+        self.goto_url = f"http://{HOST}:{_free_port()}"
+        self.jobdiva_url = f"http://{HOST}:{_free_port()}"
+        self._servers = [
+            uvicorn.Server(uvicorn.Config(app, host=HOST, port=int(url.rsplit(":", 1)[1]), log_level="warning"))
+            for app, url in ((goto, self.goto_url), (jobdiva, self.jobdiva_url))
+        ]
+        self._thread = threading.Thread(target=self._run, name="fake-upstreams", daemon=True)
+
+    def _run(self) -> None:
+        async def serve() -> None:
+            await asyncio.gather(*(server.serve() for server in self._servers))
+
+        asyncio.run(serve())
+
+    def start(self, timeout: float = 10.0) -> None:
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not all(server.started for server in self._servers):
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("Fake upstreams did not start")
+            time.sleep(0.05)
+
+    def stop(self) -> None:
+        for server in self._servers:
+            server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+def replay_mappings(events: List[replay.Event]) -> List[Dict[str, Any]]:
+    """One mapping per recruiter-side number of a recording, so lookups hit as in production."""
+    numbers = sorted({normalize_phone_e164(number) for number in replay.recruiter_numbers(events)})
+    return [
+        {
+            "jobdiva_user_id": f"lt_replay_{i:04d}",
+            "jobdiva_user_name": f"Replay Recruiter {i}",
+            "goto_user_id": f"lt_replay_goto_{i:04d}",
+            "goto_phone_number": number,
+        }
+        for i, number in enumerate(numbers)
+    ]
+
+
+async def seed_database(mongo_url: str, db_name: str, mappings: List[Dict[str, Any]]) -> None:
+    db = database.connect(mongo_url, db_name)
+    try:
+        await db.client.drop_database(db_name)
+        if mappings:
+            await db.user_mappings.insert_many([UserMapping(**mapping).model_dump() for mapping in mappings])
+    finally:
+        database.close()
+
+
+def bridge_env(args: argparse.Namespace, upstreams: FakeUpstreams, mongo_url: str) -> Dict[str, str]:
+    env = {
+        **os.environ,
+        "MONGO_URL": mongo_url,
+        "DB_NAME": args.db_name,
+        "GOTO_TOKEN_URL": f"{upstreams.goto_url}/oauth/token",
+        "GOTO_API_BASE": upstreams.goto_url,
+        "GOTO_CLIENT_ID": "loadtest",
+        "GOTO_CLIENT_SECRET": "loadtest",
+        "GOTO_REFRESH_TOKEN": "loadtest",
+        "JOBDIVA_BASE_URL": upstreams.jobdiva_url,
+        "JOBDIVA_USERNAME": "loadtest",
+        "JOBDIVA_PASSWORD": "loadtest",
+        # Set (empty) so a real key in .env is not picked up
+        "JOBDIVA_API_KEY": "",
+        "WEBHOOK_INGEST_MODE": args.ingest_mode,
+        "TRACE_EXPORTER": "none",
+    }
+    for item in args.bridge_env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return env
+
+
+def start_bridge(args: argparse.Namespace, env: Dict[str, str], port: int, log_file) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "uvicorn", "server:app",
+        "--host", HOST, "--port", str(port), "--workers", str(args.workers),
+        "--log-level", "warning", "--no-access-log",
+    ]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+
+
+async def wait_for_bridge(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Bridge exited with code {process.returncode}")
+        try:
+            if (await client.get("/api/")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.25)
+    raise RuntimeError("Bridge did not become ready")
+
+
+async def wait_for_queue(client: httpx.AsyncClient, timeout: float) -> Optional[Dict[str, Any]]:
+    """In async ingest mode, wait until every queued webhook has been processed."""
+    deadline = time.monotonic() + timeout
+    stats = None
+    while time.monotonic() < deadline:
+        stats = (await client.get("/api/admin/webhooks/queue")).json()
+        if stats.get("mode") != "async" or stats["pending"] + stats["processing"] == 0:
+            return stats
+        await asyncio.sleep(0.25)
+    logger.warning("Webhook queue not drained after %ss: %s", timeout, stats)
+    return stats
+
+
+async def upstream_stats(upstreams: FakeUpstreams, reset: bool = False) -> Dict[str, Any]:
+    stats = {}
+    async with httpx.AsyncClient() as client:
+        for name, url in (("goto", upstreams.goto_url), ("jobdiva", upstreams.jobdiva_url)):
+            stats[name] = (await client.get(f"{url}/_stats")).json()
+            if reset:
+                await client.post(f"{url}/_reset")
+    return stats
+
+
+async def run(args: argparse.Namespace, mix: Dict[str, float]) -> Dict[str, Any]:
+    load_dotenv(BACKEND_DIR.parent / ".env")
+    mongo_url = args.mongo_url or os.getenv("MONGO_URL")
+    if not mongo_url:
+        raise RuntimeError("MONGO_URL must be set (or pass --mongo-url)")
+
+    population = driver.Population(recruiters=args.recruiters, candidates=args.candidates)
+    upstreams = FakeUpstreams(
+        goto_app(Behavior(Latency.parse(args.goto_latency), args.goto_error_rate, args.goto_429_rate), seed=args.seed),
+        jobdiva_app(
+            Behavior(Latency.parse(args.jobdiva_latency), args.jobdiva_error_rate, args.jobdiva_429_rate),
+            candidate_hit_rate=args.candidate_hit_rate,
+            seed=args.seed,
+        ),
+    )
+    events = replay.load_events(args.replay) if args.replay else []
+    if args.replay and not events:
+        raise RuntimeError("No events in the recording")
+    upstreams.start()
+    await seed_database(
+        mongo_url, args.db_name, replay_mappings(events) if events else population.mappings()
+    )
+
+    port = _free_port()
+    with open(args.bridge_log, "wb") as log_file:
+        process = start_bridge(args, bridge_env(args, upstreams, mongo_url), port, log_file)
+        limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+        try:
+            async with httpx.AsyncClient(
+                base_url=f"http://{HOST}:{port}", timeout=args.timeout, limits=limits
+            ) as client:
+                await wait_for_bridge(client, process)
+                if args.warmup > 0 and not events:
+                    await driver.generate_load(
+                        client, mix, args.rps, args.warmup, population, args.max_in_flight, args.seed
+                    )
+                    await wait_for_queue(client, args.drain_timeout)
+                await upstream_stats(upstreams, reset=True)
+
+                replay_stats = None
+                if events:
+                    results, elapsed, replay_stats = await replay.replay(
+                        client, events, args.speed, args.max_in_flight, replay.new_id_suffix()
+                    )
+                else:
+                    results, elapsed = await driver.generate_load(
+                        client, mix, args.rps, args.duration, population, args.max_in_flight, args.seed
+                    )
+                queue = await wait_for_queue(client, args.drain_timeout)
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    upstream_counts = await upstream_stats(upstreams)
+    upstreams.stop()
+
+    if events:
+        load = {"replay": args.replay, "speed": args.speed if args.speed is not None else "max"}
+    else:
+        load = {"rps": args.rps, "duration": args.duration, "mix": mix}
+    config = {
+        **load,
+        "ingest_mode": args.ingest_mode,
+        "workers": args.workers,
+        "recruiters": args.recruiters,
+        "candidates": args.candidates,
+        "goto": {"latency": args.goto_latency, "error_rate": args.goto_error_rate, "429_rate": args.goto_429_rate},
+        "jobdiva": {
+            "latency": args.jobdiva_latency,
+            "error_rate": args.jobdiva_error_rate,
+            "429_rate": args.jobdiva_429_rate,
+            "candidate_hit_rate": args.candidate_hit_rate,
+        },
+    }
+    report = driver.build_report(results, elapsed, upstream_counts, config)
+    if replay_stats is not None:
+        report["replay"] = replay_stats
+    if queue is not None and queue.get("mode") == "async":
+        report["webhook_queue"] = queue
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the bridge against local fake GoTo / JobDiva servers.")
+    parser.add_argument("--rps", type=float, default=20.0, help="requests started per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds first (0 to skip)")
+    parser.add_argument(
+        "--mix", default="messages=6,call_events=3,sms_send=1",
+        help=f"scenario weights; scenarios: {', '.join(driver.SCENARIOS)}",
+    )
+    parser.add_argument("--max-in-flight", type=int, default=256, help="concurrent requests cap")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout (s)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--replay", nargs="+", metavar="RECORDING",
+        help="replay recorded webhooks (services/webhook_recorder.py) instead of the synthetic mix",
+    )
+    parser.add_argument(
+        "--speed", type=replay.parse_speed, default=1.0, help="with --replay: 1 = recorded pace, N = N times faster, max"
+    )
+    parser.add_argument("--recruiters", type=int, default=20)
+    parser.add_argument("--candidates", type=int, default=2000, help="distinct candidate numbers")
+
+    parser.add_argument("--goto-latency", default="lognormal:80:400", help="fixed:MS | uniform:MIN:MAX | lognormal:MEDIAN:P99")
+    parser.add_argument("--goto-error-rate", type=float, default=0.0)
+    parser.add_argument("--goto-429-rate", type=float, default=0.0)
+    parser.add_argument("--jobdiva-latency", default="lognormal:150:800")
+    parser.add_argument("--jobdiva-error-rate", type=float, default=0.0)
+    parser.add_argument("--jobdiva-429-rate", type=float, default=0.0)
+    parser.add_argument("--candidate-hit-rate", type=float, default=0.8, help="share of numbers JobDiva knows")
+
+    parser.add_argument("--mongo-url", default=None, help="default: MONGO_URL")
+    parser.add_argument("--db-name", default="bridge_loadtest", help="dropped and re-seeded on every run")
+    parser.add_argument("--workers", type=int, default=1, help="bridge uvicorn workers")
+    parser.add_argument("--ingest-mode", choices=("sync", "async"), default="sync")
+    parser.add_argument("--drain-timeout", type=float, default=120.0, help="wait for queued webhooks (s)")
+    parser.add_argument(
+        "--bridge-env", action="append", default=[], metavar="KEY=VALUE",
+        help="extra bridge env var, e.g. GOTO_RATE_LIMIT_PER_SECOND=100 (repeatable)",
+    )
+    parser.add_argument("--bridge-log", default="loadtest-bridge.log")
+
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="previous report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    try:
+        mix = driver.parse_mix(args.mix)
+        Latency.parse(args.goto_latency)
+        Latency.parse(args.jobdiva_latency)
+    except ValueError as e:
+        parser.error(str(e))
+
+    report = asyncio.run(run(args, mix))
+
+    regressions: List[str] = []
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = driver.compare(report, baseline, args.max_regression)
+        report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+        logger.info("Report written to %s", args.output)
+    else:
+        print(text)
+
+    for regression in regressions:
+        logger.error("Regression: %s", regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
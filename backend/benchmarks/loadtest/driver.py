@@ -0,0 +1,285 @@
+# backend/benchmarks/loadtest/driver.py
+"""
+Open-loop load generation against a running bridge and the JSON report.
+
+Requests are started on a fixed schedule (RPS), not when the previous one
+finishes, so a slow bridge cannot slow the load down. Latency is measured
+from each request's scheduled start, which includes any time it waited for
+a free slot under `max_in_flight`; a bridge that falls behind shows up as
+rising percentiles instead of a quietly lower request rate.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+CALL_RESULTS = ("answered", "missed", "voicemail", "busy")
+
+
+@dataclass(frozen=True)
+class Population:
+    """Seeded recruiters and the candidate numbers traffic is drawn from."""
+
+    recruiters: int = 20
+    candidates: int = 2000
+
+    def recruiter_id(self, i: int) -> str:
+        return f"lt_user_{i:03d}"
+
+    def recruiter_phone(self, i: int) -> str:
+        return f"+1415555{i:04d}"
+
+    def candidate_phone(self, i: int) -> str:
+        return f"+1212{i:07d}"
+
+    def mappings(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "jobdiva_user_id": self.recruiter_id(i),
+                "jobdiva_user_name": f"Load Test Recruiter {i}",
+                "goto_user_id": f"lt_goto_{i:03d}",
+                "goto_phone_number": self.recruiter_phone(i),
+            }
+            for i in range(self.recruiters)
+        ]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    path: str
+    payload: Callable[[random.Random, Population], Dict[str, Any]]
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _message_event(rng: random.Random, population: Population) -> Dict[str, Any]:
+    recruiter = rng.randrange(population.recruiters)
+    return {
+        "message_id": f"lt-{uuid.uuid4()}",
+        "from_number": population.candidate_phone(rng.randrange(population.candidates)),
+        "to_number": population.recruiter_phone(recruiter),
+        "body": "Hi, is the role still open?",
+        "direction": "inbound",
+        "status": "received",
+        "timestamp": _now_iso(),
+    }
+
+
+def _call_event(rng: random.Random, population: Population) -> Dict[str, Any]:
+    outbound = rng.random() < 0.5
+    recruiter = population.recruiter_phone(rng.randrange(population.recruiters))
+    candidate = population.candidate_phone(rng.randrange(population.candidates))
+    result = rng.choice(CALL_RESULTS)
+    duration = rng.randint(20, 900) if result == "answered" else 0
+    started = datetime.now(timezone.utc)
+    return {
+        "call_id": f"lt-{uuid.uuid4()}",
+        "from_number": recruiter if outbound else candidate,
+        "to_number": candidate if outbound else recruiter,
+        "direction": "outbound" if outbound else "inbound",
+        "call_result": result,
+        "duration": duration,
+        "start_time": started.isoformat(),
+        "end_time": (started + timedelta(seconds=duration)).isoformat(),
+    }
+
+
+def _sms_send(rng: random.Random, population: Population) -> Dict[str, Any]:
+    recruiter = rng.randrange(population.recruiters)
+    return {
+        "candidate_phone": population.candidate_phone(rng.randrange(population.candidates)),
+        "candidate_name": "Load Test Candidate",
+        "recruiter_name": f"Load Test Recruiter {recruiter}",
+        "from_phone": population.recruiter_phone(recruiter),
+        "message": "Thanks for applying, are you free for a call tomorrow?",
+    }
+
+
+def _call_start(rng: random.Random, population: Population) -> Dict[str, Any]:
+    recruiter = rng.randrange(population.recruiters)
+    candidate = rng.randrange(population.candidates)
+    return {
+        "candidate_id": f"lt_cand_{candidate:06d}",
+        "candidate_name": "Load Test Candidate",
+        "candidate_phone": population.candidate_phone(candidate),
+        "recruiter_id": population.recruiter_id(recruiter),
+        "recruiter_name": f"Load Test Recruiter {recruiter}",
+    }
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario("messages", "/api/webhooks/goto/messages", _message_event),
+        Scenario("call_events", "/api/webhooks/goto/call-events", _call_event),
+        Scenario("sms_send", "/api/sms/send", _sms_send),
+        Scenario("call_start", "/api/call/start", _call_start),
+    )
+}
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """"messages=6,call_events=3,sms_send=1" -> weights per scenario."""
+    mix: Dict[str, float] = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r} (expected one of {', '.join(SCENARIOS)})")
+        try:
+            mix[name] = float(weight or 1)
+        except ValueError:
+            raise ValueError(f"Invalid weight for {name!r}: {weight!r}") from None
+    mix = {name: weight for name, weight in mix.items() if weight > 0}
+    if not mix:
+        raise ValueError("The scenario mix is empty")
+    return mix
+
+
+# --------------------------------------------------------------------------------------
+# Load generation
+# --------------------------------------------------------------------------------------
+
+Result = Tuple[str, str, float]  # scenario, status ("200", "error", ...), seconds
+
+
+async def generate_load(
+    client: httpx.AsyncClient,
+    mix: Dict[str, float],
+    rps: float,
+    duration: float,
+    population: Population,
+    max_in_flight: int = 256,
+    seed: Optional[int] = None,
+) -> Tuple[List[Result], float]:
+    """Send `rps * duration` requests drawn from `mix`; returns results and elapsed seconds."""
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    slots = asyncio.Semaphore(max_in_flight)
+    results: List[Result] = []
+
+    async def one(scenario: Scenario, payload: Dict[str, Any], scheduled: float) -> None:
+        try:
+            async with slots:
+                resp = await client.post(scenario.path, json=payload)
+            status = str(resp.status_code)
+        except httpx.HTTPError:
+            status = "error"
+        results.append((scenario.name, status, time.perf_counter() - scheduled))
+
+    total = int(rps * duration)
+    tasks = []
+    started = time.perf_counter()
+    for i in range(total):
+        scheduled = started + i / rps
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        scenario = SCENARIOS[rng.choices(names, weights)[0]]
+        tasks.append(asyncio.create_task(one(scenario, scenario.payload(rng, population), scheduled)))
+    await asyncio.gather(*tasks)
+    return results, time.perf_counter() - started
+
+
+# --------------------------------------------------------------------------------------
+# Report
+# --------------------------------------------------------------------------------------
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending sequence (0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), int(-(-q * len(sorted_values) // 100))))
+    return sorted_values[rank - 1]
+
+
+def summarize(results: List[Result], elapsed: float) -> Dict[str, Any]:
+    latencies = sorted(seconds * 1000 for _, _, seconds in results)
+    statuses: Dict[str, int] = defaultdict(int)
+    for _, status, _ in results:
+        statuses[status] += 1
+    failed = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    return {
+        "requests": len(results),
+        "throughput_rps": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(failed / len(results), 4) if results else 0.0,
+        "status": dict(sorted(statuses.items())),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        },
+    }
+
+
+def build_report(
+    results: List[Result],
+    elapsed: float,
+    upstreams: Optional[Dict[str, Dict[str, Dict[str, int]]]],
+    config: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Overall and per-scenario summary; upstream counts when the fakes were used."""
+    by_scenario: Dict[str, List[Result]] = defaultdict(list)
+    for result in results:
+        by_scenario[result[0]].append(result)
+
+    report = {
+        "config": config,
+        "elapsed_seconds": round(elapsed, 3),
+        **summarize(results, elapsed),
+        "scenarios": {name: summarize(rows, elapsed) for name, rows in sorted(by_scenario.items())},
+    }
+    if upstreams is not None:
+        upstream_calls = sum(
+            count for routes in upstreams.values() for by_status in routes.values() for count in by_status.values()
+        )
+        report["upstreams"] = upstreams
+        report["upstream_calls"] = upstream_calls
+        report["upstream_calls_per_request"] = round(upstream_calls / len(results), 3) if results else 0.0
+    return report
+
+
+# Percentile increases smaller than this are noise on a local run
+_MIN_LATENCY_DELTA_MS = 5.0
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Regressions of `report` against `baseline` beyond the `max_regression` ratio."""
+    regressions = []
+    if report["throughput_rps"] < baseline["throughput_rps"] * (1 - max_regression):
+        regressions.append(
+            f"throughput {report['throughput_rps']} rps < baseline {baseline['throughput_rps']} rps"
+        )
+    if report["error_rate"] > baseline["error_rate"] + 0.01:
+        regressions.append(f"error rate {report['error_rate']} > baseline {baseline['error_rate']}")
+    if "upstream_calls_per_request" in report and "upstream_calls_per_request" in baseline and (
+        report["upstream_calls_per_request"] > baseline["upstream_calls_per_request"] * (1 + max_regression)
+    ):
+        regressions.append(
+            f"upstream calls per request {report['upstream_calls_per_request']} > "
+            f"baseline {baseline['upstream_calls_per_request']}"
+        )
+    for name, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        for key in ("p95", "p99"):
+            now, before = current["latency_ms"][key], previous["latency_ms"][key]
+            if now > before * (1 + max_regression) and now - before > _MIN_LATENCY_DELTA_MS:
+                regressions.append(f"{name} {key} {now} ms > baseline {before} ms")
+    return regressions
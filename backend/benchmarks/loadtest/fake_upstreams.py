@@ -0,0 +1,208 @@
+# backend/benchmarks/loadtest/fake_upstreams.py
+"""
+Local stand-ins for the GoTo and JobDiva APIs the bridge calls.
+
+Each fake answers the endpoints the bridge uses with canned bodies after a
+latency drawn from a configurable distribution, and injects 5xx errors and
+429s at configurable rates. Every request is counted per route and status
+so the load test can report how many upstream calls the bridge made.
+
+GoTo:    POST /oauth/token, POST /messaging/v1/messages
+JobDiva: POST /auth/login, POST /apiv2/candidates/search,
+         POST /apiv2/candidates/{candidate_id}/notes
+
+Both also serve GET /_stats (counters) and POST /_reset.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+import random
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+# z-score of the 99th percentile of a standard normal distribution
+_Z99 = 2.3263
+
+
+@dataclass(frozen=True)
+class Latency:
+    """
+    Response delay distribution, parsed from:
+
+    - "fixed:MS"
+    - "uniform:MIN_MS:MAX_MS"
+    - "lognormal:MEDIAN_MS:P99_MS" (long tail, like real APIs)
+    """
+
+    kind: str
+    a: float = 0.0
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        kind, _, rest = spec.partition(":")
+        try:
+            values = [float(v) for v in rest.split(":")] if rest else []
+        except ValueError:
+            raise ValueError(f"Invalid latency spec {spec!r}") from None
+        if kind == "fixed" and len(values) == 1:
+            return cls(kind, values[0])
+        if kind == "uniform" and len(values) == 2 and values[0] <= values[1]:
+            return cls(kind, values[0], values[1])
+        if kind == "lognormal" and len(values) == 2 and 0 < values[0] <= values[1]:
+            return cls(kind, values[0], values[1])
+        raise ValueError(
+            f"Invalid latency spec {spec!r}: use fixed:MS, uniform:MIN:MAX or lognormal:MEDIAN:P99"
+        )
+
+    def sample_ms(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.a
+        if self.kind == "uniform":
+            return rng.uniform(self.a, self.b)
+        sigma = math.log(self.b / self.a) / _Z99
+        return rng.lognormvariate(math.log(self.a), sigma)
+
+
+@dataclass(frozen=True)
+class Behavior:
+    latency: Latency = Latency("fixed", 0.0)
+    error_rate: float = 0.0  # share of requests answered 503
+    rate_limit_rate: float = 0.0  # share of requests answered 429
+    retry_after_seconds: int = 1
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+class FakeUpstream:
+    """Counters and fault injection shared by the routes of one fake."""
+
+    def __init__(self, behavior: Behavior, seed: Optional[int] = None) -> None:
+        self.behavior = behavior
+        self._rng = random.Random(seed)
+        self.counts: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def route(self, path: str, name: str, handler: Handler, inject_faults: bool = True) -> Route:
+        async def endpoint(request: Request) -> Response:
+            delay_ms = self.behavior.latency.sample_ms(self._rng)
+            if delay_ms > 0:
+                await asyncio.sleep(delay_ms / 1000)
+            roll = self._rng.random() if inject_faults else 1.0
+            if roll < self.behavior.rate_limit_rate:
+                response: Response = JSONResponse(
+                    {"error": "rate limited"}, status_code=429,
+                    headers={"Retry-After": str(self.behavior.retry_after_seconds)},
+                )
+            elif roll < self.behavior.rate_limit_rate + self.behavior.error_rate:
+                response = JSONResponse({"error": "unavailable"}, status_code=503)
+            else:
+                response = await handler(request)
+            self.counts[name][response.status_code] += 1
+            return response
+
+        return Route(path, endpoint, methods=["POST"])
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {str(status): count for status, count in sorted(by_status.items())}
+            for name, by_status in sorted(self.counts.items())
+        }
+
+    def reset(self) -> None:
+        self.counts.clear()
+
+    def admin_routes(self):
+        async def get_stats(request: Request) -> Response:
+            return JSONResponse(self.stats())
+
+        async def post_reset(request: Request) -> Response:
+            self.reset()
+            return JSONResponse({"success": True})
+
+        return [Route("/_stats", get_stats, methods=["GET"]), Route("/_reset", post_reset, methods=["POST"])]
+
+
+# --------------------------------------------------------------------------------------
+# GoTo
+# --------------------------------------------------------------------------------------
+
+
+def goto_app(behavior: Behavior, token_ttl_seconds: int = 3600, seed: Optional[int] = None) -> Starlette:
+    upstream = FakeUpstream(behavior, seed)
+
+    async def token(request: Request) -> Response:
+        return JSONResponse({
+            "access_token": f"lt-{uuid.uuid4().hex}",
+            "token_type": "Bearer",
+            "expires_in": token_ttl_seconds,
+        })
+
+    async def send_message(request: Request) -> Response:
+        body = await request.json()
+        if not body.get("ownerPhoneNumber") or not body.get("contactPhoneNumbers"):
+            return JSONResponse({"error": "ownerPhoneNumber and contactPhoneNumbers are required"}, status_code=400)
+        return JSONResponse({"id": str(uuid.uuid4()), "ownerPhoneNumber": body["ownerPhoneNumber"]}, status_code=201)
+
+    app = Starlette(routes=[
+        # Token refreshes are not failed: the bridge only refreshes in the background
+        upstream.route("/oauth/token", "POST /oauth/token", token, inject_faults=False),
+        upstream.route("/messaging/v1/messages", "POST /messaging/v1/messages", send_message),
+        *upstream.admin_routes(),
+    ])
+    app.state.upstream = upstream
+    return app
+
+
+# --------------------------------------------------------------------------------------
+# JobDiva
+# --------------------------------------------------------------------------------------
+
+
+def _known_candidate(phone: str, hit_rate: float) -> bool:
+    # Stable per number, so repeat lookups agree (and cache like production)
+    digest = hashlib.blake2b(phone.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64 < hit_rate
+
+
+def jobdiva_app(behavior: Behavior, candidate_hit_rate: float = 0.8, seed: Optional[int] = None) -> Starlette:
+    upstream = FakeUpstream(behavior, seed)
+
+    async def login(request: Request) -> Response:
+        return JSONResponse({"access_token": f"lt-{uuid.uuid4().hex}", "expires_in": 3600})
+
+    async def search(request: Request) -> Response:
+        phone = (await request.json()).get("phone") or ""
+        if not _known_candidate(phone, candidate_hit_rate):
+            return JSONResponse({"error": "candidate not found"}, status_code=404)
+        candidate_id = f"lt_cand_{phone[-6:]}"
+        return JSONResponse({"candidates": [{
+            "candidate_id": candidate_id,
+            "candidate_name": f"Load Test {phone[-4:]}",
+            "phone": phone,
+        }]})
+
+    async def create_note(request: Request) -> Response:
+        await request.json()
+        return JSONResponse({"success": True, "note_id": str(uuid.uuid4())})
+
+    app = Starlette(routes=[
+        upstream.route("/auth/login", "POST /auth/login", login, inject_faults=False),
+        upstream.route("/apiv2/candidates/search", "POST /apiv2/candidates/search", search),
+        upstream.route(
+            "/apiv2/candidates/{candidate_id}/notes", "POST /apiv2/candidates/{candidate_id}/notes", create_note
+        ),
+        *upstream.admin_routes(),
+    ])
+    app.state.upstream = upstream
+    return app
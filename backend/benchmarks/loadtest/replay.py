@@ -0,0 +1,212 @@
+# backend/benchmarks/loadtest/replay.py
+"""
+Replay recorded webhook traffic (services/webhook_recorder.py) against a
+bridge, at the recorded pace (--speed 1), N times faster (--speed N) or as
+fast as the bridge accepts it (--speed max).
+
+Events keep their recorded order within each conversation: an event is
+sent only after the previous event for the same candidate number has been
+answered. Different conversations run concurrently, up to --max-in-flight
+requests at a time. When the bridge cannot keep up, events go out later
+than scheduled. The report's `schedule_lag_ms` shows by how much, and
+`latency_ms` is the bridge's response time alone.
+
+Message and call ids get a per-run suffix, so the same recording can be
+replayed into one database several times without webhook deduplication
+dropping it. Use --keep-ids to send them unchanged.
+
+Against a running bridge:
+
+    python -m benchmarks.loadtest.replay recordings/*.jsonl.gz --target http://127.0.0.1:8001 --speed 5
+
+Against fake upstreams, with a seeded database and bridge started for the
+run (see __main__.py):
+
+    python -m benchmarks.loadtest --replay recordings/*.jsonl.gz --speed max
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import httpx
+
+from benchmarks.loadtest import driver
+from services.webhook_recorder import Event, read_recordings
+
+logger = logging.getLogger("loadtest.replay")
+
+# Recorded kind -> load-test scenario, so reports line up with synthetic runs
+KIND_SCENARIOS = {"message": driver.SCENARIOS["messages"], "call": driver.SCENARIOS["call_events"]}
+_ID_FIELDS = {"message": "message_id", "call": "call_id"}
+
+
+def _sides(payload: Dict[str, Any]) -> Tuple[str, str]:
+    """(recruiter number, candidate number) of a recorded event."""
+    if payload.get("direction") == "outbound":
+        return payload.get("from_number") or "", payload.get("to_number") or ""
+    return payload.get("to_number") or "", payload.get("from_number") or ""
+
+
+def conversation_key(payload: Dict[str, Any]) -> str:
+    return _sides(payload)[1]
+
+
+def recruiter_numbers(events: Iterable[Event]) -> Set[str]:
+    """GoTo numbers on the recruiter side of the recorded events (to seed mappings)."""
+    return {_sides(payload)[0] for _, _, payload in events} - {""}
+
+
+def load_events(paths: List[str], limit: Optional[int] = None) -> List[Event]:
+    events = []
+    for event in read_recordings(paths):
+        if event[1] not in KIND_SCENARIOS:
+            logger.warning("Skipping event of unknown kind %r", event[1])
+            continue
+        events.append(event)
+        if limit is not None and len(events) >= limit:
+            break
+    return events
+
+
+def parse_speed(value: str) -> Optional[float]:
+    """"max" -> None (no pacing), else a positive multiplier of the recorded pace."""
+    if value == "max":
+        return None
+    speed = float(value)
+    if speed <= 0:
+        raise ValueError("speed must be positive or 'max'")
+    return speed
+
+
+async def replay(
+    client: httpx.AsyncClient,
+    events: List[Event],
+    speed: Optional[float] = 1.0,
+    max_in_flight: int = 256,
+    id_suffix: Optional[str] = None,
+) -> Tuple[List[driver.Result], float, Dict[str, Any]]:
+    """
+    Send `events` (in arrival order); returns per-request results
+    (scenario, status, seconds), elapsed seconds and replay statistics.
+    """
+    slots = asyncio.Semaphore(max_in_flight)
+    results: List[driver.Result] = []
+    lags: List[float] = []
+    lanes: Dict[str, asyncio.Queue] = {}
+    tasks: Set[asyncio.Task] = set()
+
+    async def send(kind: str, payload: Dict[str, Any], scheduled: float) -> None:
+        scenario = KIND_SCENARIOS[kind]
+        async with slots:
+            sent = time.perf_counter()
+            lags.append(sent - scheduled)
+            try:
+                resp = await client.post(scenario.path, json=payload)
+                status = str(resp.status_code)
+            except httpx.HTTPError:
+                status = "error"
+        results.append((scenario.name, status, time.perf_counter() - sent))
+
+    async def lane(key: str, queue: asyncio.Queue) -> None:
+        # Runs while the conversation has queued events, then retires
+        while not queue.empty():
+            await send(*queue.get_nowait())
+        del lanes[key]
+
+    first_ms = events[0][0] if events else 0
+    started = time.perf_counter()
+    for arrived_ms, kind, payload in events:
+        scheduled = started
+        if speed is not None:
+            scheduled = started + (arrived_ms - first_ms) / 1000 / speed
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        if id_suffix:
+            field = _ID_FIELDS[kind]
+            payload = {**payload, field: f"{payload[field]}~{id_suffix}"}
+
+        key = conversation_key(payload)
+        queue = lanes.get(key)
+        if queue is None:
+            queue = lanes[key] = asyncio.Queue()
+            task = asyncio.create_task(lane(key, queue))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        queue.put_nowait((kind, payload, scheduled))
+
+    while tasks:
+        await asyncio.gather(*list(tasks))
+    elapsed = time.perf_counter() - started
+
+    lags_ms = sorted(lag * 1000 for lag in lags)
+    stats = {
+        "events": len(events),
+        "speed": speed if speed is not None else "max",
+        "recorded_seconds": round((events[-1][0] - first_ms) / 1000, 3) if events else 0.0,
+        "conversations": len({conversation_key(payload) for _, _, payload in events}),
+        "schedule_lag_ms": {
+            "p50": round(driver.percentile(lags_ms, 50), 2),
+            "p99": round(driver.percentile(lags_ms, 99), 2),
+            "max": round(lags_ms[-1], 2) if lags_ms else 0.0,
+        },
+    }
+    return results, elapsed, stats
+
+
+def new_id_suffix() -> str:
+    return f"r{uuid.uuid4().hex[:8]}"
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    events = load_events(args.recordings, args.limit)
+    if not events:
+        raise RuntimeError("No events in the recording")
+    logger.info("Replaying %d events against %s", len(events), args.target)
+    async with httpx.AsyncClient(
+        base_url=args.target,
+        timeout=args.timeout,
+        limits=httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight),
+    ) as client:
+        results, elapsed, stats = await replay(
+            client, events, args.speed, args.max_in_flight, None if args.keep_ids else new_id_suffix()
+        )
+    report = driver.build_report(results, elapsed, None, {"target": args.target, "recordings": args.recordings})
+    report["replay"] = stats
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay recorded GoTo webhooks against a bridge.")
+    parser.add_argument("recordings", nargs="+", help="recording files (one per worker is fine)")
+    parser.add_argument("--target", default="http://127.0.0.1:8001", help="bridge base URL")
+    parser.add_argument("--speed", type=parse_speed, default=1.0, help="1 = recorded pace, N = N times faster, max")
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--limit", type=int, default=None, help="replay only the first N events")
+    parser.add_argument("--keep-ids", action="store_true", help="send message / call ids unchanged")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+        logger.info("Report written to %s", args.output)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
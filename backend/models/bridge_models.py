@@ -84,3 +84,5 @@ class WebhookResponse(BaseModel):
     message: str
     processed: bool
     interaction_log_id: Optional[str] = None
+    queue_id: Optional[str] = None  # set when the event was queued for async processing
+    duplicate: bool = False  # redelivery of an event that was already processed
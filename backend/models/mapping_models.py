@@ -74,3 +74,5 @@ class InteractionLog(BaseModel):
     jobdiva_note_created: bool = False
     jobdiva_note_id: Optional[str] = None
     jobdiva_note_error: Optional[str] = None
+    jobdiva_note_pending: bool = False  # note buffered, not yet written to JobDiva
+    jobdiva_note_batch_id: Optional[str] = None  # combined note this log was written in
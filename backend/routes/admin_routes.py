@@ -1,31 +1,37 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from typing import List
+from typing import List, Optional
 import logging
-from datetime import datetime, timezone
-import os
+from datetime import date, datetime, timedelta, timezone
 
 from models.mapping_models import UserMapping, UserMappingCreate, UserMappingUpdate, InteractionLog
 from utils.phone_utils import normalize_phone_e164
+from services.database import get_db, get_pool_stats
+from services.indexes import index_usage_stats
+from services.circuit_breaker import breaker_stats, reset_breaker
+from services.goto_service import goto_service
+from services.jobdiva_service import jobdiva_service
+from services.mapping_index import mapping_index
+from services.note_backfill import backfill_pending_notes
+from services.note_batcher import note_batcher
+from services.log_feed import log_feed
+from services.webhook_recorder import webhook_recorder
+from services import (
+    activity_rollups, fast_json, log_export, mapping_import, token_broker, tracing, webhook_dedup, webhook_queue,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
-async def get_db() -> AsyncIOMotorDatabase:
-    from motor.motor_asyncio import AsyncIOMotorClient
-    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
-    return client[os.environ['DB_NAME']]
-
 # User Mappings
 @router.post("/mappings", response_model=UserMapping)
-async def create_mapping(mapping: UserMappingCreate):
+async def create_mapping(mapping: UserMappingCreate, db: AsyncIOMotorDatabase = Depends(get_db)):
     """
     Create a new JobDiva <-> GoTo user mapping.
     """
     try:
-        db = await get_db()
-        
         # Normalize phone number
         normalized_phone = normalize_phone_e164(mapping.goto_phone_number)
         
@@ -50,10 +56,9 @@ async def create_mapping(mapping: UserMappingCreate):
         )
         
         mapping_dict = user_mapping.model_dump()
-        mapping_dict['created_at'] = mapping_dict['created_at'].isoformat()
-        mapping_dict['updated_at'] = mapping_dict['updated_at'].isoformat()
         
         await db.user_mappings.insert_one(mapping_dict)
+        await mapping_index.notify_changed(db)
         
         logger.info(f"Created mapping for {mapping.jobdiva_user_name}")
         
@@ -65,38 +70,55 @@ async def create_mapping(mapping: UserMappingCreate):
         logger.error(f"Error creating mapping: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/mappings/import")
+async def import_mappings(request: Request, dry_run: bool = False, db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Bulk create/update user mappings from a CSV body (text/csv) or a JSON
+    list (application/json). Rows are upserted by jobdiva_user_id in one
+    ordered bulk write; the response reports the outcome of every row.
+    """
+    try:
+        df = mapping_import.read_table(await request.body(), request.headers.get("content-type", ""))
+        return await mapping_import.import_mappings(db, df, dry_run=dry_run)
+    except mapping_import.ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error importing mappings: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/mappings", response_model=List[UserMapping])
-async def list_mappings(active_only: bool = False):
+async def list_mappings(
+    active_only: bool = False,
+    fields: Optional[str] = None,
+    fast: bool = False,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
     """
     List all user mappings.
+    `fields=a,b` returns only those columns; it (or `fast=true`) skips
+    per-row validation (see services/fast_json.py).
     """
     try:
-        db = await get_db()
-        
+        names = fast_json.parse_fields(UserMapping, fields)
         query = {"is_active": True} if active_only else {}
-        mappings = await db.user_mappings.find(query, {"_id": 0}).to_list(1000)
-        
-        # Convert ISO strings back to datetime
-        for mapping in mappings:
-            if isinstance(mapping.get('created_at'), str):
-                mapping['created_at'] = datetime.fromisoformat(mapping['created_at'])
-            if isinstance(mapping.get('updated_at'), str):
-                mapping['updated_at'] = datetime.fromisoformat(mapping['updated_at'])
+        mappings = await db.user_mappings.find(query, fast_json.projection(names)).to_list(1000)
         
+        if fast or names:
+            return fast_json.FastJSONResponse(fast_json.trusted_rows(UserMapping, mappings, names))
         return mappings
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error listing mappings: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/mappings/{jobdiva_user_id}", response_model=UserMapping)
-async def get_mapping(jobdiva_user_id: str):
+async def get_mapping(jobdiva_user_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
     """
     Get a specific user mapping.
     """
     try:
-        db = await get_db()
-        
         mapping = await db.user_mappings.find_one({
             "jobdiva_user_id": jobdiva_user_id
         }, {"_id": 0})
@@ -104,12 +126,6 @@ async def get_mapping(jobdiva_user_id: str):
         if not mapping:
             raise HTTPException(status_code=404, detail="Mapping not found")
         
-        # Convert ISO strings
-        if isinstance(mapping.get('created_at'), str):
-            mapping['created_at'] = datetime.fromisoformat(mapping['created_at'])
-        if isinstance(mapping.get('updated_at'), str):
-            mapping['updated_at'] = datetime.fromisoformat(mapping['updated_at'])
-        
         return mapping
         
     except HTTPException:
@@ -119,13 +135,15 @@ async def get_mapping(jobdiva_user_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/mappings/{jobdiva_user_id}", response_model=UserMapping)
-async def update_mapping(jobdiva_user_id: str, update: UserMappingUpdate):
+async def update_mapping(
+    jobdiva_user_id: str,
+    update: UserMappingUpdate,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
     """
     Update a user mapping.
     """
     try:
-        db = await get_db()
-        
         mapping = await db.user_mappings.find_one({
             "jobdiva_user_id": jobdiva_user_id
         }, {"_id": 0})
@@ -139,24 +157,19 @@ async def update_mapping(jobdiva_user_id: str, update: UserMappingUpdate):
         if "goto_phone_number" in update_data:
             update_data["goto_phone_number"] = normalize_phone_e164(update_data["goto_phone_number"])
         
-        update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
+        update_data["updated_at"] = datetime.now(timezone.utc)
         
         await db.user_mappings.update_one(
             {"jobdiva_user_id": jobdiva_user_id},
             {"$set": update_data}
         )
+        await mapping_index.notify_changed(db)
         
         # Fetch updated mapping
         updated_mapping = await db.user_mappings.find_one({
             "jobdiva_user_id": jobdiva_user_id
         }, {"_id": 0})
         
-        # Convert ISO strings
-        if isinstance(updated_mapping.get('created_at'), str):
-            updated_mapping['created_at'] = datetime.fromisoformat(updated_mapping['created_at'])
-        if isinstance(updated_mapping.get('updated_at'), str):
-            updated_mapping['updated_at'] = datetime.fromisoformat(updated_mapping['updated_at'])
-        
         return updated_mapping
         
     except HTTPException:
@@ -166,24 +179,24 @@ async def update_mapping(jobdiva_user_id: str, update: UserMappingUpdate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/mappings/{jobdiva_user_id}")
-async def delete_mapping(jobdiva_user_id: str):
+async def delete_mapping(jobdiva_user_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
     """
     Soft delete a user mapping (sets is_active to False).
     """
     try:
-        db = await get_db()
-        
         result = await db.user_mappings.update_one(
             {"jobdiva_user_id": jobdiva_user_id},
             {"$set": {
                 "is_active": False,
-                "updated_at": datetime.now(timezone.utc).isoformat()
+                "updated_at": datetime.now(timezone.utc)
             }}
         )
         
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Mapping not found")
         
+        await mapping_index.notify_changed(db)
+        
         return {"success": True, "message": "Mapping deactivated"}
         
     except HTTPException:
@@ -195,54 +208,130 @@ async def delete_mapping(jobdiva_user_id: str):
 # Interaction Logs
 @router.get("/logs", response_model=List[InteractionLog])
 async def list_interaction_logs(
-    limit: int = 100,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
     interaction_type: str = None,
-    candidate_id: str = None
+    candidate_id: str = None,
+    recruiter_id: str = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    fast: bool = False,
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """
-    List interaction logs with optional filtering.
+    List interaction logs, newest first, with optional filtering.
+    When more logs match, the `X-Next-Cursor` header holds the `cursor`
+    value for the next page. The first page also sets `X-Feed-Cursor`, the
+    `cursor` to open /logs/stream with.
+    `fields=a,b` returns only those columns; it (or `fast=true`) skips
+    per-row validation (see services/fast_json.py).
     """
     try:
-        db = await get_db()
-        
-        query = {}
-        if interaction_type:
-            query["interaction_type"] = interaction_type
-        if candidate_id:
-            query["candidate_id"] = candidate_id
-        
-        logs = await db.interaction_logs.find(
-            query,
-            {"_id": 0}
-        ).sort("timestamp", -1).limit(limit).to_list(limit)
-        
-        # Convert ISO strings
-        for log in logs:
-            if isinstance(log.get('timestamp'), str):
-                log['timestamp'] = datetime.fromisoformat(log['timestamp'])
-        
-        return logs
+        names = fast_json.parse_fields(InteractionLog, fields)
+        query = log_export.build_query(
+            interaction_type=interaction_type,
+            candidate_id=candidate_id,
+            recruiter_id=recruiter_id,
+            since=since,
+            until=until,
+            cursor=cursor,
+        )
+        logs, next_cursor = await log_export.fetch_page(
+            db, query, limit, fast_json.projection(names, extra=("timestamp",))
+        )
+        if fast or names:
+            # A returned Response bypasses the injected one, so set the header on it
+            response = fast_json.FastJSONResponse(fast_json.trusted_rows(InteractionLog, logs, names))
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        if not cursor and logs:
+            response.headers["X-Feed-Cursor"] = log_export.encode_cursor(logs[0])
+
+        return response if fast or names else logs
         
+    except ValueError as e:
+        # Unknown fields= names or a malformed cursor
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error listing logs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/logs/export")
+async def export_interaction_logs(
+    format: str = Query(log_export.NDJSON, pattern="^(ndjson|csv)$"),
+    interaction_type: str = None,
+    candidate_id: str = None,
+    recruiter_id: str = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """
+    Stream every matching interaction log as NDJSON or CSV, newest first.
+    """
+    query = log_export.build_query(
+        interaction_type=interaction_type,
+        candidate_id=candidate_id,
+        recruiter_id=recruiter_id,
+        since=since,
+        until=until,
+    )
+    filename = f"interaction_logs.{format}"
+    return StreamingResponse(
+        log_export.export_logs(db, query, format),
+        media_type=log_export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/logs/stream")
+async def stream_interaction_logs(
+    request: Request,
+    interaction_type: str = None,
+    recruiter_id: str = None,
+    cursor: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """
+    Server-Sent Events feed of new and updated interaction logs.
+    Resumes after `cursor` or the `Last-Event-ID` header (see services/log_feed.py).
+    """
+    cursor = request.headers.get("last-event-id") or cursor
+    if cursor:
+        try:
+            log_export.decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    filters = {
+        name: value
+        for name, value in (("interaction_type", interaction_type), ("recruiter_id", recruiter_id))
+        if value is not None
+    }
+    return StreamingResponse(
+        log_feed.stream(db, cursor, filters),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/logs/stream/stats")
+async def interaction_log_stream_stats():
+    """
+    Live feed source, subscriber count and fan-out counters.
+    """
+    return log_feed.stats()
+
 @router.get("/logs/{log_id}", response_model=InteractionLog)
-async def get_interaction_log(log_id: str):
+async def get_interaction_log(log_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
     """
     Get a specific interaction log.
     """
     try:
-        db = await get_db()
-        
         log = await db.interaction_logs.find_one({"id": log_id}, {"_id": 0})
         
         if not log:
             raise HTTPException(status_code=404, detail="Log not found")
         
-        if isinstance(log.get('timestamp'), str):
-            log['timestamp'] = datetime.fromisoformat(log['timestamp'])
-        
         return log
         
     except HTTPException:
@@ -250,3 +339,214 @@ async def get_interaction_log(log_id: str):
     except Exception as e:
         logger.error(f"Error getting log: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+# Analytics
+@router.get("/analytics")
+async def recruiter_activity(
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    recruiter_id: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """
+    Calls / SMS per recruiter per UTC day (by type, direction and outcome)
+    and total call duration, read from the activity rollups.
+    Defaults to the last 7 days.
+    """
+    try:
+        until = until or datetime.now(timezone.utc).date()
+        since = since or until - timedelta(days=6)
+        return await activity_rollups.query(db, since, until, recruiter_id)
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error reading analytics: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Database
+@router.get("/db/pool-stats")
+async def db_pool_stats():
+    """
+    Connection pool statistics for the shared MongoDB client
+    (checked-out connections, check-out wait time, configured limits).
+    """
+    return get_pool_stats()
+
+@router.get("/db/index-stats")
+async def db_index_stats(db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Per-index usage counters ($indexStats) for registered collections,
+    least-used first, so unused indexes can be pruned.
+    """
+    try:
+        return await index_usage_stats(db)
+    except Exception as e:
+        logger.error(f"Error reading index stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Caches
+@router.get("/cache/mappings")
+async def mapping_index_stats():
+    """
+    State of the in-memory recruiter mapping index.
+    """
+    return mapping_index.stats()
+
+@router.post("/cache/mappings/reload")
+async def reload_mapping_index(db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Force this process to rebuild its mapping index and bump the shared
+    version so other replicas reload too.
+    """
+    await mapping_index.notify_changed(db)
+    return mapping_index.stats()
+
+@router.get("/cache/candidates")
+async def candidate_cache_stats():
+    """
+    Hit/miss/eviction counters for the JobDiva candidate-by-phone cache.
+    """
+    return jobdiva_service.candidate_cache_stats()
+
+@router.delete("/cache/candidates")
+async def invalidate_candidate_cache(phone: str = None):
+    """
+    Invalidate the cached lookup for one phone number, or the whole cache.
+    """
+    removed = jobdiva_service.invalidate_candidate_cache(phone)
+    return {"success": True, "removed": removed}
+
+# Upstreams
+@router.get("/upstreams/goto/rate-limits")
+async def goto_rate_limit_stats():
+    """
+    GoTo token bucket fill levels and retry counters.
+    """
+    return goto_service.rate_limit_stats()
+
+@router.get("/upstreams/tokens")
+async def oauth_token_stats():
+    """
+    Expiry and refresh counters of the shared upstream OAuth tokens (never the tokens).
+    """
+    return token_broker.broker_stats()
+
+@router.get("/upstreams/breakers")
+async def circuit_breaker_stats():
+    """
+    State, window rates and recent transitions of each upstream circuit breaker.
+    """
+    return breaker_stats()
+
+@router.post("/upstreams/breakers/{name}/reset")
+async def reset_circuit_breaker(name: str):
+    """
+    Force an upstream circuit breaker back to closed.
+    """
+    breaker = reset_breaker(name)
+    if breaker is None:
+        raise HTTPException(status_code=404, detail="Circuit breaker not found")
+    return breaker.snapshot()
+
+@router.get("/tracing")
+async def tracing_stats():
+    """
+    Trace exporter, sampling ratio and span export counters.
+    """
+    return tracing.tracer.stats()
+
+# JobDiva notes
+@router.get("/notes/batcher")
+async def note_batcher_stats():
+    """
+    State and counters of the JobDiva note batching stage.
+    """
+    return note_batcher.stats()
+
+@router.post("/notes/backfill")
+async def backfill_notes(limit: int = 100, db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Write pending JobDiva notes that were deferred while JobDiva was unavailable.
+    """
+    try:
+        return await backfill_pending_notes(db, limit)
+    except Exception as e:
+        logger.error(f"Error backfilling notes: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Webhook queue
+@router.get("/webhooks/queue")
+async def webhook_queue_stats(db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Webhook queue depth, processing lag and worker counters.
+    """
+    try:
+        return await webhook_queue.queue_stats(db)
+    except Exception as e:
+        logger.error(f"Error reading webhook queue stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/webhooks/recording")
+async def webhook_recording_stats():
+    """
+    Whether this worker is recording incoming webhooks, and to which file.
+    """
+    return webhook_recorder.stats()
+
+@router.post("/webhooks/recording/start")
+async def start_webhook_recording():
+    """
+    Start recording incoming webhooks on this worker for offline replay.
+    """
+    try:
+        return webhook_recorder.start()
+    except Exception as e:
+        logger.error(f"Error starting webhook recording: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/webhooks/recording/stop")
+async def stop_webhook_recording():
+    """
+    Stop recording and write out buffered events.
+    """
+    return await webhook_recorder.stop()
+
+@router.get("/webhooks/dedup")
+async def webhook_dedup_stats(db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Counters of duplicate webhook deliveries that were suppressed.
+    """
+    try:
+        return await webhook_dedup.dedup_stats(db)
+    except Exception as e:
+        logger.error(f"Error reading webhook dedup stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/webhooks/dead-letters")
+async def list_webhook_dead_letters(limit: int = 100, db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    List webhook events that exhausted their retries.
+    """
+    try:
+        return await webhook_queue.list_dead_letters(db, limit)
+    except Exception as e:
+        logger.error(f"Error listing dead letters: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/webhooks/dead-letters/{queue_id}/replay")
+async def replay_webhook_dead_letter(queue_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Put a dead-lettered webhook event back on the queue.
+    """
+    try:
+        if not await webhook_queue.replay_dead_letter(db, queue_id):
+            raise HTTPException(status_code=404, detail="Dead letter not found")
+        
+        return {"success": True, "message": "Event re-queued", "queue_id": queue_id}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error replaying dead letter: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
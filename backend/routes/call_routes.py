@@ -1,26 +1,24 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from motor.motor_asyncio import AsyncIOMotorDatabase
 import logging
 from datetime import datetime, timezone
-import os
 
 from models.bridge_models import CallStartRequest, CallStartResponse
 from models.mapping_models import InteractionLog
 from services.goto_service import goto_service
 from services.jobdiva_service import jobdiva_service
 from utils.phone_utils import normalize_phone_e164
+from services.database import get_db
+from services.mapping_index import mapping_index
+from services import activity_rollups, call_sessions, tracing
+from services.log_feed import log_feed
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/call", tags=["Calls"])
 
-async def get_db() -> AsyncIOMotorDatabase:
-    from motor.motor_asyncio import AsyncIOMotorClient
-    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
-    return client[os.environ['DB_NAME']]
-
 @router.post("/start", response_model=CallStartResponse)
-async def start_call(request: CallStartRequest):
+async def start_call(request: CallStartRequest, db: AsyncIOMotorDatabase = Depends(get_db)):
     """
     Initiate a call from recruiter to candidate via GoTo Connect.
     
@@ -32,16 +30,14 @@ async def start_call(request: CallStartRequest):
     5. Log interaction in database
     """
     try:
-        db = await get_db()
-        
         # Normalize phone numbers
         candidate_phone = normalize_phone_e164(request.candidate_phone)
         
         # Look up recruiter's GoTo mapping
-        mapping = await db.user_mappings.find_one({
-            "jobdiva_user_id": request.recruiter_id or request.recruiter_name,
-            "is_active": True
-        }, {"_id": 0})
+        with tracing.span("mapping.lookup"):
+            mapping = await mapping_index.find_by_jobdiva_user_id(
+                db, request.recruiter_id or request.recruiter_name
+            )
         
         if not mapping:
             logger.warning(f"No mapping found for recruiter {request.recruiter_name}. Using mock data.")
@@ -54,11 +50,12 @@ async def start_call(request: CallStartRequest):
         logger.info(f"Initiating call from {recruiter_phone} to {candidate_phone}")
         
         # Initiate call via GoTo Connect
-        goto_result = await goto_service.initiate_call(
-            from_phone=recruiter_phone,
-            to_phone=candidate_phone,
-            goto_user_id=goto_user_id
-        )
+        with tracing.span("goto.initiate_call"):
+            goto_result = await goto_service.initiate_call(
+                from_phone=recruiter_phone,
+                to_phone=candidate_phone,
+                goto_user_id=goto_user_id
+            )
         
         if not goto_result["success"]:
             raise HTTPException(status_code=500, detail="Failed to initiate call via GoTo Connect")
@@ -84,10 +81,11 @@ async def start_call(request: CallStartRequest):
         
         if request.candidate_id:
             try:
-                note_result = await jobdiva_service.create_candidate_note(
-                    candidate_id=request.candidate_id,
-                    note_text=note_text
-                )
+                with tracing.span("jobdiva.create_note"):
+                    note_result = await jobdiva_service.create_candidate_note(
+                        candidate_id=request.candidate_id,
+                        note_text=note_text
+                    )
                 jobdiva_note_created = note_result["success"]
                 jobdiva_note_id = note_result.get("note_id")
             except Exception as e:
@@ -113,13 +111,25 @@ async def start_call(request: CallStartRequest):
         )
         
         log_dict = interaction_log.model_dump()
-        log_dict['timestamp'] = log_dict['timestamp'].isoformat()
-        await db.interaction_logs.insert_one(log_dict)
+        with tracing.span("log.insert"):
+            # GoTo may already have reported the call (see call_sessions.py)
+            existing_log = await call_sessions.record_start(db, log_dict)
+            if existing_log is None:
+                await activity_rollups.record(db, log_dict)
+            else:
+                merged = call_sessions.start_changes(log_dict)
+                await activity_rollups.record_change(db, existing_log, merged)
+        if existing_log is None:
+            interaction_log_id = interaction_log.id
+            log_feed.publish_insert(log_dict)
+        else:
+            interaction_log_id = existing_log["id"]
+            log_feed.publish_update({**existing_log, **merged})
         
         return CallStartResponse(
             success=True,
             message="Call initiated successfully",
-            interaction_log_id=interaction_log.id,
+            interaction_log_id=interaction_log_id,
             goto_call_id=goto_result.get("call_id"),
             call_method=call_method,
             tel_uri=tel_uri,
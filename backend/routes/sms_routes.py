@@ -1,11 +1,20 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 
+from services import tracing
+from services.circuit_breaker import CircuitOpenError
+from services.database import get_db
 from services.goto_service import goto_service, GoToError
+from services.sms_bulk_service import bulk_sms_service
 
 router = APIRouter(prefix="/sms", tags=["sms"])
 
+# Use a default GoTo number if not provided in the request
+FROM_NUMBER_DEFAULT = "+17323531312"  # TODO: replace with your real GoTo SMS number
+
 
 class SendSmsRequest(BaseModel):
     candidate_phone: str = Field(..., description="Candidate phone number")
@@ -22,24 +31,47 @@ class SendSmsRequest(BaseModel):
     )
 
 
+class BulkSmsRecipient(BaseModel):
+    candidate_phone: str = Field(..., description="Candidate phone number")
+    candidate_name: Optional[str] = Field(None, description="Candidate name (for logging)")
+    candidate_id: Optional[str] = Field(None, description="JobDiva candidate id")
+    message: Optional[str] = Field(
+        None,
+        description="Per-candidate SMS body (if omitted, uses the job's default message)",
+    )
+
+
+class BulkSmsRequest(BaseModel):
+    recipients: List[BulkSmsRecipient] = Field(..., min_length=1, description="Candidates to text")
+    message: Optional[str] = Field(None, description="Default SMS body for recipients without one")
+    recruiter_name: str = Field(..., description="Recruiter name (for logging)")
+    from_phone: Optional[str] = Field(
+        None,
+        description="GoTo SMS-enabled number (if omitted, uses default configured number)",
+    )
+    concurrency: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Concurrent sends (capped by SMS_BULK_MAX_CONCURRENCY)",
+    )
+
+
 @router.post("/send")
 async def send_sms_handler(payload: SendSmsRequest):
     """
     Send an SMS via GoTo and (optionally) log it in JobDiva as a journal entry.
     """
 
-    # Use a default GoTo number if not provided in the request
-    FROM_NUMBER_DEFAULT = "+17323531312"  # TODO: replace with your real GoTo SMS number
-
     owner_phone_number = payload.from_phone or FROM_NUMBER_DEFAULT
 
     try:
         # Map API fields -> GoTo API
-        goto_response = await goto_service.send_sms(
-            owner_phone_number=owner_phone_number,
-            contact_phone_numbers=[payload.candidate_phone],
-            body=payload.message,
-        )
+        with tracing.span("goto.send_sms"):
+            goto_response = await goto_service.send_sms(
+                owner_phone_number=owner_phone_number,
+                contact_phone_numbers=[payload.candidate_phone],
+                body=payload.message,
+            )
 
         # TODO: log to JobDiva here:
         # - candidate_phone / candidate_name
@@ -57,10 +89,81 @@ async def send_sms_handler(payload: SendSmsRequest):
             "goto": goto_response,
         }
 
+    except CircuitOpenError as e:
+        # GoTo is failing; fail fast instead of waiting on timeouts
+        raise HTTPException(status_code=503, detail=str(e))
+
     except GoToError as e:
         # Controlled errors from GoTo (token refresh, SMS API, etc.)
         raise HTTPException(status_code=502, detail=str(e))
 
     except Exception as e:
         # Unexpected errors
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
+
+
+@router.post("/bulk")
+async def send_bulk_sms_handler(
+    payload: BulkSmsRequest,
+    stream: bool = True,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    """
+    Send an SMS to many candidates with bounded concurrency.
+
+    The job keeps running if the client disconnects. With `stream=true`
+    (default) progress is streamed back as NDJSON; otherwise the job id is
+    returned and progress can be followed via /sms/bulk/{job_id}/events.
+    """
+    recipients = []
+    for recipient in payload.recipients:
+        body = recipient.message or payload.message
+        if not body:
+            raise HTTPException(
+                status_code=422,
+                detail=f"No message for recipient {recipient.candidate_phone} and no default message",
+            )
+        recipients.append({**recipient.model_dump(), "message": body})
+
+    try:
+        job = await bulk_sms_service.start_job(
+            db,
+            owner_phone_number=payload.from_phone or FROM_NUMBER_DEFAULT,
+            recipients=recipients,
+            recruiter_name=payload.recruiter_name,
+            concurrency=payload.concurrency,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
+
+    if not stream:
+        return {"status": "accepted", "job_id": job.job_id, "total": len(recipients)}
+
+    return StreamingResponse(
+        bulk_sms_service.stream(db, job.job_id),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/bulk/{job_id}")
+async def get_bulk_sms_job(job_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Current status and counters of a bulk SMS job.
+    """
+    job = await bulk_sms_service.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Bulk SMS job not found")
+    return job
+
+
+@router.get("/bulk/{job_id}/events")
+async def stream_bulk_sms_job(job_id: str, after: int = 0, db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Resume the NDJSON progress stream of a bulk SMS job after result `seq`.
+    """
+    if not await bulk_sms_service.get_job(db, job_id):
+        raise HTTPException(status_code=404, detail="Bulk SMS job not found")
+    return StreamingResponse(
+        bulk_sms_service.stream(db, job_id, after=after),
+        media_type="application/x-ndjson",
+    )
@@ -0,0 +1,128 @@
+# backend/scripts/merge_call_logs.py
+"""
+Merge duplicate call logs (several interaction logs with the same
+`goto_call_id`), left by versions that inserted a log per racing webhook.
+
+The unique call index (services/call_sessions.py) cannot be built while
+duplicates exist; `ensure_indexes` logs the failure at startup and call
+webhooks are refused until the index is in place. This
+command keeps the oldest log of each call, folds the others into it (the
+furthest lifecycle state, the longest duration, any JobDiva note) and
+deletes them. Restart the app afterwards to build the index, then rebuild
+the rollups of the affected days (printed at the end).
+
+Usage (from backend/, with MONGO_URL and DB_NAME set or in .env):
+
+    python -m scripts.merge_call_logs --dry-run
+    python -m scripts.merge_call_logs
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from services import activity_rollups, database
+from services.call_sessions import COMPLETED, STATES
+
+logger = logging.getLogger("merge_call_logs")
+
+
+def _rank(log: Dict[str, Any]) -> int:
+    status = log.get("status")
+    # Unknown statuses (e.g. "failed" on a start) rank below every webhook state
+    return STATES.index(status) if status in STATES else -1
+
+
+def merge_logs(logs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fields to set on the oldest of `logs` (ordered by timestamp) to merge the rest into it."""
+    keep = logs[0]
+    furthest = max(logs, key=_rank)
+    merged: Dict[str, Any] = {"status": furthest.get("status")}
+    # The latest stated outcome, preferring the events that completed the call
+    results = sorted(
+        (log for log in logs if log.get("call_result")), key=lambda log: log.get("status") == COMPLETED
+    )
+    if results:
+        merged["call_result"] = results[-1]["call_result"]
+    durations = [log["call_duration"] for log in logs if log.get("call_duration") is not None]
+    if durations:
+        merged["call_duration"] = max(durations)
+    for key in ("candidate_id", "recruiter_id", "goto_session_id"):
+        if keep.get(key) is None:
+            merged[key] = next((log[key] for log in logs if log.get(key) is not None), None)
+    noted = next((log for log in logs if log.get("jobdiva_note_created")), None)
+    if noted is not None:
+        merged.update(jobdiva_note_created=True, jobdiva_note_id=noted.get("jobdiva_note_id"), jobdiva_note_error=None)
+    return merged
+
+
+async def merge_duplicates(db: AsyncIOMotorDatabase, dry_run: bool = False) -> Dict[str, Any]:
+    pipeline = [
+        {"$match": {"interaction_type": "call", "goto_call_id": {"$type": "string"}}},
+        {"$group": {"_id": "$goto_call_id", "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    summary: Dict[str, Any] = {"calls": 0, "logs_removed": 0}
+    days: Set[date] = set()
+    async for group in db.interaction_logs.aggregate(pipeline, allowDiskUse=True):
+        logs = await db.interaction_logs.find(
+            {"goto_call_id": group["_id"], "interaction_type": "call"}, {"_id": 0}
+        ).sort([("timestamp", 1), ("id", 1)]).to_list(None)
+        if len(logs) < 2:
+            continue
+        summary["calls"] += 1
+        summary["logs_removed"] += len(logs) - 1
+        days.update(activity_rollups.day_of(log["timestamp"]).date() for log in logs)
+        if dry_run:
+            continue
+        await db.interaction_logs.update_one({"id": logs[0]["id"]}, {"$set": merge_logs(logs)})
+        await db.interaction_logs.delete_many({"id": {"$in": [log["id"] for log in logs[1:]]}})
+    summary["days"] = sorted(day.isoformat() for day in days)
+    return summary
+
+
+async def run(args: argparse.Namespace) -> int:
+    # The repo-root .env, as loaded by server.py
+    load_dotenv(Path(__file__).resolve().parent.parent.parent / ".env")
+    mongo_url = os.getenv("MONGO_URL")
+    db_name = os.getenv("DB_NAME")
+    if not mongo_url or not db_name:
+        logger.error("MONGO_URL and DB_NAME must be set")
+        return 1
+
+    db = database.connect(mongo_url, db_name)
+    try:
+        summary = await merge_duplicates(db, dry_run=args.dry_run)
+    finally:
+        database.close()
+    verb = "Would merge" if args.dry_run else "Merged"
+    logger.info("%s %d calls (%d duplicate logs)", verb, summary["calls"], summary["logs_removed"])
+    if summary["days"] and not args.dry_run:
+        logger.info(
+            "Rebuild the affected rollups: python -m scripts.rebuild_rollups --since %s --until %s",
+            summary["days"][0], summary["days"][-1],
+        )
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Merge duplicate call logs (same goto_call_id).")
+    parser.add_argument("--dry-run", action="store_true", help="only count duplicates")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+# backend/scripts/migrate_timestamps.py
+"""
+Convert ISO-string timestamps to native BSON datetimes, in place.
+
+Older versions stored `created_at` / `updated_at` / `timestamp` as ISO
+strings. This command rewrites them as datetimes in batches, ordered by
+`_id`, while the app keeps running. Progress is checkpointed in the
+`migrations` collection, so an interrupted run resumes where it stopped;
+documents that are already converted are never touched, so running it
+again is always safe.
+
+Usage (from backend/, with MONGO_URL and DB_NAME set or in .env):
+
+    python -m scripts.migrate_timestamps                 # all collections
+    python -m scripts.migrate_timestamps --dry-run       # count only
+    python -m scripts.migrate_timestamps --collection interaction_logs --batch-size 500 --pause-ms 50
+    python -m scripts.migrate_timestamps --restart       # ignore checkpoints
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from services import database
+
+logger = logging.getLogger("migrate_timestamps")
+
+# collection -> datetime fields stored as ISO strings by older versions
+FIELDS: Dict[str, List[str]] = {
+    "user_mappings": ["created_at", "updated_at"],
+    "interaction_logs": ["timestamp"],
+    "status_checks": ["timestamp"],
+}
+
+MIGRATION_ID = "bson_datetimes"
+
+
+def parse_timestamp(value: str) -> Optional[datetime]:
+    """Parse an ISO-8601 string as stored by older versions; naive means UTC."""
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _string_filter(fields: List[str]) -> Dict[str, Any]:
+    return {"$or": [{field: {"$type": "string"}} for field in fields]}
+
+
+async def migrate_collection(
+    db: AsyncIOMotorDatabase,
+    collection: str,
+    batch_size: int = 1000,
+    pause_ms: int = 0,
+    dry_run: bool = False,
+    restart: bool = False,
+) -> Dict[str, int]:
+    fields = FIELDS[collection]
+    checkpoint_id = f"{MIGRATION_ID}:{collection}"
+    checkpoint = None if restart else await db.migrations.find_one({"_id": checkpoint_id})
+
+    query = _string_filter(fields)
+    remaining = await db[collection].count_documents(query)
+    summary = {"remaining": remaining, "converted": 0, "unparseable": 0}
+    if dry_run or not remaining:
+        logger.info("%s: %d documents to convert", collection, remaining)
+        return summary
+
+    last_id = checkpoint.get("last_id") if checkpoint else None
+    if last_id is not None:
+        logger.info("%s: resuming after _id=%s", collection, last_id)
+
+    started = time.perf_counter()
+    while True:
+        batch_query = dict(query)
+        if last_id is not None:
+            batch_query["_id"] = {"$gt": last_id}
+        docs = await db[collection].find(
+            batch_query, {field: 1 for field in fields}
+        ).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not docs:
+            break
+
+        updates = []
+        for doc in docs:
+            converted = {}
+            for field in fields:
+                value = doc.get(field)
+                if not isinstance(value, str):
+                    continue
+                parsed = parse_timestamp(value)
+                if parsed is None:
+                    summary["unparseable"] += 1
+                    logger.warning("%s _id=%s: cannot parse %s=%r", collection, doc["_id"], field, value)
+                    continue
+                converted[field] = parsed
+            if converted:
+                # Guard on the old value so a concurrent app write always wins
+                guard = {"_id": doc["_id"], **{field: doc[field] for field in converted}}
+                updates.append(UpdateOne(guard, {"$set": converted}))
+
+        if updates:
+            result = await db[collection].bulk_write(updates, ordered=False)
+            summary["converted"] += result.modified_count
+
+        last_id = docs[-1]["_id"]
+        await db.migrations.update_one(
+            {"_id": checkpoint_id},
+            {"$set": {
+                "last_id": last_id,
+                "updated_at": datetime.now(timezone.utc),
+            }, "$inc": {"converted": len(updates)}},
+            upsert=True,
+        )
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "%s: %d/%d converted (%.0f docs/s)",
+            collection, summary["converted"], remaining,
+            summary["converted"] / elapsed if elapsed > 0 else 0.0,
+        )
+        if pause_ms:
+            await asyncio.sleep(pause_ms / 1000)
+
+    await db.migrations.update_one(
+        {"_id": checkpoint_id},
+        {"$set": {"completed_at": datetime.now(timezone.utc)}, "$unset": {"last_id": ""}},
+        upsert=True,
+    )
+    return summary
+
+
+async def run(args: argparse.Namespace) -> int:
+    # The repo-root .env, as loaded by server.py
+    load_dotenv(Path(__file__).resolve().parent.parent.parent / ".env")
+    mongo_url = os.getenv("MONGO_URL")
+    db_name = os.getenv("DB_NAME")
+    if not mongo_url or not db_name:
+        logger.error("MONGO_URL and DB_NAME must be set")
+        return 1
+
+    db = database.connect(mongo_url, db_name)
+    try:
+        for collection in args.collection or list(FIELDS):
+            summary = await migrate_collection(
+                db,
+                collection,
+                batch_size=args.batch_size,
+                pause_ms=args.pause_ms,
+                dry_run=args.dry_run,
+                restart=args.restart,
+            )
+            logger.info("%s: %s", collection, summary)
+    finally:
+        database.close()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Convert ISO-string timestamps to BSON datetimes.")
+    parser.add_argument("--collection", action="append", choices=list(FIELDS),
+                        help="collection to migrate (repeatable; default: all)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pause-ms", type=int, default=0, help="sleep between batches to limit load")
+    parser.add_argument("--dry-run", action="store_true", help="only count documents to convert")
+    parser.add_argument("--restart", action="store_true", help="ignore saved checkpoints")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
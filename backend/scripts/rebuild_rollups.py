@@ -0,0 +1,72 @@
+# backend/scripts/rebuild_rollups.py
+"""
+Recompute per-recruiter activity rollups from `interaction_logs`.
+
+Use it once to backfill history after deploying rollups, or to repair a
+range whose incremental updates failed. Each day in the range is replaced
+wholesale, so running it again is always safe. Logs must have BSON
+datetime timestamps (run scripts.migrate_timestamps first).
+
+Usage (from backend/, with MONGO_URL and DB_NAME set or in .env):
+
+    python -m scripts.rebuild_rollups --since 2026-01-01
+    python -m scripts.rebuild_rollups --since 2026-10-01 --until 2026-10-16 --batch-size 500 --pause-ms 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from services import activity_rollups, database
+
+logger = logging.getLogger("rebuild_rollups")
+
+
+async def run(args: argparse.Namespace) -> int:
+    # The repo-root .env, as loaded by server.py
+    load_dotenv(Path(__file__).resolve().parent.parent.parent / ".env")
+    mongo_url = os.getenv("MONGO_URL")
+    db_name = os.getenv("DB_NAME")
+    if not mongo_url or not db_name:
+        logger.error("MONGO_URL and DB_NAME must be set")
+        return 1
+
+    until = args.until or datetime.now(timezone.utc).date()
+    if until < args.since:
+        logger.error("--until must not be before --since")
+        return 1
+
+    db = database.connect(mongo_url, db_name)
+    try:
+        summary = await activity_rollups.rebuild(
+            db, args.since, until, batch_size=args.batch_size, pause_ms=args.pause_ms
+        )
+        logger.info("Rebuilt rollups %s..%s: %s", args.since, until, summary)
+    finally:
+        database.close()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Recompute activity rollups from interaction logs.")
+    parser.add_argument("--since", type=date.fromisoformat, required=True, help="first UTC day (YYYY-MM-DD)")
+    parser.add_argument("--until", type=date.fromisoformat, help="last UTC day (default: today)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pause-ms", type=int, default=0, help="sleep between batches to limit load")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,11 @@
 # server.py
 
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Depends
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from contextlib import asynccontextmanager
 import os
 import logging
 from pathlib import Path
@@ -14,6 +16,17 @@ from datetime import datetime, timezone
 
 # Import route modules
 from routes import sms_routes, call_routes, webhook_routes, admin_routes
+from services import call_sessions, database, http_clients, metrics, token_broker, tracing
+from services.indexes import ensure_indexes
+from services.log_feed import log_feed
+from services.mapping_index import mapping_index
+from services.note_backfill import note_backfiller
+from services.note_batcher import note_batcher
+from services.sms_bulk_service import bulk_sms_service
+from services.webhook_queue import worker_pool
+from services.webhook_recorder import RECORD_ON_START, webhook_recorder
+from services.database import get_db
+from services.fast_json import FastJSONResponse, trusted_rows
 
 # OPTIONAL: debug helper to verify GoTo token, adjust import path as needed
 # If goto_service.py is in a "services" package:
@@ -32,14 +45,59 @@ if not mongo_url:
 db_name = os.getenv("DB_NAME")
 if not db_name:
     raise RuntimeError("DB_NAME is not set. Check your .env or environment variables.")
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ["DB_NAME"]]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled Mongo client for the whole process (see services/database.py)
+    db = database.connect(mongo_url, db_name)
+    # Declarative index registry (see services/indexes.py)
+    await ensure_indexes(db)
+    # Call webhooks are refused until the unique call index exists (see services/call_sessions.py)
+    await call_sessions.check_unique_index(db)
+    # Bulk SMS jobs left running by a stopped process (see services/sms_bulk_service.py)
+    await bulk_sms_service.fail_stale_jobs(db)
+    # Keep-alive HTTP pools for GoTo / JobDiva (see services/http_clients.py)
+    await http_clients.start()
+    # Background OAuth token refresh shared across workers (see services/token_broker.py)
+    token_broker.start(db)
+    # In-memory recruiter mapping index, kept in sync across replicas
+    await mapping_index.start(db)
+    # Optional per-candidate JobDiva note coalescing (see services/note_batcher.py)
+    note_batcher.start(db)
+    # Writes JobDiva notes deferred while its circuit breaker was open
+    note_backfiller.start(db)
+    # Drains the durable webhook queue (see services/webhook_queue.py)
+    await worker_pool.start(db)
+    # Live interaction log feed for the admin UI (see services/log_feed.py)
+    log_feed.start(db)
+    # Batched span export (see services/tracing.py)
+    tracing.tracer.start()
+    # Optional capture of incoming webhooks for replay (see services/webhook_recorder.py)
+    if RECORD_ON_START:
+        webhook_recorder.start()
+    try:
+        yield
+    finally:
+        await webhook_recorder.stop()
+        await log_feed.stop()
+        await worker_pool.stop()
+        await bulk_sms_service.stop()
+        await note_batcher.stop()
+        await note_backfiller.stop()
+        await mapping_index.stop()
+        await token_broker.stop()
+        await http_clients.close()
+        await tracing.tracer.stop()
+        database.close()
+
 
 # Create the main app without a prefix
 app = FastAPI(
     title="JobDiva-GoTo Bridge API",
     description="Bridge service for integrating JobDiva ATS with GoTo Connect",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Create a router with the /api prefix
@@ -74,6 +132,7 @@ async def root():
         "status": "operational",
         "endpoints": {
             "sms": "/api/sms/send",
+            "sms_bulk": "/api/sms/bulk",
             "call": "/api/call/start",
             "webhooks": {
                 "messages": "/api/webhooks/goto/messages",
@@ -88,28 +147,27 @@ async def root():
 
 
 @api_router.post("/status", response_model=StatusCheck)
-async def create_status_check(input: StatusCheckCreate):
+async def create_status_check(
+    input: StatusCheckCreate, db: AsyncIOMotorDatabase = Depends(get_db)
+):
     status_dict = input.model_dump()
     status_obj = StatusCheck(**status_dict)
 
-    # Convert to dict and serialize datetime to ISO string for MongoDB
+    # Stored as a native BSON datetime
     doc = status_obj.model_dump()
-    doc["timestamp"] = doc["timestamp"].isoformat()
 
     await db.status_checks.insert_one(doc)
     return status_obj
 
 
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
+async def get_status_checks(fast: bool = False, db: AsyncIOMotorDatabase = Depends(get_db)):
     # Exclude MongoDB's _id field from the query results
     status_checks = await db.status_checks.find({}, {"_id": 0}).to_list(1000)
 
-    # Convert ISO string timestamps back to datetime objects
-    for check in status_checks:
-        if isinstance(check["timestamp"], str):
-            check["timestamp"] = datetime.fromisoformat(check["timestamp"])
-
+    if fast:
+        # Skip per-row validation (see services/fast_json.py)
+        return FastJSONResponse(trusted_rows(StatusCheck, status_checks))
     return status_checks
 
 
@@ -132,22 +190,33 @@ api_router.include_router(admin_routes.router)
 # Include the router in the main app
 app.include_router(api_router)
 
+
+# Prometheus scrape endpoint (see services/metrics.py)
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+# Request count / latency / in-flight metrics for every /api route
+metrics.instrument_routes(app)
+
+# Root span per request, continuing an incoming traceparent
+app.add_middleware(tracing.TracingMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get("CORS_ORIGINS", "*").split(","),
     allow_methods=["*"],
     allow_headers=["*"],
+    # Page / live feed cursors of /api/admin/logs, request trace id
+    expose_headers=["X-Next-Cursor", "X-Feed-Cursor", "X-Trace-Id"],
 )
 
-# Configure logging
+# Configure logging; trace ids correlate log lines with traces
+tracing.install_log_correlation()
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    format="%(asctime)s - %(name)s - %(levelname)s - [trace=%(trace_id)s] %(message)s",
 )
 logger = logging.getLogger(__name__)
-
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
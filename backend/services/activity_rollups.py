@@ -0,0 +1,299 @@
+# backend/services/activity_rollups.py
+"""
+Per-recruiter, per-day activity rollups.
+
+`activity_rollups` holds one document per (recruiter, UTC day) with the
+number of interaction logs per type / direction / outcome and the total
+call duration:
+
+    {"_id": "2026-10-17:jd_user_001", "recruiter_id": "jd_user_001",
+     "day": 2026-10-17T00:00Z, "interactions": 12, "call_duration": 840,
+     "counts": {"call": {"outbound": {"answered": 5, "missed": 2}},
+                "sms": {"inbound": {"received": 3}, "outbound": {"delivered": 2}}}}
+
+The outcome of a log is its `call_result` when set, else its `status`, so a
+rollup is exactly a count of the logs as they currently stand. The write
+paths keep it current with atomic `$inc` upserts: `record()` when a log is
+inserted, `record_change()` when a log's outcome, duration or recruiter
+changes (a call moves from "initiated" to its result, a /call/start merged
+into a webhook's log assigns its recruiter). Logs
+without a recruiter are rolled up under `recruiter_id: null`.
+
+Dashboard queries read at most one document per recruiter per day,
+however many logs there are. `rebuild()` (python -m scripts.rebuild_rollups)
+recomputes rollups from `interaction_logs` in batches, e.g. to backfill
+history or repair drift after a failed write.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DeleteMany, IndexModel, ReplaceOne
+from pymongo.errors import DuplicateKeyError
+
+from services import indexes
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "activity_rollups"
+
+# Longest range /admin/analytics answers in one request
+MAX_DAYS = 366
+
+indexes.register(
+    COLLECTION,
+    IndexModel([("day", ASCENDING), ("recruiter_id", ASCENDING)], name="day_recruiter_id"),
+    IndexModel([("recruiter_id", ASCENDING), ("day", ASCENDING)], name="recruiter_id_day"),
+)
+
+
+def day_of(timestamp: datetime) -> datetime:
+    """UTC midnight of the day `timestamp` falls on (naive means UTC)."""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    day = timestamp.astimezone(timezone.utc).date()
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def _field(value: Any) -> str:
+    # Values become field names: no dots, no leading "$"
+    return str(value or "unknown").replace(".", "_").lstrip("$") or "unknown"
+
+
+def outcome(log: Dict[str, Any]) -> str:
+    return _field(log.get("call_result") or log.get("status"))
+
+
+def _rollup_id(recruiter_id: Optional[str], day: datetime) -> str:
+    return f"{day:%Y-%m-%d}:{recruiter_id or ''}"
+
+
+def increments(log: Dict[str, Any], sign: int = 1) -> Dict[str, int]:
+    """`$inc` document for adding (sign=1) or removing (sign=-1) `log`."""
+    path = f"counts.{_field(log.get('interaction_type'))}.{_field(log.get('direction'))}.{outcome(log)}"
+    inc = {"interactions": sign, path: sign}
+    if log.get("call_duration"):
+        inc["call_duration"] = sign * int(log["call_duration"])
+    return inc
+
+
+async def _apply(db: AsyncIOMotorDatabase, log: Dict[str, Any], inc: Dict[str, int]) -> None:
+    recruiter_id = log.get("recruiter_id")
+    day = day_of(log["timestamp"])
+    update = {
+        "$inc": inc,
+        "$set": {"updated_at": datetime.now(timezone.utc)},
+        "$setOnInsert": {"recruiter_id": recruiter_id, "day": day},
+    }
+    if log.get("recruiter_name"):
+        update["$set"]["recruiter_name"] = log["recruiter_name"]
+
+    for attempt in range(2):
+        try:
+            await db[COLLECTION].update_one({"_id": _rollup_id(recruiter_id, day)}, update, upsert=True)
+            return
+        except DuplicateKeyError:
+            # Two first writes for the same rollup raced; the second one updates
+            if attempt:
+                raise
+
+
+async def record(db: AsyncIOMotorDatabase, log: Dict[str, Any]) -> None:
+    """Count a newly inserted interaction log. Failures are logged, not raised."""
+    try:
+        await _apply(db, log, increments(log))
+    except Exception as e:
+        logger.error(f"Failed to update activity rollup for log {log.get('id')}: {e}")
+
+
+async def record_change(db: AsyncIOMotorDatabase, before: Dict[str, Any], changes: Dict[str, Any]) -> None:
+    """
+    Move a log's contribution from its old state to `before` + `changes`
+    (to another recruiter's rollup when `changes` reassigns the log).
+    """
+    after = {**before, **changes}
+    if after.get("recruiter_id") != before.get("recruiter_id"):
+        try:
+            await _apply(db, before, increments(before, -1))
+            await _apply(db, after, increments(after))
+        except Exception as e:
+            logger.error(f"Failed to update activity rollup for log {before.get('id')}: {e}")
+        return
+
+    inc: Dict[str, int] = defaultdict(int)
+    for key, value in increments(before, -1).items():
+        inc[key] += value
+    for key, value in increments(after).items():
+        inc[key] += value
+    inc = {key: value for key, value in inc.items() if value}
+    if not inc:
+        return
+    try:
+        await _apply(db, before, inc)
+    except Exception as e:
+        logger.error(f"Failed to update activity rollup for log {before.get('id')}: {e}")
+
+
+def _day_range(since: date, until: date) -> Tuple[datetime, datetime]:
+    start = datetime.combine(since, time.min, tzinfo=timezone.utc)
+    end = datetime.combine(until, time.min, tzinfo=timezone.utc) + timedelta(days=1)
+    return start, end
+
+
+def _add_counts(total: Dict[str, Any], counts: Dict[str, Any]) -> None:
+    for key, value in counts.items():
+        if isinstance(value, dict):
+            _add_counts(total.setdefault(key, {}), value)
+        else:
+            total[key] = total.get(key, 0) + value
+
+
+async def query(
+    db: AsyncIOMotorDatabase,
+    since: date,
+    until: date,
+    recruiter_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Activity per recruiter between `since` and `until` (inclusive UTC days):
+    per-day rows plus totals over the range.
+    """
+    if until < since:
+        raise ValueError("until must not be before since")
+    if (until - since).days + 1 > MAX_DAYS:
+        raise ValueError(f"Range is limited to {MAX_DAYS} days")
+
+    start, end = _day_range(since, until)
+    filter_: Dict[str, Any] = {"day": {"$gte": start, "$lt": end}}
+    if recruiter_id is not None:
+        filter_["recruiter_id"] = recruiter_id
+
+    recruiters: Dict[Optional[str], Dict[str, Any]] = {}
+    cursor = db[COLLECTION].find(filter_, {"_id": 0, "updated_at": 0}).sort([("day", ASCENDING)])
+    async for doc in cursor:
+        entry = recruiters.setdefault(doc.get("recruiter_id"), {
+            "recruiter_id": doc.get("recruiter_id"),
+            "recruiter_name": None,
+            "totals": {"interactions": 0, "call_duration": 0, "counts": {}},
+            "days": [],
+        })
+        entry["recruiter_name"] = doc.get("recruiter_name") or entry["recruiter_name"]
+        day = {
+            "day": doc["day"].date().isoformat(),
+            "interactions": doc.get("interactions", 0),
+            "call_duration": doc.get("call_duration", 0),
+            "counts": doc.get("counts", {}),
+        }
+        entry["days"].append(day)
+        entry["totals"]["interactions"] += day["interactions"]
+        entry["totals"]["call_duration"] += day["call_duration"]
+        _add_counts(entry["totals"]["counts"], day["counts"])
+
+    return {
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "recruiters": sorted(recruiters.values(), key=lambda entry: entry["recruiter_id"] or ""),
+    }
+
+
+def _rollup_docs(day: datetime, logs: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    docs: Dict[str, Dict[str, Any]] = {}
+    for log in logs:
+        recruiter_id = log.get("recruiter_id")
+        doc = docs.setdefault(_rollup_id(recruiter_id, day), {
+            "recruiter_id": recruiter_id,
+            "day": day,
+            "interactions": 0,
+            "call_duration": 0,
+            "counts": {},
+        })
+        if log.get("recruiter_name"):
+            doc["recruiter_name"] = log["recruiter_name"]
+        for path, value in increments(log).items():
+            *parents, leaf = path.split(".")
+            node = doc
+            for key in parents:
+                node = node.setdefault(key, {})
+            node[leaf] = node.get(leaf, 0) + value
+    return docs
+
+
+async def _replace_day(db: AsyncIOMotorDatabase, day: datetime, logs: List[Dict[str, Any]]) -> int:
+    docs = _rollup_docs(day, logs)
+    now = datetime.now(timezone.utc)
+    operations: List[Any] = [DeleteMany({"day": day, "_id": {"$nin": list(docs)}})]
+    operations += [
+        ReplaceOne({"_id": rollup_id}, {**doc, "updated_at": now}, upsert=True)
+        for rollup_id, doc in docs.items()
+    ]
+    await db[COLLECTION].bulk_write(operations, ordered=True)
+    return len(docs)
+
+
+async def rebuild(
+    db: AsyncIOMotorDatabase,
+    since: date,
+    until: date,
+    batch_size: int = 1000,
+    pause_ms: int = 0,
+) -> Dict[str, int]:
+    """
+    Recompute rollups for `since`..`until` (inclusive UTC days) from
+    `interaction_logs`, reading logs `batch_size` at a time in timestamp
+    order and replacing each day's rollups once the day is complete.
+    Days without logs lose their rollups. Logs arriving for a day while it
+    is being rebuilt may be missed; rebuild today's rollups off-peak.
+    """
+    start, end = _day_range(since, until)
+    summary = {"logs": 0, "days": 0, "rollups": 0}
+    rebuilt_days: List[datetime] = []
+
+    current_day: Optional[datetime] = None
+    day_logs: List[Dict[str, Any]] = []
+    last: Optional[Tuple[datetime, str]] = None
+    projection = {
+        "_id": 0, "id": 1, "timestamp": 1, "recruiter_id": 1, "recruiter_name": 1,
+        "interaction_type": 1, "direction": 1, "status": 1, "call_result": 1, "call_duration": 1,
+    }
+
+    while True:
+        batch_query: Dict[str, Any] = {"timestamp": {"$gte": start, "$lt": end}}
+        if last is not None:
+            batch_query = {"$and": [batch_query, {"$or": [
+                {"timestamp": {"$gt": last[0]}},
+                {"timestamp": last[0], "id": {"$gt": last[1]}},
+            ]}]}
+        logs = await db.interaction_logs.find(batch_query, projection).sort(
+            [("timestamp", ASCENDING), ("id", ASCENDING)]
+        ).limit(batch_size).to_list(batch_size)
+        if not logs:
+            break
+
+        for log in logs:
+            day = day_of(log["timestamp"])
+            if day != current_day:
+                if current_day is not None:
+                    summary["rollups"] += await _replace_day(db, current_day, day_logs)
+                    rebuilt_days.append(current_day)
+                current_day, day_logs = day, []
+            day_logs.append(log)
+
+        summary["logs"] += len(logs)
+        last = (logs[-1]["timestamp"], logs[-1]["id"])
+        logger.info("Rollup rebuild: %d logs read, through %s", summary["logs"], last[0].isoformat())
+        if pause_ms:
+            await asyncio.sleep(pause_ms / 1000)
+
+    if current_day is not None:
+        summary["rollups"] += await _replace_day(db, current_day, day_logs)
+        rebuilt_days.append(current_day)
+
+    await db[COLLECTION].delete_many({"day": {"$gte": start, "$lt": end, "$nin": rebuilt_days}})
+    summary["days"] = len(rebuilt_days)
+    return summary
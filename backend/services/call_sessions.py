@@ -0,0 +1,255 @@
+# backend/services/call_sessions.py
+"""
+Call lifecycle state machine.
+
+GoTo sends several webhooks per call (ringing, answered, ...), can deliver
+them concurrently and out of order. Every event for a call is merged into
+the one interaction log with that `goto_call_id` by a single atomic
+`find_one_and_update` upsert (the /call/start log when there is one).
+
+The log's `status` only moves forward:
+
+    initiated -> ringing -> in_progress -> completed
+
+The upsert matches on the call id alone and enforces the order in an
+update pipeline: an event for a state the call has already passed leaves
+the log unchanged (a stale event), and a completed call stays completed.
+A stale event therefore never inserts a second log. Two first events for a
+call racing to insert are kept apart by the unique
+`goto_call_id_interaction_type_unique` index: the loser retries as an
+update. Without that index concurrent first events could still create
+duplicate logs, so call events are refused until `check_unique_index()`
+has found it (run `python -m scripts.merge_call_logs` when existing
+duplicates prevent it from being built).
+
+Only the transition into `completed` is reported as terminal, exactly once
+per call. The JobDiva note for a call is written then (see
+webhook_processor.py), not once per event.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from models.bridge_models import GoToCallEvent
+from services import indexes
+
+logger = logging.getLogger(__name__)
+
+INITIATED = "initiated"
+RINGING = "ringing"
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+STATES = (INITIATED, RINGING, IN_PROGRESS, COMPLETED)
+
+# call_result values that only report progress
+_RINGING_RESULTS = {"ringing", "alerting", "initiated"}
+_IN_PROGRESS_RESULTS = {"connected", "in_progress"}
+# Call ended, outcome not stated: an earlier event's call_result is kept
+_ENDED_RESULTS = {"ended", "completed", "hangup", "disconnected"}
+
+UNIQUE_INDEX = "goto_call_id_interaction_type_unique"
+
+indexes.register(
+    "interaction_logs",
+    # One call log per GoTo call (see check_unique_index)
+    IndexModel(
+        [("goto_call_id", ASCENDING), ("interaction_type", ASCENDING)],
+        name=UNIQUE_INDEX,
+        unique=True,
+        partialFilterExpression={"goto_call_id": {"$type": "string"}},
+    ),
+)
+
+
+class CallSessionsUnavailable(RuntimeError):
+    """Call events cannot be merged safely (the unique call index is missing)."""
+
+
+_unique_index_ready = False
+
+
+async def check_unique_index(db: AsyncIOMotorDatabase) -> bool:
+    """
+    Enable call event merging if the unique call index exists (run after
+    `ensure_indexes` at startup).
+    """
+    global _unique_index_ready
+    try:
+        _unique_index_ready = UNIQUE_INDEX in await db.interaction_logs.index_information()
+    except Exception as e:
+        logger.error(f"Failed to check call log indexes: {e}")
+        _unique_index_ready = False
+    if not _unique_index_ready:
+        logger.error(
+            f"Index {UNIQUE_INDEX} is missing: call webhooks are refused. Merge duplicate call logs with "
+            f"`python -m scripts.merge_call_logs` and restart."
+        )
+    return _unique_index_ready
+
+
+def event_state(event: GoToCallEvent) -> Tuple[str, Optional[str]]:
+    """
+    (state, call_result) reported by a call event. `call_result` is None
+    for events that do not state an outcome. Any other result (answered,
+    missed, voicemail, busy, ...) is the call's final outcome.
+    """
+    result = (event.call_result or "").lower()
+    if result in _RINGING_RESULTS:
+        return RINGING, None
+    if result in _IN_PROGRESS_RESULTS:
+        return IN_PROGRESS, None
+    if result in _ENDED_RESULTS:
+        return COMPLETED, None
+    return COMPLETED, result
+
+
+def _later_states(state: str) -> List[str]:
+    later = list(STATES[STATES.index(state) + 1:])
+    if state == COMPLETED:
+        # A completed call stays completed: the first terminal event wins
+        later.append(COMPLETED)
+    return later
+
+
+@dataclass
+class Transition:
+    applied: bool  # False: stale event, the call had already moved past it
+    log: Dict[str, Any]  # the call log as it stands after the event
+    before: Optional[Dict[str, Any]] = None  # None when the event created the log
+    terminal: bool = False  # the event completed the call
+
+    @property
+    def created(self) -> bool:
+        return self.applied and self.before is None
+
+
+def _merge_pipeline(
+    later_states: List[str], new_log: Dict[str, Any], changes: Dict[str, Any], duration: Optional[int]
+) -> List[Dict[str, Any]]:
+    # Pipeline stage for an upsert: a missing `id` means the document is new.
+    # Values are wrapped in $literal so strings starting with "$" stay data.
+    is_new = {"$eq": [{"$ifNull": ["$id", None]}, None]}
+    stale = {"$in": ["$status", later_states]}
+    fields: Dict[str, Any] = {
+        key: {"$cond": [is_new, {"$literal": value}, f"${key}"]}
+        for key, value in new_log.items()
+        if key not in changes and key not in ("goto_call_id", "interaction_type", "call_duration")
+    }
+    for key, value in changes.items():
+        fields[key] = {"$cond": [stale, f"${key}", {"$literal": value}]}
+    if duration is None:
+        fields["call_duration"] = {"$cond": [is_new, None, "$call_duration"]}
+    else:
+        # Events can arrive out of order; the longest duration is the latest
+        fields["call_duration"] = {"$cond": [stale, "$call_duration", {"$max": ["$call_duration", duration]}]}
+    return [{"$set": fields}]
+
+
+async def apply_event(
+    db: AsyncIOMotorDatabase,
+    event: GoToCallEvent,
+    new_log: Dict[str, Any],
+    extra_fields: Optional[Dict[str, Any]] = None,
+) -> Transition:
+    """
+    Merge `event` into its call log in one round-trip. `new_log` is the
+    document inserted when the call has no log yet; `extra_fields` are set
+    along with the event when it is applied (e.g. pending note fields).
+    Raises CallSessionsUnavailable until `check_unique_index()` succeeded.
+    """
+    if not _unique_index_ready:
+        raise CallSessionsUnavailable(f"Index {UNIQUE_INDEX} is missing; see scripts/merge_call_logs.py")
+
+    state, result = event_state(event)
+    later_states = _later_states(state)
+    changes: Dict[str, Any] = {"status": state, **(extra_fields or {})}
+    if result is not None:
+        changes["call_result"] = result
+    if event.session_id:
+        changes["goto_session_id"] = event.session_id
+
+    pipeline = _merge_pipeline(later_states, new_log, changes, event.duration)
+    filter_ = {"goto_call_id": event.call_id, "interaction_type": "call"}
+    for attempt in range(2):
+        try:
+            before = await db.interaction_logs.find_one_and_update(
+                filter_,
+                pipeline,
+                projection={"_id": 0},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE,
+            )
+            break
+        except DuplicateKeyError:
+            # A racing first event inserted the log; the retry updates it
+            if attempt:
+                raise
+
+    if before is None:
+        log = {**new_log, **changes, "goto_call_id": event.call_id}
+        return Transition(applied=True, log=log, terminal=state == COMPLETED)
+
+    if before.get("status") in later_states:
+        logger.info(f"Stale call event for {event.call_id} ({event.call_result}): call is already {before['status']}")
+        return Transition(applied=False, log=before, before=before)
+
+    log = {**before, **changes}
+    if event.duration is not None:
+        log["call_duration"] = max(before.get("call_duration") or 0, event.duration)
+    return Transition(applied=True, log=log, before=before, terminal=state == COMPLETED)
+
+
+# Set by /call/start on a log a webhook created first (the rest of the
+# webhook's log describes the call better)
+START_FIELDS = ("candidate_id", "candidate_name", "recruiter_id", "recruiter_name")
+# Set by /call/start when it created its JobDiva note (a failed start note
+# never overwrites the webhook's note outcome)
+NOTE_FIELDS = ("jobdiva_note_created", "jobdiva_note_id", "jobdiva_note_error")
+
+
+def start_changes(log: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields of a /call/start log merged into a log a webhook created first."""
+    merged = {key: log[key] for key in START_FIELDS if log.get(key) is not None}
+    if log.get("jobdiva_note_created"):
+        merged.update({key: log.get(key) for key in NOTE_FIELDS})
+    return merged
+
+
+async def record_start(db: AsyncIOMotorDatabase, log: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Insert the log of a call started with /call/start. When a webhook for
+    the call got there first, the start's candidate, recruiter and JobDiva
+    note (`start_changes`) are merged into that log instead. Returns the
+    existing log (None when inserted).
+    """
+    if not log.get("goto_call_id"):
+        await db.interaction_logs.insert_one(log)
+        return None
+
+    merged = start_changes(log)
+    update: Dict[str, Any] = {
+        "$setOnInsert": {key: value for key, value in log.items() if key not in merged and key != "goto_call_id"},
+    }
+    if merged:
+        update["$set"] = merged
+    for attempt in range(2):
+        try:
+            return await db.interaction_logs.find_one_and_update(
+                {"goto_call_id": log["goto_call_id"], "interaction_type": "call"},
+                update,
+                projection={"_id": 0},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE,
+            )
+        except DuplicateKeyError:
+            # A webhook inserted the log concurrently; the retry updates it
+            if attempt:
+                raise
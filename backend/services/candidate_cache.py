@@ -0,0 +1,180 @@
+# backend/services/candidate_cache.py
+"""
+Bounded TTL + LRU cache for JobDiva candidate-by-phone lookups.
+
+Keys are E.164 phone numbers. Found candidates and "not found" results are
+cached with separate TTLs so unknown numbers are re-checked sooner than
+known ones. Concurrent misses for the same number share one upstream search.
+
+Configured with env vars:
+- JOBDIVA_CANDIDATE_CACHE_SIZE          max entries (default 5000, 0 disables)
+- JOBDIVA_CANDIDATE_CACHE_TTL           seconds for found candidates (default 300)
+- JOBDIVA_CANDIDATE_CACHE_NEGATIVE_TTL  seconds for not-found results (default 60)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from utils.phone_utils import normalize_phone_e164
+
+
+class CandidateCache:
+    def __init__(
+        self,
+        max_entries: int = 5000,
+        ttl: float = 300.0,
+        negative_ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        # phone -> (expires_at, candidate or None)
+        self._entries: "OrderedDict[str, Tuple[float, Optional[dict]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.coalesced = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def key(phone: str) -> str:
+        return normalize_phone_e164(phone)
+
+    def get(self, phone: str) -> Tuple[bool, Optional[dict]]:
+        """Return (found_in_cache, candidate). A cached "not found" is (True, None)."""
+        key = self.key(phone)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+
+        expires_at, candidate = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return False, None
+
+        self._entries.move_to_end(key)
+        if candidate is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return True, candidate
+
+    def set(self, phone: str, candidate: Optional[dict]) -> None:
+        if not self.enabled:
+            return
+        key = self.key(phone)
+        ttl = self.ttl if candidate is not None else self.negative_ttl
+        if ttl <= 0:
+            self._entries.pop(key, None)
+            return
+
+        self._entries[key] = (self._clock() + ttl, candidate)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_load(
+        self, phone: str, loader: Callable[[str], Awaitable[Optional[dict]]]
+    ) -> Optional[dict]:
+        """
+        Return the cached candidate for `phone`, calling `loader` on a miss.
+
+        Errors raised by `loader` are propagated and never cached. When the
+        caller running the load is cancelled, callers waiting on it load
+        again instead of failing.
+        """
+        if not self.enabled:
+            return await loader(phone)
+
+        key = self.key(phone)
+        while True:
+            found, candidate = self.get(phone)
+            if found:
+                return candidate
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # this caller was cancelled
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            candidate = await loader(phone)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an un-awaited future doesn't log a warning
+            future.exception()
+            raise
+        else:
+            self.set(phone, candidate)
+            future.set_result(candidate)
+            return candidate
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, phone: str) -> bool:
+        """Drop one number from the cache. Returns True if it was cached."""
+        removed = self._entries.pop(self.key(phone), None) is not None
+        if removed:
+            self.invalidations += 1
+        return removed
+
+    def clear(self) -> int:
+        """Drop every entry. Returns how many were removed."""
+        count = len(self._entries)
+        self._entries.clear()
+        self.invalidations += count
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "negative_ttl_seconds": self.negative_ttl,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "coalesced": self.coalesced,
+        }
+
+
+candidate_cache = CandidateCache(
+    max_entries=int(os.getenv("JOBDIVA_CANDIDATE_CACHE_SIZE", "5000")),
+    ttl=float(os.getenv("JOBDIVA_CANDIDATE_CACHE_TTL", "300")),
+    negative_ttl=float(os.getenv("JOBDIVA_CANDIDATE_CACHE_NEGATIVE_TTL", "60")),
+)
@@ -0,0 +1,282 @@
+# backend/services/circuit_breaker.py
+"""
+Per-upstream circuit breakers.
+
+A breaker watches the outcomes of calls over a sliding time window and
+opens when the failure rate (or the rate of slow calls) crosses a threshold.
+While open, calls fail immediately with `CircuitOpenError` instead of waiting
+out upstream timeouts. After `open_seconds` the breaker lets a few trial
+calls through (half-open) and closes again if they succeed.
+
+Settings per upstream come from env vars prefixed with the upstream name
+(GOTO_ or JOBDIVA_):
+- <PREFIX>_BREAKER_FAILURE_RATE   failure ratio that opens the breaker (default 0.5)
+- <PREFIX>_BREAKER_SLOW_RATE      slow-call ratio that opens the breaker (default 0.8)
+- <PREFIX>_BREAKER_SLOW_SECONDS   a call slower than this is "slow" (default 5)
+- <PREFIX>_BREAKER_MIN_CALLS      calls in the window before rates apply (default 10)
+- <PREFIX>_BREAKER_WINDOW_SECONDS sliding window length (default 30)
+- <PREFIX>_BREAKER_OPEN_SECONDS   time spent open before half-open (default 30)
+- <PREFIX>_BREAKER_HALF_OPEN_CALLS trial calls allowed while half-open (default 3)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, name: str, retry_in: float) -> None:
+        super().__init__(f"{name} circuit breaker is open (retry in {retry_in:.1f}s)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+def counts_as_failure(exc: BaseException) -> bool:
+    """
+    Upstream outages count against the breaker; client errors (4xx other
+    than 429) mean the upstream is healthy and do not.
+    """
+    status = getattr(exc, "status_code", None)
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+    if status is not None and status < 500 and status != 429:
+        return False
+    return True
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        slow_rate: float = 0.8,
+        slow_seconds: float = 5.0,
+        min_calls: int = 10,
+        window_seconds: float = 30.0,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 3,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_rate = slow_rate
+        self.slow_seconds = slow_seconds
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self._clock = clock
+
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        # (finished_at, failed, slow)
+        self._outcomes: Deque[Tuple[float, bool, bool]] = deque()
+        self.transitions: Deque[Dict[str, Any]] = deque(maxlen=20)
+
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+
+    # ----------------------------------------------------------------------------------
+    # State machine
+    # ----------------------------------------------------------------------------------
+
+    def _transition(self, state: str, reason: str) -> None:
+        if state == self.state:
+            return
+        logger.warning("Circuit breaker %s: %s -> %s (%s)", self.name, self.state, state, reason)
+        self.transitions.append({
+            "from": self.state,
+            "to": state,
+            "reason": reason,
+            "at": datetime.now(timezone.utc).isoformat(),
+        })
+        self.state = state
+        if state == OPEN:
+            self._opened_at = self._clock()
+        elif state == HALF_OPEN:
+            self._half_open_in_flight = 0
+            self._half_open_successes = 0
+        elif state == CLOSED:
+            self._outcomes.clear()
+
+    def _trim(self, now: float) -> None:
+        horizon = now - self.window_seconds
+        while self._outcomes and self._outcomes[0][0] < horizon:
+            self._outcomes.popleft()
+
+    def _rates(self) -> Tuple[int, float, float]:
+        total = len(self._outcomes)
+        if not total:
+            return 0, 0.0, 0.0
+        failed = sum(1 for _, f, _ in self._outcomes if f)
+        slow = sum(1 for _, _, s in self._outcomes if s)
+        return total, failed / total, slow / total
+
+    def raise_if_open(self) -> None:
+        """Fail fast while open, without taking a half-open trial slot."""
+        if not self.allows_calls:
+            self.rejected += 1
+            raise CircuitOpenError(self.name, self.open_seconds - (self._clock() - self._opened_at))
+
+    def before_call(self) -> None:
+        """Admit a call or raise CircuitOpenError. Pair with record() or release()."""
+        if self.state == OPEN:
+            remaining = self.open_seconds - (self._clock() - self._opened_at)
+            if remaining > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, remaining)
+            self._transition(HALF_OPEN, "open timeout elapsed")
+
+        if self.state == HALF_OPEN:
+            if self._half_open_in_flight >= self.half_open_calls:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, 0.0)
+            self._half_open_in_flight += 1
+
+    def release(self) -> None:
+        """Give back a half-open slot for a call that was abandoned (cancelled)."""
+        if self.state == HALF_OPEN:
+            self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+
+    def record(self, failed: bool, elapsed: float) -> None:
+        """Record the outcome of an admitted call."""
+        now = self._clock()
+        slow = elapsed >= self.slow_seconds
+        self.calls += 1
+        if failed:
+            self.failures += 1
+
+        if self.state == HALF_OPEN:
+            self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+            if failed or slow:
+                self._transition(OPEN, "trial call failed" if failed else "trial call slow")
+            else:
+                self._half_open_successes += 1
+                if self._half_open_successes >= self.half_open_calls:
+                    self._transition(CLOSED, "trial calls succeeded")
+            return
+
+        self._outcomes.append((now, failed, slow))
+        self._trim(now)
+        total, failure_rate, slow_rate = self._rates()
+        if total < self.min_calls:
+            return
+        if failure_rate >= self.failure_rate:
+            self._transition(OPEN, f"failure rate {failure_rate:.0%} over {total} calls")
+        elif slow_rate >= self.slow_rate:
+            self._transition(OPEN, f"slow-call rate {slow_rate:.0%} over {total} calls")
+
+    async def call(self, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """Run `fn` through the breaker."""
+        self.before_call()
+        started = self._clock()
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception as e:
+            self.record(counts_as_failure(e), self._clock() - started)
+            raise
+        except BaseException:
+            # Cancelled: don't judge the upstream
+            self.release()
+            raise
+        self.record(False, self._clock() - started)
+        return result
+
+    @property
+    def allows_calls(self) -> bool:
+        """True unless the breaker is open and still cooling down."""
+        return not (self.state == OPEN and self._clock() - self._opened_at < self.open_seconds)
+
+    def reset(self) -> None:
+        self._transition(CLOSED, "manual reset")
+
+    def snapshot(self) -> Dict[str, Any]:
+        self._trim(self._clock())
+        total, failure_rate, slow_rate = self._rates()
+        return {
+            "state": self.state,
+            "window_calls": total,
+            "window_failure_rate": round(failure_rate, 3),
+            "window_slow_rate": round(slow_rate, 3),
+            "calls": self.calls,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "config": {
+                "failure_rate": self.failure_rate,
+                "slow_rate": self.slow_rate,
+                "slow_seconds": self.slow_seconds,
+                "min_calls": self.min_calls,
+                "window_seconds": self.window_seconds,
+                "open_seconds": self.open_seconds,
+                "half_open_calls": self.half_open_calls,
+            },
+            "transitions": list(self.transitions),
+        }
+
+
+# --------------------------------------------------------------------------------------
+# Registry
+# --------------------------------------------------------------------------------------
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def _from_env(name: str) -> CircuitBreaker:
+    prefix = f"{name.upper()}_BREAKER_"
+
+    def env(key: str, default: str) -> str:
+        return os.getenv(prefix + key, default)
+
+    return CircuitBreaker(
+        name,
+        failure_rate=float(env("FAILURE_RATE", "0.5")),
+        slow_rate=float(env("SLOW_RATE", "0.8")),
+        slow_seconds=float(env("SLOW_SECONDS", "5")),
+        min_calls=int(env("MIN_CALLS", "10")),
+        window_seconds=float(env("WINDOW_SECONDS", "30")),
+        open_seconds=float(env("OPEN_SECONDS", "30")),
+        half_open_calls=int(env("HALF_OPEN_CALLS", "3")),
+    )
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _from_env(name)
+        _breakers[name] = breaker
+    return breaker
+
+
+def all_breakers() -> List[CircuitBreaker]:
+    return list(_breakers.values())
+
+
+def breaker_stats() -> Dict[str, Any]:
+    return {breaker.name: breaker.snapshot() for breaker in all_breakers()}
+
+
+def reset_breaker(name: str) -> Optional[CircuitBreaker]:
+    breaker = _breakers.get(name)
+    if breaker is not None:
+        breaker.reset()
+    return breaker
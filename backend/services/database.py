@@ -0,0 +1,217 @@
+# backend/services/database.py
+"""
+Process-wide MongoDB client.
+
+One pooled `AsyncIOMotorClient` is created when the app starts and closed on
+shutdown. Routers receive the database through the `get_db` FastAPI
+dependency instead of constructing their own client per request.
+
+Pool sizing is configured with env vars:
+- MONGO_MAX_POOL_SIZE (default 100)
+- MONGO_MIN_POOL_SIZE (default 0)
+- MONGO_MAX_IDLE_TIME_MS (default: no limit)
+- MONGO_WAIT_QUEUE_TIMEOUT_MS (default: no limit)
+- MONGO_SERVER_SELECTION_TIMEOUT_MS (default 30000)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from datetime import timezone
+from typing import Any, Dict, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import monitoring
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------
+# Pool statistics
+# --------------------------------------------------------------------------------------
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """
+    Collects connection pool counters from pymongo's monitoring events.
+
+    Motor runs each operation on an executor thread, and the check-out start
+    and check-out result for one operation are emitted on that same thread,
+    so a thread-local timestamp is enough to measure wait time.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.open_connections = 0
+            self.checked_out = 0
+            self.max_checked_out = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.total_wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+            self.connections_created = 0
+            self.connections_closed = 0
+            self.pool_clears = 0
+
+    # -- check-out ---------------------------------------------------------------------
+
+    def connection_check_out_started(self, event) -> None:
+        self._local.started = time.perf_counter()
+
+    def _record_wait(self) -> float:
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        if started is None:
+            return 0.0
+        return time.perf_counter() - started
+
+    def connection_checked_out(self, event) -> None:
+        waited = self._record_wait()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def connection_check_out_failed(self, event) -> None:
+        waited = self._record_wait()
+        with self._lock:
+            self.checkout_failures += 1
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def connection_checked_in(self, event) -> None:
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    # -- lifecycle ---------------------------------------------------------------------
+
+    def connection_created(self, event) -> None:
+        with self._lock:
+            self.connections_created += 1
+            self.open_connections += 1
+
+    def connection_closed(self, event) -> None:
+        with self._lock:
+            self.connections_closed += 1
+            self.open_connections = max(0, self.open_connections - 1)
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            avg_wait = self.total_wait_seconds / self.checkouts if self.checkouts else 0.0
+            return {
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "avg_wait_ms": round(avg_wait * 1000, 3),
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+                "connections_created": self.connections_created,
+                "connections_closed": self.connections_closed,
+                "pool_clears": self.pool_clears,
+            }
+
+
+pool_stats = PoolStatsListener()
+
+# --------------------------------------------------------------------------------------
+# Client lifecycle
+# --------------------------------------------------------------------------------------
+
+_client: Optional[AsyncIOMotorClient] = None
+_db: Optional[AsyncIOMotorDatabase] = None
+
+
+def _int_env(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return int(value)
+
+
+def pool_options() -> Dict[str, Any]:
+    """Return the pool keyword arguments passed to the Motor client."""
+    options: Dict[str, Any] = {
+        "maxPoolSize": _int_env("MONGO_MAX_POOL_SIZE", 100),
+        "minPoolSize": _int_env("MONGO_MIN_POOL_SIZE", 0),
+        "serverSelectionTimeoutMS": _int_env("MONGO_SERVER_SELECTION_TIMEOUT_MS", 30000),
+    }
+    max_idle = _int_env("MONGO_MAX_IDLE_TIME_MS", None)
+    if max_idle is not None:
+        options["maxIdleTimeMS"] = max_idle
+    wait_queue_timeout = _int_env("MONGO_WAIT_QUEUE_TIMEOUT_MS", None)
+    if wait_queue_timeout is not None:
+        options["waitQueueTimeoutMS"] = wait_queue_timeout
+    return options
+
+
+def connect(mongo_url: str, db_name: str) -> AsyncIOMotorDatabase:
+    """Create the shared client. Called once from the app lifespan."""
+    global _client, _db
+
+    if _client is not None:
+        return _db
+
+    options = pool_options()
+    # tz_aware: BSON datetimes come back as UTC-aware datetimes
+    _client = AsyncIOMotorClient(
+        mongo_url, event_listeners=[pool_stats, metrics.mongo_commands], tz_aware=True, tzinfo=timezone.utc, **options
+    )
+    _db = _client[db_name]
+    logger.info("MongoDB client created (db=%s, pool=%s)", db_name, options)
+    return _db
+
+
+def close() -> None:
+    """Close the shared client. Called once on app shutdown."""
+    global _client, _db
+
+    if _client is not None:
+        _client.close()
+        logger.info("MongoDB client closed")
+    _client = None
+    _db = None
+
+
+def get_database() -> AsyncIOMotorDatabase:
+    """Return the shared database handle (for code outside a request)."""
+    if _db is None:
+        raise RuntimeError("MongoDB client is not initialised; call database.connect() first")
+    return _db
+
+
+async def get_db() -> AsyncIOMotorDatabase:
+    """FastAPI dependency returning the shared database handle."""
+    return get_database()
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Return current pool counters together with the configured limits."""
+    return {**pool_stats.snapshot(), "config": pool_options()}
@@ -6,10 +6,15 @@ import asyncio
 import logging
 import os
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
 
+from services import metrics, token_broker, tracing
+from services.circuit_breaker import get_breaker
+from services.http_clients import GOTO, get_client
+from services.rate_limiter import KeyedRateLimiter, RetryBudget, RetryPolicy, parse_retry_after
+
 logger = logging.getLogger(__name__)
 
 # --------------------------------------------------------------------------------------
@@ -44,17 +49,25 @@ if not GOTO_REFRESH_TOKEN:
         "Authorization Code flow and set it as an env var."
     )
 
-# --------------------------------------------------------------------------------------
-# Internal token cache
-# --------------------------------------------------------------------------------------
-
-_token_cache: Dict[str, Any] | None = None
-_token_lock = asyncio.Lock()
+# Client-side pacing per GoTo endpoint and per owner phone number (0 disables)
+GOTO_RATE_LIMIT_PER_SECOND = float(os.getenv("GOTO_RATE_LIMIT_PER_SECOND", "10"))
+GOTO_RATE_LIMIT_BURST = float(os.getenv("GOTO_RATE_LIMIT_BURST", "20"))
+GOTO_PHONE_RATE_LIMIT_PER_SECOND = float(os.getenv("GOTO_PHONE_RATE_LIMIT_PER_SECOND", "1"))
+GOTO_PHONE_RATE_LIMIT_BURST = float(os.getenv("GOTO_PHONE_RATE_LIMIT_BURST", "5"))
 
+# Retries for 429 / transient 5xx / connection failures
+GOTO_MAX_RETRIES = int(os.getenv("GOTO_MAX_RETRIES", "3"))
+GOTO_RETRY_BASE_DELAY = float(os.getenv("GOTO_RETRY_BASE_DELAY", "0.5"))
+GOTO_RETRY_MAX_DELAY = float(os.getenv("GOTO_RETRY_MAX_DELAY", "20"))
+GOTO_RETRY_BUDGET_RATIO = float(os.getenv("GOTO_RETRY_BUDGET_RATIO", "0.2"))
 
 class GoToError(Exception):
     """Custom exception type for GoTo API errors."""
 
+    def __init__(self, message: str, status_code: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
 
 # --------------------------------------------------------------------------------------
 # Low-level HTTP helpers
@@ -70,12 +83,11 @@ def _build_basic_auth_header(client_id: str, client_secret: str) -> Dict[str, st
     return {"Authorization": f"Basic {token}"}
 
 
-async def _refresh_access_token() -> str:
+async def _refresh_access_token() -> Tuple[str, float]:
     """
     Refresh an access token using the stored refresh token.
+    Returns (access_token, expires_in); called through `token_broker` only.
     """
-    global _token_cache
-
     if not (GOTO_CLIENT_ID and GOTO_CLIENT_SECRET and GOTO_REFRESH_TOKEN):
         raise GoToError(
             "GoTo OAuth env vars not fully configured "
@@ -94,8 +106,7 @@ async def _refresh_access_token() -> str:
 
     logger.info("Requesting new GoTo access token via refresh_token")
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.post(GOTO_TOKEN_URL, data=data, headers=headers)
+    resp = await _goto_request("oauth.token", "POST", GOTO_TOKEN_URL, idempotent=True, data=data, headers=headers)
 
     if resp.status_code != 200:
         logger.error(
@@ -104,7 +115,8 @@ async def _refresh_access_token() -> str:
             resp.text,
         )
         raise GoToError(
-            f"GoTo token refresh failed with status {resp.status_code}: {resp.text}"
+            f"GoTo token refresh failed with status {resp.status_code}: {resp.text}",
+            status_code=resp.status_code,
         )
 
     token_data = resp.json()
@@ -115,26 +127,151 @@ async def _refresh_access_token() -> str:
 
     expires_in = token_data.get("expires_in", 300)  # seconds
 
-    _token_cache = {
-        "access_token": access_token,
-        "expires_at": time.time() + expires_in - 30,
-    }
-
     logger.info("GoTo access token refreshed successfully (expires_in=%s)", expires_in)
-    return access_token
+    return access_token, float(expires_in)
+
+
+# Refreshed in the background before expiry and shared across worker processes
+# (see token_broker.py); readers never wait on a lock for a valid token.
+_tokens = token_broker.register(
+    GOTO,
+    _refresh_access_token,
+    enabled=bool(GOTO_CLIENT_ID and GOTO_CLIENT_SECRET and GOTO_REFRESH_TOKEN),
+)
 
 
 async def _cached_token() -> str:
     """
-    Return a valid access token, using in-memory cache + refresh if needed.
+    Return a valid access token from the token broker.
+    """
+    return await _tokens.get_token()
+
+
+# --------------------------------------------------------------------------------------
+# Rate limiting / retries
+# --------------------------------------------------------------------------------------
+
+endpoint_limiter = KeyedRateLimiter(GOTO_RATE_LIMIT_PER_SECOND, GOTO_RATE_LIMIT_BURST)
+phone_limiter = KeyedRateLimiter(GOTO_PHONE_RATE_LIMIT_PER_SECOND, GOTO_PHONE_RATE_LIMIT_BURST)
+retry_policy = RetryPolicy(
+    max_retries=GOTO_MAX_RETRIES,
+    base_delay=GOTO_RETRY_BASE_DELAY,
+    max_delay=GOTO_RETRY_MAX_DELAY,
+    budget=RetryBudget(ratio=GOTO_RETRY_BUDGET_RATIO),
+)
+
+# Fails fast while GoTo is down (see circuit_breaker.py). Each HTTP attempt
+# is recorded individually so limiter waits and retries don't count as slow calls.
+_breaker = get_breaker(GOTO)
+
+# 429 and 503 mean GoTo did not process the request, so even a
+# non-idempotent POST (sending an SMS) is safe to retry on them. Behind a
+# 502 / 504 GoTo may already have sent the message: only idempotent
+# requests are retried on those.
+_RETRYABLE_STATUS = {429, 503}
+_IDEMPOTENT_RETRYABLE_STATUS = {502, 504}
+
+
+async def _goto_request(
+    endpoint: str,
+    method: str,
+    url: str,
+    owner_phone_number: Optional[str] = None,
+    idempotent: bool = False,
+    **kwargs: Any,
+) -> httpx.Response:
+    """
+    Send a GoTo request through the endpoint / phone-number token buckets,
+    retrying retryable failures with jittered exponential backoff.
+
+    Unless `idempotent` is set, connection failures are only retried when
+    the request never reached GoTo (connect errors), and 502 / 504
+    responses are not retried. Raises CircuitOpenError
+    while the GoTo breaker is open.
+    """
+    retry_policy.budget.deposit()
+    attempt = 0
+    while True:
+        _breaker.raise_if_open()
+        if owner_phone_number:
+            await phone_limiter.acquire(owner_phone_number)
+        await endpoint_limiter.acquire(endpoint)
+
+        _breaker.before_call()
+        started = time.monotonic()
+        try:
+            with tracing.span(f"goto.{endpoint}", kind=tracing.CLIENT, attempt=attempt) as span:
+                resp = await get_client(GOTO).request(method, url, **kwargs)
+                span.set("http.status_code", resp.status_code)
+        except httpx.TransportError as e:
+            elapsed = time.monotonic() - started
+            _breaker.record(True, elapsed)
+            metrics.observe_upstream(GOTO, endpoint, "error", elapsed)
+            retryable = idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+            if not retryable or not retry_policy.should_retry(endpoint, attempt):
+                raise
+            delay = retry_policy.backoff(attempt)
+            logger.warning("GoTo %s transport error (%s); retry %d in %.2fs", endpoint, e, attempt + 1, delay)
+        except BaseException:
+            _breaker.release()
+            raise
+        else:
+            elapsed = time.monotonic() - started
+            _breaker.record(resp.status_code >= 500, elapsed)
+            metrics.observe_upstream(GOTO, endpoint, resp.status_code, elapsed)
+            retryable = resp.status_code in _RETRYABLE_STATUS or (
+                idempotent and resp.status_code in _IDEMPOTENT_RETRYABLE_STATUS
+            )
+            if not retryable or not retry_policy.should_retry(endpoint, attempt):
+                return resp
+
+            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            if resp.status_code == 429 and retry_after:
+                # GoTo told us when capacity returns: hold every caller of this endpoint/number
+                endpoint_limiter.block_for(endpoint, retry_after)
+                if owner_phone_number:
+                    phone_limiter.block_for(owner_phone_number, retry_after)
+            delay = max(retry_after or 0.0, retry_policy.backoff(attempt))
+            logger.warning(
+                "GoTo %s returned %s; retry %d in %.2fs", endpoint, resp.status_code, attempt + 1, delay
+            )
+
+        attempt += 1
+        await asyncio.sleep(delay)
+
+
+async def _authorized_request(
+    endpoint: str,
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    **kwargs: Any,
+) -> httpx.Response:
     """
-    global _token_cache
+    `_goto_request` with a bearer token. A 401 means the token was revoked or
+    expired early: re-authenticate once and repeat the request.
+    """
+    with tracing.span("goto.token"):
+        token = await _cached_token()
+    resp = await _goto_request(
+        endpoint, method, url, headers={**(headers or {}), "Authorization": f"Bearer {token}"}, **kwargs
+    )
+    if resp.status_code != 401:
+        return resp
+
+    token = await _tokens.reauthenticate(token)
+    return await _goto_request(
+        endpoint, method, url, headers={**(headers or {}), "Authorization": f"Bearer {token}"}, **kwargs
+    )
 
-    async with _token_lock:
-        if _token_cache and _token_cache.get("expires_at", 0) > time.time():
-            return _token_cache["access_token"]
 
-        return await _refresh_access_token()
+def rate_limit_stats() -> Dict[str, Any]:
+    """Bucket fill levels and retry counters for tuning against the GoTo plan."""
+    return {
+        "endpoints": endpoint_limiter.snapshot(),
+        "owner_phone_numbers": phone_limiter.snapshot(),
+        "retries": retry_policy.snapshot(),
+    }
 
 
 # --------------------------------------------------------------------------------------
@@ -150,13 +287,12 @@ async def send_sms(
 ) -> Dict[str, Any]:
     """
     Send an SMS message using the GoTo Messaging API.
+    Raises CircuitOpenError without calling GoTo while its breaker is open.
     """
 
     if not contact_phone_numbers:
         raise ValueError("contact_phone_numbers must contain at least one number")
 
-    token = await _cached_token()
-
     url = f"{GOTO_API_BASE}/messaging/v1/messages"
     payload: Dict[str, Any] = {
         "ownerPhoneNumber": owner_phone_number,
@@ -166,10 +302,7 @@ async def send_sms(
     if user_key:
         payload["userKey"] = user_key
 
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
+    headers = {"Content-Type": "application/json"}
 
     logger.info(
         "Sending GoTo SMS: owner=%s contacts=%s len(body)=%d",
@@ -179,8 +312,9 @@ async def send_sms(
     )
     logger.debug("GoTo SMS payload=%s", payload)
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.post(url, json=payload, headers=headers)
+    resp = await _authorized_request(
+        "messaging.send", "POST", url, owner_phone_number=owner_phone_number, json=payload, headers=headers
+    )
 
     if resp.status_code not in (200, 201):
         logger.error(
@@ -189,7 +323,8 @@ async def send_sms(
             resp.text,
         )
         raise GoToError(
-            f"GoTo SMS send failed with status {resp.status_code}: {resp.text}"
+            f"GoTo SMS send failed with status {resp.status_code}: {resp.text}",
+            status_code=resp.status_code,
         )
 
     data = resp.json()
@@ -259,6 +394,9 @@ class GoToService:
     ) -> Dict[str, Any]:
         return await start_call(from_extension, to_number, device_id, metadata)
 
+    def rate_limit_stats(self) -> Dict[str, Any]:
+        return rate_limit_stats()
+
 
 # This is what your existing sms_routes.py is importing
 goto_service = GoToService()
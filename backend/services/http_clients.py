@@ -0,0 +1,119 @@
+# backend/services/http_clients.py
+"""
+Long-lived, per-upstream `httpx.AsyncClient` pools.
+
+Each upstream (GoTo, JobDiva) gets one client with its own connection pool,
+keep-alive and timeouts, created at app startup and closed on shutdown, so
+DNS/TCP/TLS setup is paid once instead of on every call.
+
+Per-upstream settings come from env vars prefixed with the upstream name
+(GOTO_ or JOBDIVA_):
+- <PREFIX>_HTTP_TIMEOUT           total read/write/pool timeout in seconds
+- <PREFIX>_HTTP_CONNECT_TIMEOUT   connect timeout in seconds
+- <PREFIX>_HTTP_MAX_CONNECTIONS   max open connections
+- <PREFIX>_HTTP_MAX_KEEPALIVE     max idle keep-alive connections
+- <PREFIX>_HTTP_KEEPALIVE_EXPIRY  idle keep-alive expiry in seconds
+- <PREFIX>_HTTP2                  "true" to negotiate HTTP/2 (needs the `h2` package)
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict
+
+import httpx
+
+from services.tracing import inject_traceparent
+
+logger = logging.getLogger(__name__)
+
+GOTO = "goto"
+JOBDIVA = "jobdiva"
+
+
+@dataclass(frozen=True)
+class UpstreamConfig:
+    name: str
+    timeout: float
+    connect_timeout: float
+    max_connections: int
+    max_keepalive: int
+    keepalive_expiry: float
+    http2: bool
+
+
+def _env(prefix: str, key: str, default: str) -> str:
+    return os.getenv(f"{prefix}_HTTP_{key}", default)
+
+
+def load_config(name: str, default_timeout: float) -> UpstreamConfig:
+    """Build the pool configuration for one upstream from env vars."""
+    prefix = name.upper()
+    http2 = os.getenv(f"{prefix}_HTTP2", "false").lower() in ("1", "true", "yes")
+
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("%s_HTTP2 is enabled but the 'h2' package is not installed; using HTTP/1.1", prefix)
+        http2 = False
+
+    return UpstreamConfig(
+        name=name,
+        timeout=float(_env(prefix, "TIMEOUT", str(default_timeout))),
+        connect_timeout=float(_env(prefix, "CONNECT_TIMEOUT", "5")),
+        max_connections=int(_env(prefix, "MAX_CONNECTIONS", "100")),
+        max_keepalive=int(_env(prefix, "MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(_env(prefix, "KEEPALIVE_EXPIRY", "30")),
+        http2=http2,
+    )
+
+
+# Default timeouts match what each service used before pooling.
+_DEFAULT_TIMEOUTS = {GOTO: 10.0, JOBDIVA: 15.0}
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _build_client(config: UpstreamConfig) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(config.timeout, connect=config.connect_timeout),
+        limits=httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive,
+            keepalive_expiry=config.keepalive_expiry,
+        ),
+        http2=config.http2,
+        # Propagate the current trace (see tracing.py)
+        event_hooks={"request": [inject_traceparent]},
+    )
+
+
+def get_client(name: str) -> httpx.AsyncClient:
+    """
+    Return the shared client for an upstream.
+
+    Clients are normally created by `start()`; if called outside the app
+    lifespan (scripts, REPL) the client is created lazily.
+    """
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        config = load_config(name, _DEFAULT_TIMEOUTS.get(name, 10.0))
+        client = _build_client(config)
+        _clients[name] = client
+        logger.info("Created HTTP client for %s: %s", name, config)
+    return client
+
+
+async def start() -> None:
+    """Create the clients for every known upstream. Called on app startup."""
+    for name in _DEFAULT_TIMEOUTS:
+        get_client(name)
+
+
+async def close() -> None:
+    """Close all upstream clients. Called on app shutdown."""
+    for name, client in list(_clients.items()):
+        await client.aclose()
+        logger.info("Closed HTTP client for %s", name)
+    _clients.clear()
@@ -0,0 +1,96 @@
+# backend/services/indexes.py
+"""
+Declarative MongoDB index registry.
+
+Every index the app relies on is declared here (or added with `register()`
+by the module that owns the collection) and applied idempotently at
+startup with `ensure_indexes()`. `index_usage_stats()` reports `$indexStats`
+so unused indexes can be pruned.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "user_mappings": [
+        IndexModel([("jobdiva_user_id", ASCENDING)], name="jobdiva_user_id_unique", unique=True),
+        IndexModel(
+            [("goto_phone_number", ASCENDING), ("is_active", ASCENDING)],
+            name="goto_phone_number_is_active",
+        ),
+    ],
+    "interaction_logs": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # Keyset pagination / export order (see log_export.py)
+        IndexModel([("timestamp", DESCENDING), ("id", DESCENDING)], name="timestamp_id_desc"),
+        IndexModel(
+            [("recruiter_id", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)],
+            name="recruiter_id_timestamp_id",
+        ),
+        IndexModel(
+            [("candidate_id", ASCENDING), ("timestamp", DESCENDING)],
+            name="candidate_id_timestamp",
+        ),
+        IndexModel([("goto_call_id", ASCENDING)], name="goto_call_id"),
+        IndexModel([("goto_message_id", ASCENDING)], name="goto_message_id"),
+    ],
+}
+
+
+def register(collection: str, *indexes: IndexModel) -> None:
+    """Declare additional indexes for a collection (applied on next startup)."""
+    declared = INDEXES.setdefault(collection, [])
+    known = {index.document["name"] for index in declared}
+    for index in indexes:
+        if index.document["name"] not in known:
+            declared.append(index)
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> Dict[str, List[str]]:
+    """
+    Create every declared index. Existing indexes with the same spec are a
+    no-op, so this is safe to run on every startup. Indexes are created one
+    at a time: a failure (e.g. duplicates blocking a unique index) is logged
+    and does not stop the others.
+    """
+    created: Dict[str, List[str]] = {}
+    for collection, indexes in INDEXES.items():
+        names = created.setdefault(collection, [])
+        for index in indexes:
+            try:
+                names.extend(await db[collection].create_indexes([index]))
+            except Exception as e:
+                logger.error("Failed to create index %s on %s: %s", index.document["name"], collection, e)
+    logger.info("Index provisioning complete: %s", created)
+    return created
+
+
+async def index_usage_stats(db: AsyncIOMotorDatabase) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Return `$indexStats` for every registered collection, flagging which
+    indexes are declared in the registry.
+    """
+    report: Dict[str, List[Dict[str, Any]]] = {}
+    for collection, indexes in INDEXES.items():
+        declared = {index.document["name"] for index in indexes}
+        rows = []
+        async for stat in db[collection].aggregate([{"$indexStats": {}}]):
+            accesses = stat.get("accesses", {})
+            since = accesses.get("since")
+            rows.append({
+                "name": stat["name"],
+                "key": dict(stat.get("key", {})),
+                "declared": stat["name"] in declared,
+                "ops": int(accesses.get("ops", 0)),
+                "since": since.isoformat() if since else None,
+            })
+        rows.sort(key=lambda row: row["ops"])
+        report[collection] = rows
+    return report
@@ -4,13 +4,20 @@ Async JobDiva helper service.
 
 Provides:
 - async create_candidate_note(candidate_id, note_text, recruiter_id=None)
-- async find_candidate_by_phone(phone_e164)
+- async find_candidate_by_phone(phone_e164)  (cached, see candidate_cache.py)
+- invalidate_candidate_cache(phone_e164=None)
 """
 
 import os
+import time
+from typing import Optional, Tuple
+
 import httpx
-import asyncio
-from typing import Optional
+
+from services import metrics, token_broker, tracing
+from services.candidate_cache import candidate_cache
+from services.circuit_breaker import get_breaker
+from services.http_clients import JOBDIVA, get_client
 
 
 JOBDIVA_BASE_URL = os.getenv("JOBDIVA_BASE_URL", "https://api.jobdiva.com")
@@ -21,9 +28,42 @@ JOBDIVA_USERNAME = os.getenv("JOBDIVA_USERNAME")
 JOBDIVA_PASSWORD = os.getenv("JOBDIVA_PASSWORD")
 JOBDIVA_API_KEY = os.getenv("JOBDIVA_API_KEY")  # if JobDiva uses API key
 
-# If JobDiva uses a token-based auth, cache token here
-_jd_token_cache = {"token": None, "expires_at": 0}
-_jd_lock = asyncio.Lock()
+# Fails fast while JobDiva is down (see circuit_breaker.py)
+_breaker = get_breaker(JOBDIVA)
+
+
+async def _login() -> Tuple[str, float]:
+    """
+    Log in with username/password and return (token, expires_in).
+    Called through `_tokens` only.
+    """
+    # TODO: replace /auth/login with the actual JobDiva auth endpoint
+    login_url = f"{JOBDIVA_BASE_URL}/auth/login"
+    resp = await _post(
+        "auth.login",
+        login_url,
+        json={
+            "username": JOBDIVA_USERNAME,
+            "password": JOBDIVA_PASSWORD,
+            # include client_id if JobDiva requires it
+            # "client_id": JOBDIVA_CLIENT_ID,
+        },
+    )
+    resp.raise_for_status()
+    body = resp.json()
+
+    token = body.get("access_token") or body.get("token")
+    expires_in = int(body.get("expires_in", 3600))
+    return token, float(expires_in)
+
+
+# Login tokens are refreshed in the background and shared across worker
+# processes (see token_broker.py). Not used when an API key is configured.
+_tokens = token_broker.register(
+    JOBDIVA,
+    _login,
+    enabled=bool(JOBDIVA_USERNAME and JOBDIVA_PASSWORD and not JOBDIVA_API_KEY),
+)
 
 
 async def _get_jobdiva_headers() -> dict:
@@ -37,80 +77,109 @@ async def _get_jobdiva_headers() -> dict:
     if JOBDIVA_API_KEY:
         return {"Content-Type": "application/json", "Authorization": f"Bearer {JOBDIVA_API_KEY}"}
 
-    # Otherwise, implement a login -> get token flow (placeholder)
-    async with _jd_lock:
-        import time
-
-        now = time.time()
-        if _jd_token_cache["token"] and now < _jd_token_cache["expires_at"] - 30:
-            return {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {_jd_token_cache['token']}",
-            }
-
-        if JOBDIVA_USERNAME and JOBDIVA_PASSWORD:
-            # TODO: replace /auth/login with the actual JobDiva auth endpoint
-            login_url = f"{JOBDIVA_BASE_URL}/auth/login"
-            async with httpx.AsyncClient(timeout=15) as client:
-                resp = await client.post(
-                    login_url,
-                    json={
-                        "username": JOBDIVA_USERNAME,
-                        "password": JOBDIVA_PASSWORD,
-                        # include client_id if JobDiva requires it
-                        # "client_id": JOBDIVA_CLIENT_ID,
-                    },
-                )
-                resp.raise_for_status()
-                body = resp.json()
-
-            token = body.get("access_token") or body.get("token")
-            expires_in = int(body.get("expires_in", 3600))
-            _jd_token_cache["token"] = token
-            _jd_token_cache["expires_at"] = time.time() + expires_in
-            return {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {token}",
-            }
+    # Otherwise, use the login -> token flow (placeholder)
+    if JOBDIVA_USERNAME and JOBDIVA_PASSWORD:
+        token = await _tokens.get_token()
+        return {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {token}",
+        }
 
     raise RuntimeError("JobDiva credentials not configured in environment")
 
 
+async def _post(operation: str, url: str, **kwargs) -> httpx.Response:
+    """One JobDiva POST, timed per `operation` (see metrics.py)."""
+    started = time.monotonic()
+    try:
+        with tracing.span(f"jobdiva.{operation}", kind=tracing.CLIENT) as span:
+            resp = await get_client(JOBDIVA).post(url, **kwargs)
+            span.set("http.status_code", resp.status_code)
+    except httpx.TransportError:
+        metrics.observe_upstream(JOBDIVA, operation, "error", time.monotonic() - started)
+        raise
+    metrics.observe_upstream(JOBDIVA, operation, resp.status_code, time.monotonic() - started)
+    return resp
+
+
+async def _jobdiva_post(operation: str, url: str, payload: dict) -> httpx.Response:
+    """
+    POST to JobDiva. If a login token is rejected with 401, log in again
+    once and repeat the request.
+    """
+    headers = await _get_jobdiva_headers()
+    resp = await _post(operation, url, json=payload, headers=headers)
+    if resp.status_code != 401 or JOBDIVA_API_KEY:
+        return resp
+
+    rejected = headers["Authorization"][len("Bearer "):]
+    token = await _tokens.reauthenticate(rejected)
+    headers = {**headers, "Authorization": f"Bearer {token}"}
+    return await _post(operation, url, json=payload, headers=headers)
+
+
 async def create_candidate_note(
     candidate_id: str, note_text: str, recruiter_id: Optional[str] = None
+) -> dict:
+    """
+    Create a candidate note/journal entry in JobDiva.
+    Raises CircuitOpenError without calling JobDiva while its breaker is open.
+    """
+    return await _breaker.call(_post_candidate_note, candidate_id, note_text, recruiter_id)
+
+
+async def _post_candidate_note(
+    candidate_id: str, note_text: str, recruiter_id: Optional[str] = None
 ) -> dict:
     """
     Create a candidate note/journal entry in JobDiva.
     The actual endpoint/payload will depend on JobDiva API. Adjust below.
     """
-    headers = await _get_jobdiva_headers()
     # Placeholder endpoint - replace with actual JobDiva endpoint from their docs
     url = f"{JOBDIVA_BASE_URL}/apiv2/candidates/{candidate_id}/notes"
     payload = {"noteText": note_text}
     if recruiter_id:
         payload["recruiterId"] = recruiter_id
 
-    async with httpx.AsyncClient(timeout=15) as client:
-        resp = await client.post(url, json=payload, headers=headers)
-        resp.raise_for_status()
-        return resp.json()
+    resp = await _jobdiva_post("candidates.note", url, payload)
+    resp.raise_for_status()
+    return resp.json()
 
 
 async def find_candidate_by_phone(phone_e164: str) -> Optional[dict]:
+    """
+    Look up a candidate by phone, serving repeat lookups from the
+    in-process candidate cache (including cached "not found" results).
+    Cache misses go through the JobDiva circuit breaker.
+    """
+    return await candidate_cache.get_or_load(
+        phone_e164, lambda phone: _breaker.call(_search_candidate_by_phone, phone)
+    )
+
+
+def invalidate_candidate_cache(phone_e164: Optional[str] = None) -> int:
+    """
+    Drop a cached lookup for one number, or the whole cache if no number
+    is given. Returns the number of entries removed.
+    """
+    if phone_e164:
+        return int(candidate_cache.invalidate(phone_e164))
+    return candidate_cache.clear()
+
+
+async def _search_candidate_by_phone(phone_e164: str) -> Optional[dict]:
     """
     Search JobDiva for a candidate by phone.
     Adjust the endpoint/payload to match JobDiva's search API.
     """
-    headers = await _get_jobdiva_headers()
     # Placeholder; confirm the actual search endpoint and payload
     url = f"{JOBDIVA_BASE_URL}/apiv2/candidates/search"
     payload = {"phone": phone_e164}
-    async with httpx.AsyncClient(timeout=15) as client:
-        resp = await client.post(url, json=payload, headers=headers)
-        if resp.status_code == 404:
-            return None
-        resp.raise_for_status()
-        j = resp.json()
+    resp = await _jobdiva_post("candidates.search", url, payload)
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+    j = resp.json()
 
     # adapt this depending on JobDiva's response shape
     candidates = j.get("candidates") or j.get("items") or j
@@ -134,6 +203,12 @@ class JobDivaService:
     async def find_candidate_by_phone(self, phone_e164: str) -> Optional[dict]:
         return await find_candidate_by_phone(phone_e164)
 
+    def invalidate_candidate_cache(self, phone_e164: Optional[str] = None) -> int:
+        return invalidate_candidate_cache(phone_e164)
+
+    def candidate_cache_stats(self) -> dict:
+        return candidate_cache.stats()
+
 
 # This is what routes import: from services.jobdiva_service import jobdiva_service
 jobdiva_service = JobDivaService()
@@ -0,0 +1,146 @@
+# backend/services/log_export.py
+"""
+Paging and export of `interaction_logs`.
+
+Listing uses keyset pagination on (timestamp, id), newest first: a page
+ends with an opaque cursor encoding the last row's sort key, and the next
+page starts strictly after it. Unlike skip/offset this costs the same for
+page 1 and page 10,000 and is stable while new logs arrive.
+
+Exports iterate the Motor cursor and serialize raw documents one at a time
+(NDJSON or CSV) without building Pydantic models or buffering the result,
+so months of logs can be streamed with flat memory use.
+"""
+
+from __future__ import annotations
+
+import base64
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import DESCENDING
+
+from models.mapping_models import InteractionLog
+
+SORT = [("timestamp", DESCENDING), ("id", DESCENDING)]
+
+# Documents fetched per round-trip while exporting
+EXPORT_BATCH_SIZE = 1000
+
+NDJSON = "ndjson"
+CSV = "csv"
+MEDIA_TYPES = {NDJSON: "application/x-ndjson", CSV: "text/csv"}
+
+CSV_COLUMNS = list(InteractionLog.model_fields)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _utc(value: datetime) -> datetime:
+    # Naive datetimes from query strings are taken as UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def encode_cursor(log: Dict[str, Any]) -> str:
+    raw = json.dumps([_utc(log["timestamp"]).isoformat(), log["id"]], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, log_id = json.loads(raw)
+        if not isinstance(log_id, str):
+            raise TypeError("cursor id must be a string")
+        return _utc(datetime.fromisoformat(timestamp)), log_id
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def build_query(
+    interaction_type: Optional[str] = None,
+    candidate_id: Optional[str] = None,
+    recruiter_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Mongo filter for the given filters, starting after `cursor`."""
+    query: Dict[str, Any] = {}
+    if interaction_type:
+        query["interaction_type"] = interaction_type
+    if candidate_id:
+        query["candidate_id"] = candidate_id
+    if recruiter_id:
+        query["recruiter_id"] = recruiter_id
+
+    timestamp_range: Dict[str, Any] = {}
+    if since:
+        timestamp_range["$gte"] = _utc(since)
+    if until:
+        timestamp_range["$lt"] = _utc(until)
+    if timestamp_range:
+        query["timestamp"] = timestamp_range
+
+    if cursor:
+        timestamp, log_id = decode_cursor(cursor)
+        query["$or"] = [
+            {"timestamp": {"$lt": timestamp}},
+            {"timestamp": timestamp, "id": {"$lt": log_id}},
+        ]
+    return query
+
+
+async def fetch_page(
+    db: AsyncIOMotorDatabase,
+    query: Dict[str, Any],
+    limit: int,
+    projection: Optional[Dict[str, int]] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    One page of logs and the cursor of the next page (None on the last).
+    A `projection` must include `timestamp` and `id` (the cursor key).
+    """
+    logs = await db.interaction_logs.find(
+        query, projection or {"_id": 0}
+    ).sort(SORT).limit(limit + 1).to_list(limit + 1)
+    if len(logs) <= limit:
+        return logs, None
+    logs = logs[:limit]
+    return logs, encode_cursor(logs[-1])
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return _utc(value).isoformat()
+    return value
+
+
+async def export_logs(
+    db: AsyncIOMotorDatabase, query: Dict[str, Any], fmt: str = NDJSON
+) -> AsyncIterator[str]:
+    """Stream every matching log as NDJSON lines or CSV rows."""
+    cursor = db.interaction_logs.find(query, {"_id": 0}).sort(SORT).batch_size(EXPORT_BATCH_SIZE)
+
+    if fmt == CSV:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_COLUMNS)
+        async for log in cursor:
+            writer.writerow([_plain(log.get(column)) for column in CSV_COLUMNS])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+        return
+
+    async for log in cursor:
+        yield json.dumps({key: _plain(value) for key, value in log.items()}) + "\n"
@@ -0,0 +1,287 @@
+# backend/services/log_feed.py
+"""
+Live feed of interaction logs for the admin UI (Server-Sent Events).
+
+Producers publish each log as it is inserted or updated; the feed fans the
+event out to every subscribed stream. Each event is serialized once,
+however many subscribers there are. Every subscriber has a bounded buffer
+(LOG_FEED_BUFFER events, default 256): a subscriber that falls behind is
+disconnected rather than slowing the others down, and its browser
+reconnects and catches up from Mongo.
+
+Sources (LOG_FEED_SOURCE):
+
+- "local" (default): the webhook processor and call routes call
+  `publish_insert` / `publish_update` after writing. Clients only see
+  writes made by the replica they are connected to.
+- "change_stream": one change stream on `interaction_logs` per process
+  feeds the fan-out, so every replica sees every write. Needs a replica
+  set; local publishing is then a no-op.
+
+Resuming: insert events carry the log's (timestamp, id) keyset cursor (the
+same encoding as /admin/logs) as their SSE id. A client that reconnects
+with `Last-Event-ID` (or `cursor=`) first gets the logs created after it,
+read from Mongo, then the live feed. Updates made to already-seen logs
+while disconnected are not replayed. If more than LOG_FEED_REPLAY_LIMIT
+logs were missed, a `reset` event tells the client to reload its list.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING
+
+from models.mapping_models import InteractionLog
+from services import fast_json, log_export
+
+logger = logging.getLogger(__name__)
+
+LOCAL = "local"
+CHANGE_STREAM = "change_stream"
+
+SOURCE = os.getenv("LOG_FEED_SOURCE", LOCAL)
+BUFFER_SIZE = int(os.getenv("LOG_FEED_BUFFER", "256"))
+REPLAY_LIMIT = int(os.getenv("LOG_FEED_REPLAY_LIMIT", "1000"))
+HEARTBEAT_SECONDS = float(os.getenv("LOG_FEED_HEARTBEAT_SECONDS", "15"))
+
+# Reconnect delay suggested to EventSource clients (ms)
+RETRY_MS = 3000
+
+INSERT = "insert"
+UPDATE = "update"
+
+
+def _sort_key(log: Dict[str, Any]) -> Optional[Tuple[datetime, str]]:
+    timestamp = log.get("timestamp")
+    if not isinstance(timestamp, datetime):
+        return None
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp, log["id"]
+
+
+@dataclass
+class FeedEvent:
+    op: str
+    log: Dict[str, Any]
+    data: str  # serialized once for all subscribers
+    cursor: Optional[str] = None
+
+    def encode(self) -> str:
+        id_line = f"id: {self.cursor}\n" if self.cursor else ""
+        return f"event: log\n{id_line}data: {self.data}\n\n"
+
+
+def make_event(op: str, log: Dict[str, Any]) -> FeedEvent:
+    row = fast_json.trusted_rows(InteractionLog, [log])[0]
+    data = fast_json.dumps({"op": op, "log": row}).decode("utf-8")
+    cursor = log_export.encode_cursor(log) if op == INSERT and isinstance(log.get("timestamp"), datetime) else None
+    return FeedEvent(op=op, log=log, data=data, cursor=cursor)
+
+
+class Subscription:
+    def __init__(self, filters: Dict[str, str], buffer_size: int) -> None:
+        self.filters = filters
+        self.queue: "asyncio.Queue[Optional[FeedEvent]]" = asyncio.Queue(maxsize=buffer_size)
+        self.closed = False
+        self.overflowed = False
+
+    def matches(self, log: Dict[str, Any]) -> bool:
+        return all(log.get(field) == value for field, value in self.filters.items())
+
+    def offer(self, event: Optional[FeedEvent]) -> None:
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow: drop it; the client reconnects and replays from Mongo
+            self.overflowed = True
+            self.close()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass  # the reader checks `closed` after each event
+
+
+class LogFeed:
+    def __init__(
+        self,
+        source: str = SOURCE,
+        buffer_size: int = BUFFER_SIZE,
+        replay_limit: int = REPLAY_LIMIT,
+        heartbeat_seconds: float = HEARTBEAT_SECONDS,
+    ) -> None:
+        self.source = source
+        self.buffer_size = buffer_size
+        self.replay_limit = replay_limit
+        self.heartbeat_seconds = heartbeat_seconds
+        self._subscribers: Set[Subscription] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.dropped_subscribers = 0
+        self.resets = 0
+
+    # ----------------------------------------------------------------------------------
+    # Producers
+    # ----------------------------------------------------------------------------------
+
+    def _fanout(self, op: str, log: Dict[str, Any]) -> None:
+        subscribers = [sub for sub in self._subscribers if sub.matches(log)]
+        if not subscribers:
+            return
+        try:
+            event = make_event(op, log)
+        except Exception as e:
+            logger.error(f"Failed to serialize feed event for log {log.get('id')}: {e}")
+            return
+        self.published += 1
+        for sub in subscribers:
+            sub.offer(event)
+            if sub.overflowed:
+                self._drop(sub)
+
+    def publish_insert(self, log: Dict[str, Any]) -> None:
+        """Announce a newly inserted log (local source only)."""
+        if self.source == LOCAL:
+            self._fanout(INSERT, log)
+
+    def publish_update(self, log: Dict[str, Any]) -> None:
+        """Announce the new state of an updated log (local source only)."""
+        if self.source == LOCAL:
+            self._fanout(UPDATE, log)
+
+    async def _watch(self, db: AsyncIOMotorDatabase) -> None:
+        pipeline = [{"$match": {"operationType": {"$in": [INSERT, UPDATE, "replace"]}}}]
+        resume_token = None
+        while True:
+            try:
+                async with db.interaction_logs.watch(
+                    pipeline, full_document="updateLookup", resume_after=resume_token
+                ) as stream:
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        log = change.get("fullDocument")
+                        if log is None:
+                            continue  # deleted before the lookup
+                        log.pop("_id", None)
+                        self._fanout(INSERT if change["operationType"] == INSERT else UPDATE, log)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Interaction log change stream failed, reconnecting: {e}")
+                await asyncio.sleep(5)
+
+    def start(self, db: AsyncIOMotorDatabase) -> None:
+        if self._task is None and self.source == CHANGE_STREAM:
+            self._task = asyncio.create_task(self._watch(db))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # End open streams so the server can shut down
+        for sub in list(self._subscribers):
+            sub.close()
+        self._subscribers.clear()
+
+    # ----------------------------------------------------------------------------------
+    # Subscribers
+    # ----------------------------------------------------------------------------------
+
+    def subscribe(self, filters: Dict[str, str]) -> Subscription:
+        sub = Subscription(filters, self.buffer_size)
+        self._subscribers.add(sub)
+        return sub
+
+    def _drop(self, sub: Subscription) -> None:
+        if sub in self._subscribers:
+            self._subscribers.discard(sub)
+            self.dropped_subscribers += 1
+            logger.warning("Log feed subscriber fell behind and was disconnected")
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self._subscribers.discard(sub)
+        sub.close()
+
+    async def _replay(
+        self, db: AsyncIOMotorDatabase, cursor: str, filters: Dict[str, str]
+    ) -> Tuple[list, bool]:
+        """Logs created after `cursor`, oldest first; True when over the replay limit."""
+        timestamp, log_id = log_export.decode_cursor(cursor)
+        query = {**filters, "$or": [
+            {"timestamp": {"$gt": timestamp}},
+            {"timestamp": timestamp, "id": {"$gt": log_id}},
+        ]}
+        logs = await db.interaction_logs.find(query, {"_id": 0}).sort(
+            [("timestamp", ASCENDING), ("id", ASCENDING)]
+        ).limit(self.replay_limit + 1).to_list(self.replay_limit + 1)
+        return logs[: self.replay_limit], len(logs) > self.replay_limit
+
+    async def stream(
+        self, db: AsyncIOMotorDatabase, cursor: Optional[str], filters: Dict[str, str]
+    ) -> AsyncIterator[str]:
+        """
+        SSE text for one client: missed logs after `cursor` (already
+        validated with `log_export.decode_cursor`), then live events.
+        """
+        # Subscribe before replaying so nothing written meanwhile is missed
+        sub = self.subscribe(filters)
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            replayed_until: Optional[Tuple[datetime, str]] = None
+            if cursor:
+                logs, truncated = await self._replay(db, cursor, filters)
+                if truncated:
+                    self.resets += 1
+                    yield "event: reset\ndata: {}\n\n"
+                else:
+                    for log in logs:
+                        yield make_event(INSERT, log).encode()
+                    if logs:
+                        replayed_until = _sort_key(logs[-1])
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None or sub.closed:
+                    return
+                key = _sort_key(event.log) if replayed_until and event.op == INSERT else None
+                if key and key <= replayed_until:
+                    continue  # already sent by the replay
+                yield event.encode()
+        finally:
+            self.unsubscribe(sub)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "subscribers": len(self._subscribers),
+            "buffer_size": self.buffer_size,
+            "published": self.published,
+            "dropped_subscribers": self.dropped_subscribers,
+            "resets": self.resets,
+            "watching": self._task is not None and not self._task.done(),
+        }
+
+
+log_feed = LogFeed()
@@ -0,0 +1,233 @@
+# backend/services/mapping_import.py
+"""
+Bulk import / upsert of user mappings from CSV or JSON.
+
+The whole file is handled as one pandas DataFrame:
+
+- phone numbers are normalized once per distinct number
+  (`normalize_phone_series`) and checked against E.164,
+- duplicate JobDiva user ids and duplicate active GoTo numbers are found
+  in memory, both within the file and against existing mappings (fetched
+  with one `$in` query per key),
+- valid rows become upserts keyed on `jobdiva_user_id`, applied with a
+  single ordered `bulk_write`.
+
+Every input row gets an entry in the report: created, updated, unchanged,
+error (rejected before writing), or failed / skipped when the write
+itself stops partway.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import pandas as pd
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from services.mapping_index import mapping_index
+from utils.phone_utils import normalize_phone_series
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ["jobdiva_user_id", "jobdiva_user_name", "goto_user_id", "goto_phone_number"]
+
+E164_PATTERN = r"\+[1-9]\d{7,14}"
+
+MAX_ROWS = 20000
+
+CREATED = "created"
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+ERROR = "error"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+_ACTIVE_VALUES = {
+    **dict.fromkeys(("true", "1", "yes", "y", "active"), True),
+    **dict.fromkeys(("false", "0", "no", "n", "inactive"), False),
+}
+_BLANK = {"", "none", "nan"}
+
+
+class ImportFormatError(ValueError):
+    """The uploaded file could not be read as a mapping table."""
+
+
+def read_table(content: bytes, content_type: str) -> pd.DataFrame:
+    """Parse a CSV body, or a JSON list of objects (optionally under "mappings")."""
+    try:
+        if "json" in content_type:
+            data = json.loads(content or b"[]")
+            if isinstance(data, dict):
+                data = data.get("mappings", [])
+            if not isinstance(data, list):
+                raise ImportFormatError("JSON body must be a list of mappings")
+            df = pd.DataFrame.from_records(data)
+        else:
+            df = pd.read_csv(io.BytesIO(content), dtype=str, keep_default_na=False, skipinitialspace=True)
+    except (ValueError, pd.errors.ParserError) as e:
+        if isinstance(e, ImportFormatError):
+            raise
+        raise ImportFormatError(f"Could not parse import file: {e}") from e
+
+    df.columns = [str(column).strip() for column in df.columns]
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise ImportFormatError(f"Missing columns: {', '.join(missing)}")
+    if len(df) > MAX_ROWS:
+        raise ImportFormatError(f"Too many rows ({len(df)} > {MAX_ROWS})")
+
+    for column in REQUIRED_COLUMNS + ["goto_extension"]:
+        if column in df.columns:
+            df[column] = df[column].fillna("").astype(str).str.strip()
+    return df
+
+
+def _active_text(values: pd.Series) -> pd.Series:
+    # JSON booleans and CSV strings alike ("True" / "true" / "1" / ...);
+    # missing values (JSON rows without the key) are blank
+    return values.fillna("").astype(str).str.strip().str.lower()
+
+
+def _parse_active(values: pd.Series) -> pd.Series:
+    """True / False per row, None where blank or unrecognised."""
+    parsed = _active_text(values).map(_ACTIVE_VALUES)
+    return parsed.astype(object).where(parsed.notna(), None)
+
+
+def _first_error(df: pd.DataFrame) -> pd.Series:
+    """Per-row validation error (or None), computed column-wise."""
+    errors = pd.Series(None, index=df.index, dtype=object)
+
+    def flag(mask: pd.Series, message) -> None:
+        # Keep the first error found for each row
+        target = mask & errors.isna()
+        if isinstance(message, pd.Series):
+            errors[target] = message[target]
+        else:
+            errors[target] = message
+
+    for column in REQUIRED_COLUMNS:
+        flag(df[column] == "", f"{column} is required")
+
+    flag(~df["goto_phone_number"].str.fullmatch(E164_PATTERN), "goto_phone_number is not a valid phone number")
+
+    if "is_active" in df.columns:
+        flag(df["_is_active"].isna() & ~_active_text(df["is_active"]).isin(_BLANK),
+             "is_active must be true or false")
+
+    first_user_row = df.groupby("jobdiva_user_id")["_row"].transform("min")
+    flag(df["jobdiva_user_id"].duplicated(keep="first"),
+         "duplicate jobdiva_user_id in file (first at row " + first_user_row.astype(str) + ")")
+
+    # Only active mappings claim their GoTo number
+    active_phone = df["goto_phone_number"].where(df["_is_active"] != False)  # noqa: E712
+    first_phone_row = df.groupby(active_phone)["_row"].transform("min")
+    flag(active_phone.notna() & active_phone.duplicated(keep="first"),
+         "duplicate goto_phone_number in file (first at row " + first_phone_row.astype("Int64").astype(str) + ")")
+    return errors
+
+
+async def import_mappings(
+    db: AsyncIOMotorDatabase, df: pd.DataFrame, dry_run: bool = False
+) -> Dict[str, Any]:
+    """Validate and upsert the rows of `df`; returns the per-row report."""
+    df = df.copy()
+    df["_row"] = range(1, len(df) + 1)
+    df["goto_phone_number"] = normalize_phone_series(df["goto_phone_number"])
+    df["_is_active"] = _parse_active(df["is_active"]) if "is_active" in df.columns else None
+    if "goto_extension" in df.columns:
+        df["goto_extension"] = df["goto_extension"].mask(df["goto_extension"] == "", None)
+
+    df["_error"] = _first_error(df)
+
+    # Conflicts with existing mappings, one query per key
+    user_ids = df.loc[df["_error"].isna(), "jobdiva_user_id"].tolist()
+    phones = df.loc[df["_error"].isna(), "goto_phone_number"].tolist()
+    existing: Dict[str, dict] = {}
+    async for doc in db.user_mappings.find({"jobdiva_user_id": {"$in": user_ids}}, {"_id": 0}):
+        existing[doc["jobdiva_user_id"]] = doc
+    phone_owner: Dict[str, str] = {}
+    async for doc in db.user_mappings.find(
+        {"goto_phone_number": {"$in": phones}, "is_active": True},
+        {"_id": 0, "goto_phone_number": 1, "jobdiva_user_id": 1},
+    ):
+        phone_owner[doc["goto_phone_number"]] = doc["jobdiva_user_id"]
+
+    now = datetime.now(timezone.utc)
+    rows: List[Dict[str, Any]] = []
+    operations: List[UpdateOne] = []
+    operation_rows: List[int] = []
+
+    # NaN -> None so the report and the documents never carry float NaN
+    records = df.astype(object).where(df.notna(), None).to_dict("records")
+    for record in records:
+        entry: Dict[str, Any] = {
+            "row": record["_row"],
+            "jobdiva_user_id": record["jobdiva_user_id"],
+            "goto_phone_number": record["goto_phone_number"],
+        }
+        rows.append(entry)
+        if record["_error"] is not None:
+            entry.update(status=ERROR, error=record["_error"])
+            continue
+
+        is_active = record["_is_active"]
+        owner = phone_owner.get(record["goto_phone_number"])
+        if owner and owner != record["jobdiva_user_id"] and is_active is not False:
+            entry.update(status=ERROR, error=f"goto_phone_number already mapped to {owner}")
+            continue
+
+        fields = {
+            "jobdiva_user_name": record["jobdiva_user_name"],
+            "goto_user_id": record["goto_user_id"],
+            "goto_phone_number": record["goto_phone_number"],
+        }
+        if "goto_extension" in record:
+            fields["goto_extension"] = record["goto_extension"]
+        if is_active is not None:
+            fields["is_active"] = bool(is_active)
+
+        current = existing.get(record["jobdiva_user_id"])
+        if current is not None and all(current.get(k) == v for k, v in fields.items()):
+            entry["status"] = UNCHANGED
+            continue
+
+        entry["status"] = UPDATED if current is not None else CREATED
+        on_insert: Dict[str, Any] = {"id": str(uuid.uuid4()), "created_at": now}
+        for key, default in (("goto_extension", None), ("is_active", True)):
+            if key not in fields:
+                on_insert[key] = default
+        operations.append(UpdateOne(
+            {"jobdiva_user_id": record["jobdiva_user_id"]},
+            {"$set": {**fields, "updated_at": now}, "$setOnInsert": on_insert},
+            upsert=True,
+        ))
+        operation_rows.append(len(rows) - 1)
+
+    if operations and not dry_run:
+        try:
+            await db.user_mappings.bulk_write(operations, ordered=True)
+        except BulkWriteError as e:
+            # Ordered: everything before the failed operation was applied
+            failed = e.details["writeErrors"][0]
+            failed_at = failed["index"]
+            rows[operation_rows[failed_at]].update(status=FAILED, error=failed.get("errmsg"))
+            for index in operation_rows[failed_at + 1:]:
+                rows[index]["status"] = SKIPPED
+            logger.error("Mapping import stopped at row %s: %s", rows[operation_rows[failed_at]]["row"], failed)
+        finally:
+            await mapping_index.notify_changed(db)
+
+    summary = {status: 0 for status in (CREATED, UPDATED, UNCHANGED, ERROR, FAILED, SKIPPED)}
+    for entry in rows:
+        summary[entry["status"]] += 1
+    logger.info("Mapping import%s: %s", " (dry run)" if dry_run else "", summary)
+    return {"total": len(rows), "dry_run": dry_run, **summary, "rows": rows}
@@ -0,0 +1,148 @@
+# backend/services/mapping_index.py
+"""
+Process-local index of active user mappings.
+
+Active `user_mappings` documents are loaded once at startup and kept in two
+dictionaries (by `goto_phone_number` and by `jobdiva_user_id`), so webhook and
+call routes resolve the recruiter without a Mongo round-trip.
+
+Coherence across replicas uses a version counter stored in the
+`cache_versions` collection: every admin write bumps the counter, and each
+process polls it (MAPPING_INDEX_POLL_SECONDS, default 5) and reloads when it
+changes. Polling works on standalone Mongo where change streams are not
+available.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+VERSION_DOC_ID = "user_mappings"
+
+
+class MappingIndex:
+    def __init__(self, poll_interval: float = 5.0) -> None:
+        self.poll_interval = poll_interval
+        self._by_phone: Dict[str, dict] = {}
+        self._by_user_id: Dict[str, dict] = {}
+        self.version: Optional[int] = None
+        self.loaded = False
+        self.reloads = 0
+        self._task: Optional[asyncio.Task] = None
+        self._reload_lock = asyncio.Lock()
+
+    # ----------------------------------------------------------------------------------
+    # Loading
+    # ----------------------------------------------------------------------------------
+
+    async def _read_version(self, db: AsyncIOMotorDatabase) -> int:
+        doc = await db.cache_versions.find_one({"_id": VERSION_DOC_ID})
+        return doc["version"] if doc else 0
+
+    async def reload(self, db: AsyncIOMotorDatabase) -> None:
+        """Rebuild the index from Mongo and swap it in atomically."""
+        async with self._reload_lock:
+            version = await self._read_version(db)
+            by_phone: Dict[str, dict] = {}
+            by_user_id: Dict[str, dict] = {}
+            async for mapping in db.user_mappings.find({"is_active": True}, {"_id": 0}):
+                by_phone[mapping["goto_phone_number"]] = mapping
+                by_user_id[mapping["jobdiva_user_id"]] = mapping
+
+            self._by_phone = by_phone
+            self._by_user_id = by_user_id
+            self.version = version
+            self.loaded = True
+            self.reloads += 1
+            logger.info("Mapping index loaded: %d active mappings (version=%s)", len(by_user_id), version)
+
+    async def sync(self, db: AsyncIOMotorDatabase) -> None:
+        """Reload if another process (or this one) bumped the version."""
+        version = await self._read_version(db)
+        if not self.loaded or version != self.version:
+            await self.reload(db)
+
+    async def notify_changed(self, db: AsyncIOMotorDatabase) -> None:
+        """
+        Called after a mapping write: bump the shared version and reload
+        this process's index. Failures are logged; the poller will retry.
+        """
+        try:
+            await db.cache_versions.find_one_and_update(
+                {"_id": VERSION_DOC_ID},
+                {"$inc": {"version": 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            await self.reload(db)
+        except Exception as e:
+            logger.error("Failed to refresh mapping index: %s", e)
+
+    # ----------------------------------------------------------------------------------
+    # Background polling
+    # ----------------------------------------------------------------------------------
+
+    async def _poll(self, db: AsyncIOMotorDatabase) -> None:
+        while True:
+            try:
+                await self.sync(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Mapping index sync failed: %s", e)
+            await asyncio.sleep(self.poll_interval)
+
+    async def start(self, db: AsyncIOMotorDatabase) -> None:
+        """Start the background poller (its first pass loads the index)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll(db))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ----------------------------------------------------------------------------------
+    # Lookups
+    # ----------------------------------------------------------------------------------
+
+    async def find_by_phone(self, db: AsyncIOMotorDatabase, goto_phone_number: str) -> Optional[dict]:
+        """Active mapping for a GoTo number (falls back to Mongo until loaded)."""
+        if self.loaded:
+            return self._by_phone.get(goto_phone_number)
+        return await db.user_mappings.find_one(
+            {"goto_phone_number": goto_phone_number, "is_active": True}, {"_id": 0}
+        )
+
+    async def find_by_jobdiva_user_id(self, db: AsyncIOMotorDatabase, jobdiva_user_id: str) -> Optional[dict]:
+        """Active mapping for a JobDiva user (falls back to Mongo until loaded)."""
+        if self.loaded:
+            return self._by_user_id.get(jobdiva_user_id)
+        return await db.user_mappings.find_one(
+            {"jobdiva_user_id": jobdiva_user_id, "is_active": True}, {"_id": 0}
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "version": self.version,
+            "active_mappings": len(self._by_user_id),
+            "phone_numbers": len(self._by_phone),
+            "reloads": self.reloads,
+            "poll_interval_seconds": self.poll_interval,
+        }
+
+
+mapping_index = MappingIndex(poll_interval=float(os.getenv("MAPPING_INDEX_POLL_SECONDS", "5")))
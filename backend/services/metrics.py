@@ -0,0 +1,356 @@
+# backend/services/metrics.py
+"""
+Prometheus metrics, exposed in the text format at GET /metrics.
+
+A small in-process registry (no client library) with counters, gauges and
+histograms. Label values are bound once: `labels()` returns a cached child,
+and the hot paths keep their children (per route, per Mongo collection and
+command, per upstream operation and status) instead of building label sets
+per request. Updates are a lock plus a few additions.
+
+What is measured:
+
+- HTTP: `instrument_routes(app)` wraps every API route with pre-bound
+  request count / latency / in-flight metrics, labelled by the route
+  template (not the raw path) and method. Latency is time to the response
+  headers, so long-lived streams (/admin/logs/stream) don't skew it.
+- Upstreams: GoTo / JobDiva HTTP attempts by operation and status code
+  (`observe_upstream`), "error" for transport failures.
+- Mongo: command timings per collection and command from pymongo command
+  monitoring (`mongo_commands`, registered on the shared client).
+- OAuth token refreshes, read from the token broker's counters at scrape
+  time (`register_collector`).
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+from pymongo import monitoring
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers Mongo round-trips up to slow upstream calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+# --------------------------------------------------------------------------------------
+# Metric types
+# --------------------------------------------------------------------------------------
+
+
+class _Value:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramValue:
+    __slots__ = ("_lock", "_bounds", "counts", "sum")
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> Any:
+        """Child for these label values, created on first use and cached."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(tuple(str(v) for v in values), self._new_child())
+        return child
+
+    def _label_dict(self, values: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def samples(self) -> List[Sample]:
+        return [(f"{self.name}_total", self._label_dict(values), child.value)
+                for values, child in list(self._children.items())]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def samples(self) -> List[Sample]:
+        return [(self.name, self._label_dict(values), child.value)
+                for values, child in list(self._children.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def samples(self) -> List[Sample]:
+        samples: List[Sample] = []
+        for values, child in list(self._children.items()):
+            labels = self._label_dict(values)
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+# --------------------------------------------------------------------------------------
+# Registry and exposition
+# --------------------------------------------------------------------------------------
+
+REGISTRY: List[_Metric] = []
+
+# Scrape-time collectors: () -> [(name, kind, help, samples)]
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+_collectors: List[Collector] = []
+
+
+def register_collector(collector: Collector) -> None:
+    """Add metrics computed at scrape time from existing counters."""
+    _collectors.append(collector)
+
+
+def _family(name: str, kind: str, documentation: str, samples: List[Sample]) -> List[str]:
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    lines += [f"{sample}{_format_labels(labels)} {_format_value(value)}" for sample, labels, value in samples]
+    return lines
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines += _family(metric.name, metric.kind, metric.documentation, metric.samples())
+    for collector in _collectors:
+        for name, kind, documentation, samples in collector():
+            lines += _family(name, kind, documentation, samples)
+    return "\n".join(lines) + "\n"
+
+
+# --------------------------------------------------------------------------------------
+# Metrics
+# --------------------------------------------------------------------------------------
+
+HTTP_REQUESTS = Counter(
+    "http_requests", "HTTP requests by route template, method and status code.", ("route", "method", "status")
+)
+HTTP_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time to response headers by route template and method.", ("route", "method")
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests currently being handled by route template and method.", ("route", "method")
+)
+UPSTREAM_SECONDS = Histogram(
+    "upstream_request_duration_seconds",
+    "GoTo / JobDiva HTTP attempts by operation and status code (\"error\" for transport failures).",
+    ("upstream", "operation", "status"),
+)
+MONGO_SECONDS = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command round-trips by collection and command.",
+    ("collection", "command"),
+)
+MONGO_FAILURES = Counter(
+    "mongo_command_failures", "Failed MongoDB commands by collection and command.", ("collection", "command")
+)
+
+
+def observe_upstream(upstream: str, operation: str, status: Any, seconds: float) -> None:
+    """Record one upstream HTTP attempt; `status` is the code or "error"."""
+    UPSTREAM_SECONDS.labels(upstream, operation, str(status)).observe(seconds)
+
+
+# --------------------------------------------------------------------------------------
+# HTTP routes
+# --------------------------------------------------------------------------------------
+
+
+class _RouteMetrics:
+    """ASGI wrapper around one route's app with its metric children bound up front."""
+
+    def __init__(self, app: Callable, route: str, methods: Iterable[str]) -> None:
+        self.app = app
+        self.route = route
+        self._seconds = {method: HTTP_SECONDS.labels(route, method) for method in methods}
+        self._in_flight = {method: HTTP_IN_FLIGHT.labels(route, method) for method in methods}
+        self._requests: Dict[str, Dict[int, _Value]] = {method: {} for method in methods}
+
+    def _count(self, method: str, status: int) -> None:
+        by_status = self._requests.get(method)
+        if by_status is None:
+            by_status = self._requests[method] = {}
+        child = by_status.get(status)
+        if child is None:
+            child = by_status[status] = HTTP_REQUESTS.labels(self.route, method, str(status))
+        child.inc()
+
+    async def __call__(self, scope, receive, send) -> None:
+        method = scope["method"]
+        seconds = self._seconds.get(method) or HTTP_SECONDS.labels(self.route, method)
+        in_flight = self._in_flight.get(method) or HTTP_IN_FLIGHT.labels(self.route, method)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                seconds.observe(time.perf_counter() - started)
+            await send(message)
+
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            self._count(method, status)
+
+
+def instrument_routes(app) -> None:
+    """Wrap every API route of `app` (call after all routers are included)."""
+    from fastapi.routing import APIRoute
+
+    for route in app.router.routes:
+        if isinstance(route, APIRoute) and not isinstance(route.app, _RouteMetrics):
+            route.app = _RouteMetrics(route.app, route.path, route.methods)
+
+
+# --------------------------------------------------------------------------------------
+# MongoDB commands
+# --------------------------------------------------------------------------------------
+
+# Commands whose first argument is not a collection name
+_NO_COLLECTION = {"ping", "hello", "isMaster", "ismaster", "buildInfo", "endSessions", "killCursors"}
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Times MongoDB commands from pymongo's command monitoring events. The
+    collection is only known from the started event, so it is remembered
+    per (connection, request id) until the command finishes.
+    """
+
+    def __init__(self) -> None:
+        self._pending: Dict[Tuple[Any, int], Tuple[Any, Any]] = {}
+        self._children: Dict[str, Dict[str, Tuple[Any, Any]]] = {}
+
+    def _bound(self, collection: str, command: str) -> Tuple[Any, Any]:
+        by_command = self._children.get(collection)
+        if by_command is None:
+            by_command = self._children[collection] = {}
+        bound = by_command.get(command)
+        if bound is None:
+            bound = by_command[command] = (
+                MONGO_SECONDS.labels(collection, command),
+                MONGO_FAILURES.labels(collection, command),
+            )
+        return bound
+
+    def started(self, event) -> None:
+        command = event.command_name
+        collection = "" if command in _NO_COLLECTION else event.command.get(command)
+        if command == "getMore":
+            collection = event.command.get("collection")
+        if not isinstance(collection, str):
+            collection = ""
+        self._pending[(event.connection_id, event.request_id)] = self._bound(collection, command)
+
+    def succeeded(self, event) -> None:
+        bound = self._pending.pop((event.connection_id, event.request_id), None)
+        if bound is not None:
+            bound[0].observe(event.duration_micros / 1e6)
+
+    def failed(self, event) -> None:
+        bound = self._pending.pop((event.connection_id, event.request_id), None)
+        if bound is not None:
+            bound[0].observe(event.duration_micros / 1e6)
+            bound[1].inc()
+
+
+mongo_commands = MongoCommandMetrics()
@@ -0,0 +1,189 @@
+# backend/services/note_backfill.py
+"""
+Backfill of JobDiva notes that could not be written when the interaction
+was logged (JobDiva breaker open, or a batched note whose flush failed).
+
+Such interaction logs carry `jobdiva_note_pending=True` together with the
+note text and a `jobdiva_note_backfill_at` time. A background task (and the
+admin endpoint) claims due logs one at a time, resolves the candidate if the
+lookup was skipped, writes the note and clears the pending state.
+
+Configured with env vars:
+- NOTE_BACKFILL_INTERVAL_SECONDS  background run interval (default 60, 0 disables)
+- NOTE_BACKFILL_DELAY_SECONDS     wait before retrying a deferred note (default 60)
+- NOTE_BACKFILL_MAX_ATTEMPTS      attempts before giving up on a note (default 5)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+
+from services import indexes
+from services.circuit_breaker import CircuitOpenError, get_breaker
+from services.http_clients import JOBDIVA
+from services.jobdiva_service import jobdiva_service
+
+logger = logging.getLogger(__name__)
+
+INTERVAL_SECONDS = float(os.getenv("NOTE_BACKFILL_INTERVAL_SECONDS", "60"))
+DELAY_SECONDS = float(os.getenv("NOTE_BACKFILL_DELAY_SECONDS", "60"))
+MAX_ATTEMPTS = int(os.getenv("NOTE_BACKFILL_MAX_ATTEMPTS", "5"))
+LEASE_SECONDS = 120.0
+
+indexes.register(
+    "interaction_logs",
+    IndexModel(
+        [("jobdiva_note_backfill_at", ASCENDING)],
+        name="jobdiva_note_backfill_at",
+        sparse=True,
+    ),
+)
+
+# Fields removed from a log once its note is settled
+_CLEARED = {"jobdiva_note_text": "", "jobdiva_note_backfill_at": ""}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def pending_note_fields(note_text: str, delay_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """Extra document fields for a log whose note still has to be written."""
+    delay = DELAY_SECONDS if delay_seconds is None else delay_seconds
+    return {
+        "jobdiva_note_pending": True,
+        "jobdiva_note_text": note_text,
+        "jobdiva_note_backfill_at": _now() + timedelta(seconds=delay),
+    }
+
+
+async def _claim(db: AsyncIOMotorDatabase) -> Optional[dict]:
+    now = _now()
+    return await db.interaction_logs.find_one_and_update(
+        {"jobdiva_note_pending": True, "jobdiva_note_backfill_at": {"$lte": now}},
+        {
+            "$set": {"jobdiva_note_backfill_at": now + timedelta(seconds=LEASE_SECONDS)},
+            "$inc": {"jobdiva_note_backfill_attempts": 1},
+        },
+        sort=[("jobdiva_note_backfill_at", ASCENDING)],
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def settle_note(db: AsyncIOMotorDatabase, log_id: str, fields: Dict[str, Any]) -> None:
+    """Record a pending note's outcome (`fields`) and clear its pending state."""
+    await db.interaction_logs.update_one(
+        {"id": log_id},
+        {"$set": {**fields, "jobdiva_note_pending": False}, "$unset": _CLEARED},
+    )
+
+
+async def _backfill_one(db: AsyncIOMotorDatabase, log: dict) -> str:
+    """Write the note for one claimed log. Returns the outcome name."""
+    updates: Dict[str, Any] = {}
+    candidate_id = log.get("candidate_id")
+
+    if not candidate_id:
+        candidate = await jobdiva_service.find_candidate_by_phone(log["candidate_phone"])
+        if not candidate:
+            await settle_note(db, log["id"], {"jobdiva_note_error": "No candidate found for phone"})
+            return "no_candidate"
+        candidate_id = candidate["candidate_id"]
+        updates.update(candidate_id=candidate_id, candidate_name=candidate["candidate_name"])
+
+    result = await jobdiva_service.create_candidate_note(
+        candidate_id=candidate_id, note_text=log["jobdiva_note_text"]
+    )
+    await settle_note(db, log["id"], {
+        **updates,
+        "jobdiva_note_created": result["success"],
+        "jobdiva_note_id": result.get("note_id"),
+        "jobdiva_note_error": None,
+    })
+    return "written"
+
+
+async def backfill_pending_notes(db: AsyncIOMotorDatabase, limit: int = 100) -> Dict[str, int]:
+    """
+    Write up to `limit` due pending notes. Stops early if the JobDiva
+    breaker opens, leaving the rest for the next run.
+    """
+    summary = {"written": 0, "no_candidate": 0, "failed": 0, "given_up": 0}
+    breaker = get_breaker(JOBDIVA)
+
+    for _ in range(limit):
+        if not breaker.allows_calls:
+            break
+        log = await _claim(db)
+        if log is None:
+            break
+
+        try:
+            summary[await _backfill_one(db, log)] += 1
+        except CircuitOpenError:
+            await db.interaction_logs.update_one(
+                {"id": log["id"]},
+                {
+                    "$set": {"jobdiva_note_backfill_at": _now() + timedelta(seconds=DELAY_SECONDS)},
+                    "$inc": {"jobdiva_note_backfill_attempts": -1},
+                },
+            )
+            break
+        except Exception as e:
+            logger.error("Backfill of JobDiva note for log %s failed: %s", log["id"], e)
+            if log.get("jobdiva_note_backfill_attempts", 0) >= MAX_ATTEMPTS:
+                await settle_note(db, log["id"], {"jobdiva_note_error": str(e)})
+                summary["given_up"] += 1
+            else:
+                await db.interaction_logs.update_one(
+                    {"id": log["id"]},
+                    {"$set": {
+                        "jobdiva_note_error": str(e),
+                        "jobdiva_note_backfill_at": _now() + timedelta(seconds=DELAY_SECONDS),
+                    }},
+                )
+                summary["failed"] += 1
+
+    if any(summary.values()):
+        logger.info("JobDiva note backfill: %s", summary)
+    return summary
+
+
+class NoteBackfiller:
+    def __init__(self, interval_seconds: float = INTERVAL_SECONDS) -> None:
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self, db: AsyncIOMotorDatabase) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await backfill_pending_notes(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("JobDiva note backfill run failed: %s", e)
+
+    def start(self, db: AsyncIOMotorDatabase) -> None:
+        if self._task is None and self.interval_seconds > 0:
+            self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+note_backfiller = NoteBackfiller()
@@ -0,0 +1,177 @@
+# backend/services/note_batcher.py
+"""
+Optional coalescing stage in front of `create_candidate_note`.
+
+Notes for the same candidate are buffered for a window (or until a max
+count) and written to JobDiva as one combined note. The interaction logs
+that contributed to a batch are updated afterwards with the resulting
+`jobdiva_note_id` and `jobdiva_note_batch_id`; until then they carry
+`jobdiva_note_pending=True`. Buffered notes are flushed on shutdown.
+
+Configured with env vars:
+- JOBDIVA_NOTE_BATCH_WINDOW_SECONDS  buffering window (default 0 = disabled)
+- JOBDIVA_NOTE_BATCH_MAX_NOTES       flush early at this many notes (default 10)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from services.jobdiva_service import jobdiva_service
+
+logger = logging.getLogger(__name__)
+
+NOTE_SEPARATOR = "\n----------\n"
+
+
+@dataclass
+class _Batch:
+    candidate_id: str
+    batch_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    notes: List[str] = field(default_factory=list)
+    interaction_log_ids: List[str] = field(default_factory=list)
+
+
+def combine_notes(notes: List[str]) -> str:
+    """Join buffered notes into the text of one JobDiva note."""
+    if len(notes) == 1:
+        return notes[0]
+    return f"[GoTo][Batched] {len(notes)} interactions{NOTE_SEPARATOR}" + NOTE_SEPARATOR.join(notes)
+
+
+class NoteBatcher:
+    def __init__(self, window_seconds: float = 0.0, max_notes: int = 10) -> None:
+        self.window_seconds = window_seconds
+        self.max_notes = max_notes
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self._batches: Dict[str, _Batch] = {}
+        self._timers: Set[asyncio.Task] = set()
+        self._writes: Set[asyncio.Task] = set()
+
+        self.notes_submitted = 0
+        self.notes_flushed = 0
+        self.batches_flushed = 0
+        self.flush_failures = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0 and self._db is not None
+
+    @staticmethod
+    def _spawn(tasks: Set[asyncio.Task], coro) -> None:
+        task = asyncio.create_task(coro)
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    async def submit(self, candidate_id: str, note_text: str, interaction_log_id: str) -> str:
+        """
+        Buffer a note for a candidate. Returns the batch id the note joined;
+        the interaction log is patched when the batch is flushed.
+        """
+        batch = self._batches.get(candidate_id)
+        if batch is None:
+            batch = _Batch(candidate_id=candidate_id)
+            self._batches[candidate_id] = batch
+            self._spawn(self._timers, self._flush_after_window(batch))
+
+        batch.notes.append(note_text)
+        batch.interaction_log_ids.append(interaction_log_id)
+        self.notes_submitted += 1
+
+        if len(batch.notes) >= self.max_notes:
+            self._batches.pop(candidate_id, None)
+            self._spawn(self._writes, self._write(batch))
+
+        return batch.batch_id
+
+    async def _flush_after_window(self, batch: _Batch) -> None:
+        await asyncio.sleep(self.window_seconds)
+        if self._batches.get(batch.candidate_id) is batch:
+            del self._batches[batch.candidate_id]
+            self._spawn(self._writes, self._write(batch))
+
+    async def _write(self, batch: _Batch) -> None:
+        update: Dict[str, Any]
+        try:
+            result = await jobdiva_service.create_candidate_note(
+                candidate_id=batch.candidate_id,
+                note_text=combine_notes(batch.notes),
+            )
+            update = {
+                "$set": {
+                    "jobdiva_note_created": result["success"],
+                    "jobdiva_note_id": result.get("note_id"),
+                    "jobdiva_note_batch_id": batch.batch_id,
+                    "jobdiva_note_pending": False,
+                    "jobdiva_note_error": None,
+                },
+                # Settled: nothing left for note_backfill.py to do
+                "$unset": {"jobdiva_note_text": "", "jobdiva_note_backfill_at": ""},
+            }
+            self.batches_flushed += 1
+            self.notes_flushed += len(batch.notes)
+        except Exception as e:
+            logger.error(
+                "Failed to write batched JobDiva note for candidate %s (%d notes): %s",
+                batch.candidate_id, len(batch.notes), e,
+            )
+            self.flush_failures += 1
+            # Logs stay pending; note_backfill.py retries them individually
+            update = {"$set": {"jobdiva_note_batch_id": batch.batch_id, "jobdiva_note_error": str(e)}}
+
+        try:
+            await self._db.interaction_logs.update_many(
+                {"id": {"$in": batch.interaction_log_ids}}, update
+            )
+        except Exception as e:
+            logger.error("Failed to update interaction logs for note batch %s: %s", batch.batch_id, e)
+
+    async def flush_all(self) -> None:
+        """Write every buffered batch now."""
+        batches = list(self._batches.values())
+        self._batches.clear()
+        await asyncio.gather(*(self._write(batch) for batch in batches))
+
+    def start(self, db: AsyncIOMotorDatabase) -> None:
+        self._db = db
+        if self.window_seconds > 0:
+            logger.info(
+                "JobDiva note batching enabled (window=%ss, max_notes=%s)",
+                self.window_seconds, self.max_notes,
+            )
+
+    async def stop(self) -> None:
+        """Flush buffered notes and wait for in-flight writes."""
+        if self._db is None:
+            return
+        for task in list(self._timers):
+            task.cancel()
+        await self.flush_all()
+        await asyncio.gather(*self._writes, return_exceptions=True)
+        self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "window_seconds": self.window_seconds,
+            "max_notes": self.max_notes,
+            "buffered_candidates": len(self._batches),
+            "buffered_notes": sum(len(b.notes) for b in self._batches.values()),
+            "notes_submitted": self.notes_submitted,
+            "notes_flushed": self.notes_flushed,
+            "batches_flushed": self.batches_flushed,
+            "flush_failures": self.flush_failures,
+        }
+
+
+note_batcher = NoteBatcher(
+    window_seconds=float(os.getenv("JOBDIVA_NOTE_BATCH_WINDOW_SECONDS", "0")),
+    max_notes=int(os.getenv("JOBDIVA_NOTE_BATCH_MAX_NOTES", "10")),
+)
@@ -0,0 +1,200 @@
+# backend/services/rate_limiter.py
+"""
+Client-side pacing and retry primitives for upstream APIs.
+
+- `TokenBucket`: async token bucket; waiters are served in FIFO order and a
+  bucket can be blocked for a period (used to honor `Retry-After`).
+- `KeyedRateLimiter`: lazily creates one bucket per key (endpoint, phone, ...).
+- `RetryPolicy`: jittered exponential backoff bounded by a `RetryBudget`, so
+  retries can never exceed a fixed fraction of normal traffic.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+        self.acquired = 0
+        self.throttled = 0
+        self.total_wait_seconds = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> float:
+        """Take one token, waiting if needed. Returns the seconds waited."""
+        started = self._clock()
+        slept = False
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._refill(now)
+                if now < self._blocked_until:
+                    delay = self._blocked_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                else:
+                    delay = (1 - self._tokens) / self.rate
+                slept = True
+                await asyncio.sleep(delay)
+
+        waited = self._clock() - started
+        self.acquired += 1
+        if slept:
+            self.throttled += 1
+            self.total_wait_seconds += waited
+        return waited
+
+    def block_for(self, seconds: float) -> None:
+        """Hold every acquirer for `seconds` (e.g. after a 429 with Retry-After)."""
+        self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+        self._tokens = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = self._clock()
+        self._refill(now)
+        return {
+            "rate_per_second": self.rate,
+            "capacity": self.capacity,
+            "tokens": round(self._tokens, 3),
+            "fill_ratio": round(self._tokens / self.capacity, 3) if self.capacity else 0.0,
+            "blocked_for_seconds": round(max(0.0, self._blocked_until - now), 3),
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "total_wait_seconds": round(self.total_wait_seconds, 3),
+        }
+
+
+class KeyedRateLimiter:
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def bucket(self, key: str) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.capacity)
+            self._buckets[key] = bucket
+        return bucket
+
+    async def acquire(self, key: str) -> float:
+        if not self.enabled:
+            return 0.0
+        return await self.bucket(key).acquire()
+
+    def block_for(self, key: str, seconds: float) -> None:
+        if self.enabled:
+            self.bucket(key).block_for(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {key: bucket.snapshot() for key, bucket in self._buckets.items()}
+
+
+class RetryBudget:
+    """
+    Every first attempt deposits `ratio` tokens and every retry spends one,
+    so retries are capped at roughly `ratio` x normal traffic. `reserve` is
+    the starting (and maximum) balance that lets low-traffic periods retry.
+    """
+
+    def __init__(self, ratio: float, reserve: float = 10.0) -> None:
+        self.ratio = ratio
+        self.reserve = reserve
+        self._tokens = reserve
+        self.exhausted = 0
+
+    def deposit(self) -> None:
+        self._tokens = min(self.reserve, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        self.exhausted += 1
+        return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ratio": self.ratio,
+            "balance": round(self._tokens, 3),
+            "reserve": self.reserve,
+            "exhausted": self.exhausted,
+        }
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+        budget: Optional[RetryBudget] = None,
+    ) -> None:
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget(ratio=0.2)
+        self.retries: Dict[str, int] = {}
+        self.gave_up: Dict[str, int] = {}
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for retry number `attempt` (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def should_retry(self, operation: str, attempt: int) -> bool:
+        """Record and decide whether retry number `attempt` (0-based) may run."""
+        if attempt < self.max_retries and self.budget.try_spend():
+            self.retries[operation] = self.retries.get(operation, 0) + 1
+            return True
+        self.gave_up[operation] = self.gave_up.get(operation, 0) + 1
+        return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "max_retries": self.max_retries,
+            "base_delay_seconds": self.base_delay,
+            "max_delay_seconds": self.max_delay,
+            "retries": dict(self.retries),
+            "gave_up": dict(self.gave_up),
+            "budget": self.budget.snapshot(),
+        }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
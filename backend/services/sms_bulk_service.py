@@ -0,0 +1,360 @@
+# backend/services/sms_bulk_service.py
+"""
+Bulk SMS jobs on top of `goto_service.send_sms`.
+
+A job fans out one GoTo send per recipient with bounded concurrency. It runs
+as a background task, independent of the HTTP request that started it, so a
+client can disconnect and resume the progress stream later.
+
+- Jobs are stored in `sms_bulk_jobs`, per-recipient results in
+  `sms_bulk_results` (one document per recipient, numbered by `seq`).
+- Progress is streamed as NDJSON events: one "job" header, one "result" per
+  recipient, and a final "summary" with throughput and latency percentiles.
+  A stream ends with a "stalled" event instead when no result arrived for
+  SMS_BULK_STALE_SECONDS; the client resumes it with `after`.
+- A running job renews `heartbeat_at` every SMS_BULK_HEARTBEAT_SECONDS. A
+  running job whose heartbeat is older than SMS_BULK_STALE_SECONDS stopped
+  with its process; it is marked failed at startup (`fail_stale_jobs`) or
+  when its progress is streamed.
+
+Configured with env vars:
+- SMS_BULK_CONCURRENCY        default concurrent sends per job (default 5)
+- SMS_BULK_MAX_CONCURRENCY    upper bound a request may ask for (default 20)
+- SMS_BULK_HEARTBEAT_SECONDS  heartbeat interval of a running job (default 10)
+- SMS_BULK_STALE_SECONDS      heartbeat / progress timeout (default 60)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, IndexModel
+
+from services import indexes
+from services.goto_service import goto_service
+from utils.phone_utils import normalize_phone_e164
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = int(os.getenv("SMS_BULK_CONCURRENCY", "5"))
+MAX_CONCURRENCY = int(os.getenv("SMS_BULK_MAX_CONCURRENCY", "20"))
+HEARTBEAT_SECONDS = float(os.getenv("SMS_BULK_HEARTBEAT_SECONDS", "10"))
+STALE_SECONDS = float(os.getenv("SMS_BULK_STALE_SECONDS", "60"))
+
+# How often a stream served from Mongo looks for new results
+_POLL_SECONDS = 1.0
+
+# Finished jobs kept in memory for fast stream resume; older ones are read from Mongo
+_RECENT_JOBS = 50
+
+RUNNING = "running"
+COMPLETED = "completed"
+INTERRUPTED = "interrupted"
+FAILED = "failed"
+
+indexes.register(
+    "sms_bulk_jobs",
+    IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+)
+indexes.register(
+    "sms_bulk_results",
+    IndexModel([("job_id", ASCENDING), ("seq", ASCENDING)], name="job_id_seq_unique", unique=True),
+)
+
+
+def _timestamp(at: Optional[datetime] = None) -> str:
+    # Fixed precision, so heartbeats compare correctly as strings
+    return (at or datetime.now(timezone.utc)).isoformat(timespec="microseconds")
+
+
+def _stalled_event(job_id: str) -> Dict[str, Any]:
+    return {"type": "stalled", "job_id": job_id, "idle_seconds": STALE_SECONDS}
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def latency_summary(latencies_ms: List[float]) -> Dict[str, float]:
+    values = sorted(latencies_ms)
+    return {
+        "avg_ms": round(sum(values) / len(values), 3) if values else 0.0,
+        "p50_ms": round(_percentile(values, 50), 3),
+        "p95_ms": round(_percentile(values, 95), 3),
+        "p99_ms": round(_percentile(values, 99), 3),
+        "max_ms": round(values[-1], 3) if values else 0.0,
+    }
+
+
+class BulkSmsJob:
+    def __init__(
+        self,
+        job_id: str,
+        owner_phone_number: str,
+        recipients: List[Dict[str, Any]],
+        concurrency: int,
+    ) -> None:
+        self.job_id = job_id
+        self.owner_phone_number = owner_phone_number
+        self.recipients = recipients
+        self.concurrency = concurrency
+        self.events: List[Dict[str, Any]] = []
+        self.done = False
+        self._changed = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+    async def _publish(self, event: Dict[str, Any]) -> None:
+        async with self._changed:
+            self.events.append(event)
+            self._changed.notify_all()
+
+    async def _finish(self) -> None:
+        async with self._changed:
+            self.done = True
+            self._changed.notify_all()
+
+    async def events_after(
+        self, after: int, idle_timeout: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield result events with seq > `after`, then the summary. Ends with
+        a "stalled" event when nothing happens for `idle_timeout` seconds.
+        """
+        position = 0
+        while True:
+            stalled = False
+            async with self._changed:
+                while position >= len(self.events) and not self.done:
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), idle_timeout)
+                    except asyncio.TimeoutError:
+                        stalled = True
+                        break
+                pending = self.events[position:]
+                position = len(self.events)
+                finished = self.done and position == len(self.events)
+            for event in pending:
+                if event["type"] != "result" or event["seq"] > after:
+                    yield event
+            if finished:
+                return
+            if stalled:
+                yield _stalled_event(self.job_id)
+                return
+
+    async def _heartbeat(self, db: AsyncIOMotorDatabase) -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            try:
+                await db.sms_bulk_jobs.update_one({"id": self.job_id}, {"$set": {"heartbeat_at": _timestamp()}})
+            except Exception as e:
+                logger.error("Failed to renew heartbeat of bulk SMS job %s: %s", self.job_id, e)
+
+    async def _send_one(
+        self, db: AsyncIOMotorDatabase, seq: int, recipient: Dict[str, Any], semaphore: asyncio.Semaphore
+    ) -> float:
+        async with semaphore:
+            started = time.perf_counter()
+            result: Dict[str, Any] = {
+                "job_id": self.job_id,
+                "seq": seq,
+                "candidate_id": recipient.get("candidate_id"),
+                "candidate_name": recipient.get("candidate_name"),
+                "candidate_phone": recipient["candidate_phone"],
+            }
+            try:
+                phone = normalize_phone_e164(recipient["candidate_phone"])
+                result["candidate_phone"] = phone
+                goto_response = await goto_service.send_sms(
+                    owner_phone_number=self.owner_phone_number,
+                    contact_phone_numbers=[phone],
+                    body=recipient["message"],
+                )
+                result.update(status="sent", goto_message_id=goto_response.get("id"), error=None)
+            except Exception as e:
+                logger.error("Bulk SMS %s #%d to %s failed: %s", self.job_id, seq, recipient["candidate_phone"], e)
+                result.update(status="failed", goto_message_id=None, error=str(e))
+
+            latency_ms = (time.perf_counter() - started) * 1000
+            result["latency_ms"] = round(latency_ms, 3)
+            result["completed_at"] = datetime.now(timezone.utc).isoformat()
+
+        counter = "sent" if result["status"] == "sent" else "failed"
+        try:
+            await db.sms_bulk_results.insert_one(dict(result))
+            await db.sms_bulk_jobs.update_one({"id": self.job_id}, {"$inc": {counter: 1}})
+        except Exception as e:
+            logger.error("Failed to persist bulk SMS result %s #%d: %s", self.job_id, seq, e)
+
+        await self._publish({"type": "result", **result})
+        return latency_ms
+
+    async def run(self, db: AsyncIOMotorDatabase) -> None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+        status = COMPLETED
+        latencies: List[float] = []
+        heartbeat = asyncio.create_task(self._heartbeat(db))
+        try:
+            latencies = await asyncio.gather(*(
+                self._send_one(db, seq, recipient, semaphore)
+                for seq, recipient in enumerate(self.recipients, start=1)
+            ))
+        except asyncio.CancelledError:
+            status = INTERRUPTED
+            raise
+        finally:
+            heartbeat.cancel()
+            elapsed = time.perf_counter() - started
+            sent = sum(1 for e in self.events if e["type"] == "result" and e["status"] == "sent")
+            summary = {
+                "status": status,
+                "total": len(self.recipients),
+                "completed": len(self.events),
+                "sent": sent,
+                "failed": len(self.events) - sent,
+                "elapsed_seconds": round(elapsed, 3),
+                "throughput_per_second": round(len(self.events) / elapsed, 3) if elapsed > 0 else 0.0,
+                "latency": latency_summary(list(latencies) or [
+                    e["latency_ms"] for e in self.events if e["type"] == "result"
+                ]),
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+            }
+            try:
+                await db.sms_bulk_jobs.update_one({"id": self.job_id}, {"$set": summary})
+            except Exception as e:
+                logger.error("Failed to persist bulk SMS summary %s: %s", self.job_id, e)
+            await self._publish({"type": "summary", "job_id": self.job_id, **summary})
+            await self._finish()
+            logger.info(
+                "Bulk SMS job %s %s: %d/%d sent in %.2fs",
+                self.job_id, status, sent, len(self.recipients), elapsed,
+            )
+
+
+class BulkSmsService:
+    def __init__(self) -> None:
+        self._jobs: "OrderedDict[str, BulkSmsJob]" = OrderedDict()
+
+    async def start_job(
+        self,
+        db: AsyncIOMotorDatabase,
+        owner_phone_number: str,
+        recipients: List[Dict[str, Any]],
+        recruiter_name: Optional[str] = None,
+        concurrency: Optional[int] = None,
+    ) -> BulkSmsJob:
+        concurrency = max(1, min(concurrency or DEFAULT_CONCURRENCY, MAX_CONCURRENCY))
+        job = BulkSmsJob(str(uuid.uuid4()), owner_phone_number, recipients, concurrency)
+
+        await db.sms_bulk_jobs.insert_one({
+            "id": job.job_id,
+            "status": RUNNING,
+            "from": owner_phone_number,
+            "recruiter_name": recruiter_name,
+            "total": len(recipients),
+            "sent": 0,
+            "failed": 0,
+            "concurrency": concurrency,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "heartbeat_at": _timestamp(),
+        })
+
+        self._jobs[job.job_id] = job
+        while len(self._jobs) > _RECENT_JOBS:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if not oldest.done:
+                break
+            del self._jobs[oldest_id]
+
+        job.task = asyncio.create_task(job.run(db))
+        return job
+
+    async def get_job(self, db: AsyncIOMotorDatabase, job_id: str) -> Optional[dict]:
+        return await db.sms_bulk_jobs.find_one({"id": job_id}, {"_id": 0})
+
+    async def fail_stale_jobs(self, db: AsyncIOMotorDatabase, job_id: Optional[str] = None) -> int:
+        """
+        Mark running jobs (or job `job_id`) whose heartbeat is older than
+        STALE_SECONDS as failed. Returns how many were marked.
+        """
+        cutoff = _timestamp(datetime.now(timezone.utc) - timedelta(seconds=STALE_SECONDS))
+        filter_: Dict[str, Any] = {
+            "status": RUNNING,
+            "$or": [{"heartbeat_at": {"$lt": cutoff}}, {"heartbeat_at": None}],
+        }
+        if job_id is not None:
+            filter_["id"] = job_id
+        result = await db.sms_bulk_jobs.update_many(filter_, {"$set": {
+            "status": FAILED,
+            "error": "Job stopped before finishing (no heartbeat)",
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+        }})
+        if result.modified_count:
+            logger.warning("Marked %d stale bulk SMS job(s) as failed", result.modified_count)
+        return result.modified_count
+
+    async def stream(self, db: AsyncIOMotorDatabase, job_id: str, after: int = 0) -> AsyncIterator[str]:
+        """
+        NDJSON progress for a job, starting after result `seq` == `after`.
+        Served from memory while the job is local, followed in Mongo
+        otherwise.
+        """
+        job_doc = await self.get_job(db, job_id)
+        if job_doc is None:
+            return
+        yield json.dumps({"type": "job", **job_doc}) + "\n"
+
+        job = self._jobs.get(job_id)
+        if job is not None:
+            async for event in job.events_after(after, idle_timeout=STALE_SECONDS):
+                yield json.dumps(event) + "\n"
+            return
+
+        last_id = None
+        idle_since = time.monotonic()
+        while True:
+            if job_doc.get("status") == RUNNING and await self.fail_stale_jobs(db, job_id):
+                job_doc = await self.get_job(db, job_id)
+            # job_doc was read before the results: a finished job has them all
+            filter_: Dict[str, Any] = {"job_id": job_id, "seq": {"$gt": after}}
+            if last_id is not None:
+                filter_["_id"] = {"$gt": last_id}
+            # In insertion order (results complete out of seq order)
+            async for result in db.sms_bulk_results.find(filter_).sort("_id", 1):
+                last_id = result.pop("_id")
+                idle_since = time.monotonic()
+                yield json.dumps({"type": "result", **result}) + "\n"
+            if job_doc.get("status") != RUNNING:
+                summary = {k: v for k, v in job_doc.items() if k not in ("id",)}
+                yield json.dumps({"type": "summary", "job_id": job_id, **summary}) + "\n"
+                return
+            if time.monotonic() - idle_since >= STALE_SECONDS:
+                yield json.dumps(_stalled_event(job_id)) + "\n"
+                return
+            await asyncio.sleep(_POLL_SECONDS)
+            job_doc = await self.get_job(db, job_id)
+            if job_doc is None:
+                return
+
+    async def stop(self) -> None:
+        """Cancel running jobs on shutdown (they are recorded as interrupted)."""
+        running = [job.task for job in self._jobs.values() if job.task and not job.task.done()]
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+bulk_sms_service = BulkSmsService()
@@ -0,0 +1,350 @@
+# backend/services/token_broker.py
+"""
+Shared OAuth access tokens for upstream APIs.
+
+A `TokenBroker` owns the access token of one upstream (GoTo, JobDiva):
+
+- Readers get the current token from memory without taking a lock; only an
+  expired or rejected token makes callers wait, and then they all wait on
+  the same single refresh.
+- A background task refreshes the token `refresh_margin` seconds before it
+  expires, so requests normally never see a refresh.
+- Tokens are shared across worker processes through the `oauth_tokens`
+  collection. The process that refreshes holds a short lease on the
+  upstream's document; the others adopt the token it writes instead of
+  refreshing themselves. The collection holds live bearer tokens and should
+  be protected like any other credential store.
+- `reauthenticate(token)` is called when the upstream answers 401; the
+  rejected token is skipped and one new token is fetched for all callers.
+
+Configured with env vars:
+- <PREFIX>_TOKEN_REFRESH_MARGIN_SECONDS  refresh this long before expiry (default 60)
+- TOKEN_LEASE_SECONDS                    lease held while refreshing (default 30)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = float(os.getenv("TOKEN_LEASE_SECONDS", "30"))
+
+# A token this close to expiry is not handed out any more
+EXPIRY_SKEW_SECONDS = 5.0
+# How often a process waiting on another's lease re-reads the shared token
+LEASE_POLL_SECONDS = 0.25
+
+# Returns (access_token, expires_in_seconds)
+Fetcher = Callable[[], Awaitable[Tuple[str, float]]]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Motor returns naive datetimes (UTC) unless the client is tz_aware
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class AccessToken:
+    value: str
+    expires_at: datetime
+    lifetime: float
+
+    def seconds_left(self) -> float:
+        return (self.expires_at - _now()).total_seconds()
+
+
+class TokenBroker:
+    def __init__(
+        self,
+        name: str,
+        fetch: Fetcher,
+        refresh_margin: float = 60.0,
+        lease_seconds: float = LEASE_SECONDS,
+        enabled: bool = True,
+    ) -> None:
+        self.name = name
+        self.refresh_margin = refresh_margin
+        self.lease_seconds = lease_seconds
+        # Background refresh only runs for upstreams with credentials configured
+        self.enabled = enabled
+        self._fetch = fetch
+        self._owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._token: Optional[AccessToken] = None
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self._refreshing: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.fetched = 0
+        self.adopted = 0
+        self.lease_waits = 0
+        self.reauthentications = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    # ----------------------------------------------------------------------------------
+    # Readers
+    # ----------------------------------------------------------------------------------
+
+    async def get_token(self) -> str:
+        """Current access token; waits only if there is no usable one."""
+        token = self._token
+        if token is not None and token.seconds_left() > EXPIRY_SKEW_SECONDS:
+            return token.value
+        return (await self._shared_refresh()).value
+
+    async def reauthenticate(self, rejected: str) -> str:
+        """
+        Replace a token the upstream rejected with 401. Concurrent callers
+        holding the same rejected token share one refresh.
+        """
+        token = self._token
+        if token is not None and token.value != rejected and token.seconds_left() > EXPIRY_SKEW_SECONDS:
+            return token.value
+        self.reauthentications += 1
+        logger.warning("%s rejected its access token; re-authenticating", self.name)
+        token = await self._shared_refresh()
+        if token.value == rejected:
+            # A refresh already in flight adopted the rejected token; force a new one
+            token = await self._shared_refresh(rejected)
+        return token.value
+
+    def _shared_refresh(self, rejected: Optional[str] = None) -> "asyncio.Future[AccessToken]":
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self._refresh(rejected))
+        # Shielded so a cancelled reader doesn't abort the refresh for everyone else
+        return asyncio.shield(self._refreshing)
+
+    # ----------------------------------------------------------------------------------
+    # Refresh
+    # ----------------------------------------------------------------------------------
+
+    async def _fetch_token(self) -> AccessToken:
+        try:
+            value, expires_in = await self._fetch()
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            raise
+        self.fetched += 1
+        self.last_error = None
+        return AccessToken(value, _now() + timedelta(seconds=expires_in), float(expires_in))
+
+    def _margin(self, token: AccessToken) -> float:
+        # Short-lived tokens are refreshed halfway through instead of constantly
+        return min(self.refresh_margin, token.lifetime / 2)
+
+    def _usable(self, token: Optional[AccessToken], rejected: Optional[str]) -> bool:
+        return (
+            token is not None
+            and token.value != rejected
+            and token.seconds_left() > self._margin(token)
+        )
+
+    async def _refresh(self, rejected: Optional[str]) -> AccessToken:
+        if self._db is None:
+            self._token = await self._fetch_token()
+            return self._token
+
+        try:
+            while True:
+                shared = await self._read_shared()
+                if self._usable(shared, rejected):
+                    # Another process already refreshed
+                    self.adopted += 1
+                    self._token = shared
+                    return shared
+
+                if await self._acquire_lease():
+                    try:
+                        token = await self._fetch_token()
+                        await self._write_shared(token)
+                    finally:
+                        await self._release_lease()
+                    self._token = token
+                    return token
+
+                self.lease_waits += 1
+                await asyncio.sleep(LEASE_POLL_SECONDS)
+        except PyMongoError as e:
+            logger.warning("Shared %s token unavailable (%s); refreshing locally", self.name, e)
+            self._token = await self._fetch_token()
+            return self._token
+
+    async def _read_shared(self) -> Optional[AccessToken]:
+        doc = await self._db.oauth_tokens.find_one({"_id": self.name})
+        if not doc or not doc.get("access_token"):
+            return None
+        return AccessToken(doc["access_token"], _as_utc(doc["expires_at"]), doc.get("lifetime", 0.0))
+
+    async def _acquire_lease(self) -> bool:
+        now = _now()
+        try:
+            doc = await self._db.oauth_tokens.find_one_and_update(
+                {"_id": self.name, "$or": [{"lease_until": None}, {"lease_until": {"$lte": now}}]},
+                {"$set": {
+                    "lease_owner": self._owner,
+                    "lease_until": now + timedelta(seconds=self.lease_seconds),
+                }},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # The document exists and another process holds the lease
+            return False
+        return doc is not None
+
+    async def _release_lease(self) -> None:
+        await self._db.oauth_tokens.update_one(
+            {"_id": self.name, "lease_owner": self._owner},
+            {"$set": {"lease_until": None}},
+        )
+
+    async def _write_shared(self, token: AccessToken) -> None:
+        await self._db.oauth_tokens.update_one(
+            {"_id": self.name},
+            {"$set": {
+                "access_token": token.value,
+                "expires_at": token.expires_at,
+                "lifetime": token.lifetime,
+                "refreshed_at": _now(),
+                "refreshed_by": self._owner,
+            }},
+            upsert=True,
+        )
+
+    # ----------------------------------------------------------------------------------
+    # Background refresh
+    # ----------------------------------------------------------------------------------
+
+    async def _run(self) -> None:
+        consecutive_failures = 0
+        while True:
+            token = self._token
+            if consecutive_failures:
+                delay = min(60.0, 2.0 ** consecutive_failures)
+            elif token is None:
+                delay = 0.0
+            else:
+                delay = max(1.0, token.seconds_left() - self._margin(token))
+            await asyncio.sleep(delay)
+
+            try:
+                token = self._token
+                if token is None or token.seconds_left() <= self._margin(token):
+                    await self._shared_refresh()
+                consecutive_failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                consecutive_failures += 1
+                logger.error("Background refresh of %s token failed: %s", self.name, e)
+
+    def start(self, db: Optional[AsyncIOMotorDatabase]) -> None:
+        self._db = db
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        for task in (self._task, self._refreshing):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._task = None
+        self._refreshing = None
+        self._db = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        token = self._token
+        return {
+            "enabled": self.enabled,
+            "shared": self._db is not None,
+            "has_token": token is not None,
+            "expires_in_seconds": round(token.seconds_left(), 1) if token else None,
+            "refresh_margin_seconds": self.refresh_margin,
+            "fetched": self.fetched,
+            "adopted": self.adopted,
+            "lease_waits": self.lease_waits,
+            "reauthentications": self.reauthentications,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+# --------------------------------------------------------------------------------------
+# Registry
+# --------------------------------------------------------------------------------------
+
+_brokers: Dict[str, TokenBroker] = {}
+
+
+def register(name: str, fetch: Fetcher, enabled: bool = True) -> TokenBroker:
+    """Create the broker for an upstream, configured from <PREFIX>_TOKEN_* env vars."""
+    broker = TokenBroker(
+        name,
+        fetch,
+        refresh_margin=float(os.getenv(f"{name.upper()}_TOKEN_REFRESH_MARGIN_SECONDS", "60")),
+        enabled=enabled,
+    )
+    _brokers[name] = broker
+    return broker
+
+
+def all_brokers() -> List[TokenBroker]:
+    return list(_brokers.values())
+
+
+def start(db: Optional[AsyncIOMotorDatabase]) -> None:
+    for broker in all_brokers():
+        broker.start(db)
+
+
+async def stop() -> None:
+    for broker in all_brokers():
+        await broker.stop()
+
+
+def broker_stats() -> Dict[str, Any]:
+    return {broker.name: broker.snapshot() for broker in all_brokers()}
+
+
+def _metrics():
+    brokers = all_brokers()
+    refreshes = [
+        ("oauth_token_refreshes_total", {"upstream": broker.name, "result": result}, count)
+        for broker in brokers
+        for result, count in (("fetched", broker.fetched), ("adopted", broker.adopted), ("failed", broker.failures))
+    ]
+    reauthentications = [
+        ("oauth_token_reauthentications_total", {"upstream": broker.name}, broker.reauthentications)
+        for broker in brokers
+    ]
+    return [
+        ("oauth_token_refreshes", "counter",
+         "Access tokens fetched from the upstream, adopted from another worker, or failed.", refreshes),
+        ("oauth_token_reauthentications", "counter",
+         "Tokens replaced after the upstream rejected them with 401.", reauthentications),
+    ]
+
+
+metrics.register_collector(_metrics)
@@ -0,0 +1,418 @@
+# backend/services/tracing.py
+"""
+Lightweight stage-level tracing.
+
+`span("jobdiva.find_candidate")` times one stage of a request as a child of
+the current span (kept in a context variable, so it follows `await`s and
+tasks). Every API request gets a root span from `TracingMiddleware`, which
+continues an incoming W3C `traceparent` header; queued webhooks carry the
+traceparent of the request that enqueued them.
+
+Trace ids are always assigned, so they show up in log lines (`trace=`),
+the `X-Trace-Id` response header and the `traceparent` header of outgoing
+GoTo / JobDiva requests, even for traces that are not recorded.
+
+Recording is sampled per trace (TRACE_SAMPLE_RATIO, default 0.05; an
+incoming sampled flag is honoured). For unsampled traces `span()` only
+reads a context variable. Finished spans are buffered (bounded, oldest
+dropped) and exported in batches by a background task to the exporter
+chosen with TRACE_EXPORTER:
+
+- "none" (default): nothing is recorded,
+- "memory": the last spans kept in process (tests, debugging),
+- "file": JSON lines appended to TRACE_FILE,
+- "otlp": OTLP/HTTP JSON posted to OTEL_EXPORTER_OTLP_ENDPOINT/v1/traces
+  (OpenTelemetry Collector, Jaeger, Tempo, ...).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+NONE = "none"
+MEMORY = "memory"
+FILE = "file"
+OTLP = "otlp"
+
+EXPORTER = os.getenv("TRACE_EXPORTER", NONE)
+SAMPLE_RATIO = float(os.getenv("TRACE_SAMPLE_RATIO", "0.05"))
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "jobdiva-goto-bridge")
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+FLUSH_SECONDS = float(os.getenv("TRACE_FLUSH_SECONDS", "5"))
+MAX_QUEUE = int(os.getenv("TRACE_MAX_QUEUE", "4096"))
+BATCH_SIZE = 512
+
+TRACEPARENT = "traceparent"
+_TRACEPARENT = re.compile(r"00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})")
+
+SERVER = "server"
+CLIENT = "client"
+INTERNAL = "internal"
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    sampled: bool
+    kind: str = INTERNAL
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set(self, key: str, value: Any) -> None:
+        if self.sampled:
+            self.attributes[key] = value
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """(trace_id, parent span id, sampled) from a W3C traceparent header."""
+    if not value:
+        return None
+    match = _TRACEPARENT.fullmatch(value.strip().lower())
+    if match is None or match.group(1) == "0" * 32:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+# --------------------------------------------------------------------------------------
+# Exporters
+# --------------------------------------------------------------------------------------
+
+
+class MemoryExporter:
+    name = MEMORY
+
+    def __init__(self, max_spans: int = 10000) -> None:
+        self.spans: Deque[Span] = deque(maxlen=max_spans)
+
+    async def export(self, spans: List[Span]) -> None:
+        self.spans.extend(spans)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+    async def close(self) -> None:
+        pass
+
+
+class FileExporter:
+    name = FILE
+
+    def __init__(self, path: str = TRACE_FILE) -> None:
+        self.path = path
+
+    def _write(self, lines: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    async def export(self, spans: List[Span]) -> None:
+        lines = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+        await asyncio.to_thread(self._write, lines)
+
+    async def close(self) -> None:
+        pass
+
+
+_OTLP_KINDS = {INTERNAL: 1, SERVER: 2, CLIENT: 3}
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPExporter:
+    """OTLP/HTTP with the JSON encoding; uses its own client, not the upstream pools."""
+
+    name = OTLP
+
+    def __init__(self, endpoint: str = OTLP_ENDPOINT, service_name: str = SERVICE_NAME) -> None:
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _payload(self, spans: List[Span]) -> Dict[str, Any]:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [{
+                    "traceId": span.trace_id,
+                    "spanId": span.span_id,
+                    **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                    "name": span.name,
+                    "kind": _OTLP_KINDS[span.kind],
+                    "startTimeUnixNano": str(span.start_ns),
+                    "endTimeUnixNano": str(span.end_ns),
+                    "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()],
+                    "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+                } for span in spans],
+            }],
+        }]}
+
+    async def export(self, spans: List[Span]) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=10.0)
+        resp = await self._client.post(self.url, json=self._payload(spans))
+        resp.raise_for_status()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def build_exporter(name: str):
+    if name == MEMORY:
+        return MemoryExporter()
+    if name == FILE:
+        return FileExporter()
+    if name == OTLP:
+        return OTLPExporter()
+    return None
+
+
+# --------------------------------------------------------------------------------------
+# Tracer
+# --------------------------------------------------------------------------------------
+
+
+class Tracer:
+    def __init__(self, exporter=None, sample_ratio: float = SAMPLE_RATIO, max_queue: int = MAX_QUEUE) -> None:
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+        self._queue: Deque[Span] = deque(maxlen=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self.recorded = 0
+        self.exported = 0
+        self.dropped = 0
+        self.export_failures = 0
+
+    def configure(self, exporter=None, sample_ratio: Optional[float] = None) -> None:
+        """Swap the exporter / sampling ratio (tests, scripts)."""
+        self.exporter = exporter
+        if sample_ratio is not None:
+            self.sample_ratio = sample_ratio
+
+    def _sample(self) -> bool:
+        return self.exporter is not None and random.random() < self.sample_ratio
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        kind: str = INTERNAL,
+        traceparent: Optional[str] = None,
+        **attributes: Any,
+    ) -> Iterator[Span]:
+        """
+        Time a stage as a child of the current span, or start a trace
+        (continuing `traceparent` when given and valid).
+        """
+        parent = _current.get()
+        remote = parse_traceparent(traceparent) if parent is None else None
+        if parent is not None:
+            if not parent.sampled:
+                yield parent  # unsampled trace: nothing to record
+                return
+            span = Span(name, parent.trace_id, _new_id(64), parent.span_id, True, kind)
+        elif remote is not None:
+            trace_id, parent_id, sampled = remote
+            span = Span(name, trace_id, _new_id(64), parent_id, sampled and self.exporter is not None, kind)
+        else:
+            span = Span(name, _new_id(128), _new_id(64), None, self._sample(), kind)
+
+        if span.sampled:
+            span.attributes.update(attributes)
+        span.start_ns = time.time_ns()
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current.reset(token)
+            if span.sampled:
+                span.end_ns = time.time_ns()
+                self._record(span)
+
+    def _record(self, span: Span) -> None:
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1  # the deque drops the oldest span
+        self._queue.append(span)
+        self.recorded += 1
+
+    async def flush(self) -> None:
+        while self._queue and self.exporter is not None:
+            batch = [self._queue.popleft() for _ in range(min(BATCH_SIZE, len(self._queue)))]
+            try:
+                await self.exporter.export(batch)
+                self.exported += len(batch)
+            except Exception as e:
+                self.export_failures += 1
+                self.dropped += len(batch)
+                logger.warning("Exporting %d spans failed: %s", len(batch), e)
+                return
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_SECONDS)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None and self.exporter is not None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self.exporter is not None:
+            await self.exporter.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "exporter": self.exporter.name if self.exporter is not None else NONE,
+            "sample_ratio": self.sample_ratio,
+            "queued": len(self._queue),
+            "recorded": self.recorded,
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "export_failures": self.export_failures,
+        }
+
+
+tracer = Tracer(build_exporter(EXPORTER))
+span = tracer.span
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def current_traceparent() -> Optional[str]:
+    current = _current.get()
+    return current.traceparent if current is not None else None
+
+
+# --------------------------------------------------------------------------------------
+# Integration
+# --------------------------------------------------------------------------------------
+
+
+class TracingMiddleware:
+    """Root span per HTTP request, named after the matched route template."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        with tracer.span(scope["method"], kind=SERVER, traceparent=traceparent) as root:
+            trace_header = (b"x-trace-id", root.trace_id.encode("ascii"))
+
+            async def send_wrapper(message) -> None:
+                if message["type"] == "http.response.start":
+                    message["headers"] = [*message.get("headers", []), trace_header]
+                    root.set("http.status_code", message["status"])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if root.sampled:
+                    root.name = f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+                    root.set("http.target", scope["path"])
+
+
+async def inject_traceparent(request: httpx.Request) -> None:
+    """httpx request hook: propagate the current trace to upstreams."""
+    current = _current.get()
+    if current is not None:
+        request.headers[TRACEPARENT] = current.traceparent
+
+
+def install_log_correlation() -> None:
+    """Add `trace_id` ("-" outside a trace) to every log record."""
+    factory = logging.getLogRecordFactory()
+    if getattr(factory, "_adds_trace_id", False):
+        return
+
+    def record_factory(*args: Any, **kwargs: Any) -> logging.LogRecord:
+        record = factory(*args, **kwargs)
+        current = _current.get()
+        record.trace_id = current.trace_id if current is not None else "-"
+        return record
+
+    record_factory._adds_trace_id = True  # type: ignore[attr-defined]
+    logging.setLogRecordFactory(record_factory)
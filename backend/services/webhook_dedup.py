@@ -0,0 +1,161 @@
+# backend/services/webhook_dedup.py
+"""
+Idempotency records for GoTo webhook events.
+
+GoTo redelivers webhooks on timeouts. Each event is keyed on
+(event type, message_id | call_id, status) and claimed in the
+`webhook_dedup` collection (the key is the document `_id`, so Mongo's
+unique `_id` index enforces one claim). Records expire through a TTL index
+after WEBHOOK_DEDUP_TTL_SECONDS (default 7 days).
+
+A redelivery of a completed event short-circuits before any JobDiva call
+and returns the original `interaction_log_id`. A claim left behind by a
+crashed worker is taken over once it is older than
+WEBHOOK_DEDUP_CLAIM_SECONDS (default 120).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError
+
+from models.bridge_models import GoToCallEvent, GoToMessageEvent
+from services import indexes
+
+logger = logging.getLogger(__name__)
+
+TTL_SECONDS = int(os.getenv("WEBHOOK_DEDUP_TTL_SECONDS", str(7 * 24 * 3600)))
+CLAIM_SECONDS = float(os.getenv("WEBHOOK_DEDUP_CLAIM_SECONDS", "120"))
+
+PROCESSING = "processing"
+DONE = "done"
+
+indexes.register(
+    "webhook_dedup",
+    IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=TTL_SECONDS),
+)
+
+
+def message_key(event: GoToMessageEvent) -> str:
+    return f"message:{event.message_id}:{event.status}"
+
+
+def call_key(event: GoToCallEvent) -> str:
+    return f"call:{event.call_id}:{event.call_result}"
+
+
+@dataclass
+class Claim:
+    acquired: bool
+    interaction_log_id: Optional[str] = None
+
+
+class DedupCounters:
+    def __init__(self) -> None:
+        self.claims = 0
+        self.suppressed: Dict[str, int] = {}
+        self.takeovers = 0
+
+    def suppress(self, key: str) -> None:
+        kind = key.split(":", 1)[0]
+        self.suppressed[kind] = self.suppressed.get(kind, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "claims": self.claims,
+            "suppressed": dict(self.suppressed),
+            "suppressed_total": sum(self.suppressed.values()),
+            "stale_claims_taken_over": self.takeovers,
+        }
+
+
+counters = DedupCounters()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def _record_duplicate(db: AsyncIOMotorDatabase, key: str) -> Optional[dict]:
+    counters.suppress(key)
+    return await db.webhook_dedup.find_one_and_update(
+        {"_id": key},
+        {"$inc": {"duplicates": 1}, "$set": {"last_duplicate_at": _now()}},
+    )
+
+
+async def find_completed(db: AsyncIOMotorDatabase, key: str) -> Optional[str]:
+    """
+    Cheap pre-check used by the webhook routes: if the event was already
+    processed, count the duplicate and return the original log id.
+    """
+    record = await db.webhook_dedup.find_one({"_id": key, "state": DONE}, {"interaction_log_id": 1})
+    if record is None:
+        return None
+    await _record_duplicate(db, key)
+    return record.get("interaction_log_id")
+
+
+async def claim(db: AsyncIOMotorDatabase, key: str) -> Claim:
+    """Claim an event for processing, or report the earlier delivery."""
+    now = _now()
+    try:
+        await db.webhook_dedup.insert_one({
+            "_id": key,
+            "state": PROCESSING,
+            "created_at": now,
+            "claimed_at": now,
+            "interaction_log_id": None,
+            "duplicates": 0,
+        })
+        counters.claims += 1
+        return Claim(acquired=True)
+    except DuplicateKeyError:
+        pass
+
+    # Take over a claim abandoned by a crashed worker
+    stale = await db.webhook_dedup.find_one_and_update(
+        {"_id": key, "state": PROCESSING, "claimed_at": {"$lte": now - timedelta(seconds=CLAIM_SECONDS)}},
+        {"$set": {"claimed_at": now}},
+    )
+    if stale is not None:
+        counters.takeovers += 1
+        logger.warning("Taking over stale webhook claim %s", key)
+        return Claim(acquired=True)
+
+    record = await _record_duplicate(db, key)
+    logger.info("Suppressed duplicate webhook %s", key)
+    return Claim(acquired=False, interaction_log_id=record.get("interaction_log_id") if record else None)
+
+
+async def complete(db: AsyncIOMotorDatabase, key: str, interaction_log_id: Optional[str]) -> None:
+    await db.webhook_dedup.update_one(
+        {"_id": key},
+        {"$set": {"state": DONE, "interaction_log_id": interaction_log_id, "completed_at": _now()}},
+    )
+
+
+async def release(db: AsyncIOMotorDatabase, key: str) -> None:
+    """Drop a claim after a failed attempt so a retry can process the event."""
+    await db.webhook_dedup.delete_one({"_id": key, "state": PROCESSING})
+
+
+async def dedup_stats(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+    """In-process counters plus duplicates recorded within the TTL window."""
+    recorded = 0
+    async for row in db.webhook_dedup.aggregate([
+        {"$group": {"_id": None, "duplicates": {"$sum": "$duplicates"}}},
+    ]):
+        recorded = row["duplicates"]
+    return {
+        **counters.snapshot(),
+        "suppressed_in_ttl_window": recorded,
+        "ttl_seconds": TTL_SECONDS,
+    }
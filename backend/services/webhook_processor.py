@@ -0,0 +1,408 @@
+# backend/services/webhook_processor.py
+"""
+Processing of GoTo webhook events.
+
+Shared by the webhook routes (synchronous mode) and the webhook worker pool
+(asynchronous mode, see webhook_queue.py). Each function returns the id of
+the interaction log it created or updated.
+
+Redeliveries of the same event are suppressed by webhook_dedup.py before any
+JobDiva call and return the original interaction log id.
+
+While the JobDiva circuit breaker is open the interaction is still logged,
+with its note marked pending for note_backfill.py to write later.
+
+Every log written here is also counted in the per-recruiter activity
+rollups (activity_rollups.py) and published to the admin live feed
+(log_feed.py). Each stage runs in a tracing span (tracing.py).
+
+Events go through three stages, with independent I/O run concurrently:
+
+1. Lookup: the recruiter mapping and the JobDiva candidate are looked up
+   together.
+2. Write: the interaction log is written with its note marked pending
+   while the JobDiva note is being created. Call events are merged into
+   one log per call instead (call_sessions.py), and the note is only
+   written when the call completes.
+3. Settle: the note outcome is patched into the log. If the process dies
+   before that, the pending note is picked up by note_backfill.py
+   (which may write it a second time).
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from models.bridge_models import GoToMessageEvent, GoToCallEvent
+from models.mapping_models import InteractionLog
+from services import activity_rollups, call_sessions, tracing, webhook_dedup
+from services.circuit_breaker import CircuitOpenError
+from services.jobdiva_service import jobdiva_service
+from services.log_feed import log_feed
+from services.mapping_index import mapping_index
+from services.note_backfill import DELAY_SECONDS as BACKFILL_DELAY_SECONDS, pending_note_fields, settle_note
+from services.note_batcher import note_batcher
+from utils.phone_utils import normalize_phone_e164
+
+logger = logging.getLogger(__name__)
+
+
+def _pending_fields(note_text: str, batched: bool) -> dict:
+    # A batched note is normally written by the batcher; backfill only picks
+    # it up if the flush never settles it.
+    delay = note_batcher.window_seconds + BACKFILL_DELAY_SECONDS if batched else None
+    return pending_note_fields(note_text, delay)
+
+
+# --------------------------------------------------------------------------------------
+# Stages
+# --------------------------------------------------------------------------------------
+
+
+async def _lookup_participants(
+    db: AsyncIOMotorDatabase, recruiter_phone: str, candidate_phone: str
+) -> Tuple[Optional[dict], Optional[dict], bool]:
+    """
+    Stage 1: recruiter mapping and JobDiva candidate, looked up concurrently.
+    Returns (mapping, candidate, jobdiva_unavailable).
+    """
+    async def find_mapping() -> Optional[dict]:
+        with tracing.span("mapping.lookup"):
+            return await mapping_index.find_by_phone(db, recruiter_phone)
+
+    async def find_candidate() -> Tuple[Optional[dict], bool]:
+        try:
+            with tracing.span("jobdiva.find_candidate"):
+                return await jobdiva_service.find_candidate_by_phone(candidate_phone), False
+        except CircuitOpenError as e:
+            # JobDiva is down: log now, resolve the candidate during note backfill
+            logger.warning(f"Candidate lookup skipped for {candidate_phone}: {e}")
+            return None, True
+
+    mapping, (candidate, jobdiva_unavailable) = await asyncio.gather(find_mapping(), find_candidate())
+    if not candidate and not jobdiva_unavailable:
+        logger.warning(f"No candidate found for phone {candidate_phone}")
+    return mapping, candidate, jobdiva_unavailable
+
+
+async def _create_note(candidate_id: str, note_text: str) -> Optional[Dict[str, Any]]:
+    """
+    Write one JobDiva note. Returns the log fields recording the outcome,
+    or None when the note stays pending for backfill (breaker open).
+    """
+    try:
+        with tracing.span("jobdiva.create_note"):
+            note_result = await jobdiva_service.create_candidate_note(
+                candidate_id=candidate_id,
+                note_text=note_text
+            )
+    except CircuitOpenError as e:
+        logger.warning(f"JobDiva note deferred for backfill: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"Failed to create JobDiva note: {e}")
+        return {"jobdiva_note_created": False, "jobdiva_note_error": str(e)}
+    return {"jobdiva_note_created": note_result["success"], "jobdiva_note_id": note_result.get("note_id")}
+
+
+async def _write_with_note(
+    write_log: Callable[[], Awaitable[None]], candidate_id: Optional[str], note_text: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Stage 2: write the log while the note is created (no note without a
+    candidate id). Returns the note outcome from `_create_note`.
+    """
+    if not candidate_id:
+        await write_log()
+        return None
+
+    written, outcome = await asyncio.gather(
+        write_log(), _create_note(candidate_id, note_text), return_exceptions=True
+    )
+    for result in (written, outcome):
+        if isinstance(result, BaseException):
+            raise result
+    return outcome
+
+
+async def _settle_note(db: AsyncIOMotorDatabase, log: Dict[str, Any], outcome: Dict[str, Any]) -> None:
+    """
+    Stage 3: patch the note outcome into the log written in stage 2. A
+    failure leaves the note pending rather than failing the event (a retry
+    would log the interaction twice).
+    """
+    try:
+        with tracing.span("log.settle_note"):
+            await settle_note(db, log["id"], outcome)
+    except Exception as e:
+        logger.error(f"Failed to record JobDiva note outcome for log {log['id']}: {e}")
+        return
+    log_feed.publish_update({**log, **outcome, "jobdiva_note_pending": False})
+
+
+async def _deduplicated(db: AsyncIOMotorDatabase, key: str, process) -> str:
+    with tracing.span("webhook.dedup_claim"):
+        claim = await webhook_dedup.claim(db, key)
+    if not claim.acquired:
+        return claim.interaction_log_id
+
+    try:
+        interaction_log_id = await process()
+    except Exception:
+        await webhook_dedup.release(db, key)
+        raise
+
+    with tracing.span("webhook.dedup_complete"):
+        await webhook_dedup.complete(db, key, interaction_log_id)
+    return interaction_log_id
+
+
+async def process_message_event(db: AsyncIOMotorDatabase, event: GoToMessageEvent) -> str:
+    """Process an SMS event once per (message_id, status)."""
+    return await _deduplicated(
+        db, webhook_dedup.message_key(event), lambda: _process_message_event(db, event)
+    )
+
+
+async def process_call_event(db: AsyncIOMotorDatabase, event: GoToCallEvent) -> str:
+    """Process a call event once per (call_id, call_result)."""
+    return await _deduplicated(
+        db, webhook_dedup.call_key(event), lambda: _process_call_event(db, event)
+    )
+
+
+async def _process_message_event(db: AsyncIOMotorDatabase, event: GoToMessageEvent) -> str:
+    """
+    Process an incoming/outbound SMS event from GoTo Connect.
+
+    Flow:
+    1. Normalize phone numbers and determine participants
+    2. Look up the recruiter mapping and the candidate (concurrently)
+    3. Log the interaction while the JobDiva note is created
+    4. Record the note outcome on the log
+    """
+    # Normalize phone numbers
+    from_phone = normalize_phone_e164(event.from_number)
+    to_phone = normalize_phone_e164(event.to_number)
+
+    logger.info(f"Processing SMS webhook: {event.direction} from {from_phone} to {to_phone}")
+
+    # Inbound: from candidate to recruiter
+    # Outbound: from recruiter to candidate (delivery status update)
+    if event.direction == "inbound":
+        candidate_phone, recruiter_phone = from_phone, to_phone
+    else:
+        candidate_phone, recruiter_phone = to_phone, from_phone
+
+    recruiter_mapping, candidate, jobdiva_unavailable = await _lookup_participants(
+        db, recruiter_phone, candidate_phone
+    )
+
+    recruiter_name = recruiter_mapping["jobdiva_user_name"] if recruiter_mapping else "Unknown Recruiter"
+    recruiter_id = recruiter_mapping["jobdiva_user_id"] if recruiter_mapping else None
+    candidate_id = candidate["candidate_id"] if candidate else None
+    candidate_name = candidate["candidate_name"] if candidate else "Unknown Candidate"
+
+    # Candidate note for JobDiva
+    if event.direction == "inbound":
+        note_text = (
+            f"[GoTo][SMS][Inbound] Candidate: {from_phone} → Recruiter: {recruiter_name} ({to_phone})\n"
+            f"Message: \"{event.body}\"\n"
+            f"Received: {event.timestamp}"
+        )
+    else:
+        note_text = (
+            f"[GoTo][SMS][Outbound Status] Recruiter: {recruiter_name} ({from_phone}) → Candidate: {to_phone}\n"
+            f"Status: {event.status}\n"
+            f"Updated: {event.timestamp}"
+        )
+
+    # With batching enabled the note is buffered after the log is written;
+    # otherwise it is written alongside the log and settled afterwards
+    note_batched = bool(candidate_id) and note_batcher.enabled
+    note_pending = bool(candidate_id) or jobdiva_unavailable
+
+    interaction_log = InteractionLog(
+        interaction_type="sms",
+        direction=event.direction,
+        candidate_id=candidate_id,
+        candidate_name=candidate_name,
+        candidate_phone=candidate_phone,
+        recruiter_id=recruiter_id,
+        recruiter_name=recruiter_name,
+        recruiter_phone=recruiter_phone,
+        goto_message_id=event.message_id,
+        message_body=event.body,
+        status=event.status,
+        jobdiva_note_pending=note_pending
+    )
+
+    log_dict = interaction_log.model_dump()
+    if note_pending:
+        log_dict.update(_pending_fields(note_text, note_batched))
+
+    async def write_log() -> None:
+        with tracing.span("log.insert"):
+            await db.interaction_logs.insert_one(log_dict)
+            await activity_rollups.record(db, log_dict)
+        log_feed.publish_insert(log_dict)
+
+    note_outcome = await _write_with_note(write_log, None if note_batched else candidate_id, note_text)
+    if note_outcome is not None:
+        await _settle_note(db, log_dict, note_outcome)
+
+    if note_batched:
+        with tracing.span("jobdiva.batch_note"):
+            await note_batcher.submit(candidate_id, note_text, interaction_log.id)
+
+    return interaction_log.id
+
+
+def _call_note_text(
+    direction: str, from_phone: str, to_phone: str, recruiter_name: str,
+    call_result: Optional[str], duration: Optional[int], start_time: str,
+) -> str:
+    # Format duration
+    duration_str = f"{duration} seconds" if duration else "N/A"
+
+    if direction == "outbound":
+        return (
+            f"[GoTo][Call][Outbound] Recruiter: {recruiter_name} ({from_phone}) → Candidate: {to_phone}\n"
+            f"Result: {call_result} | Duration: {duration_str}\n"
+            f"Time: {start_time}"
+        )
+    return (
+        f"[GoTo][Call][Inbound] Candidate: {from_phone} → Recruiter: {recruiter_name} ({to_phone})\n"
+        f"Result: {call_result} | Duration: {duration_str}\n"
+        f"Time: {start_time}"
+    )
+
+
+async def _process_call_event(db: AsyncIOMotorDatabase, event: GoToCallEvent) -> str:
+    """
+    Process a call event from GoTo Connect.
+
+    Flow:
+    1. Normalize phone numbers and determine participants
+    2. Look up the recruiter mapping and the candidate (concurrently)
+    3. Merge the event into the call's log (call_sessions.py, one atomic upsert)
+    4. When the event completed the call, write the JobDiva note and record
+       its outcome on the log
+    """
+    # Normalize phone numbers
+    from_phone = normalize_phone_e164(event.from_number)
+    to_phone = normalize_phone_e164(event.to_number)
+
+    logger.info(f"Processing call webhook: {event.direction} {event.call_result} from {from_phone} to {to_phone}")
+
+    if event.direction == "outbound":
+        candidate_phone, recruiter_phone = to_phone, from_phone
+    else:
+        candidate_phone, recruiter_phone = from_phone, to_phone
+
+    recruiter_mapping, candidate, jobdiva_unavailable = await _lookup_participants(
+        db, recruiter_phone, candidate_phone
+    )
+
+    recruiter_name = recruiter_mapping["jobdiva_user_name"] if recruiter_mapping else "Unknown Recruiter"
+    recruiter_id = recruiter_mapping["jobdiva_user_id"] if recruiter_mapping else None
+    candidate_id = candidate["candidate_id"] if candidate else None
+    candidate_name = candidate["candidate_name"] if candidate else "Unknown Candidate"
+
+    state, call_result = call_sessions.event_state(event)
+    terminal = state == call_sessions.COMPLETED
+
+    # The note is only written when the call completes. Until the outcome is
+    # settled it is marked pending in the same update that completes the call
+    # (with the event's text; replaced below when the note is left to the
+    # batcher or backfill)
+    note_batched = terminal and bool(candidate_id) and note_batcher.enabled
+    note_pending = terminal and (bool(candidate_id) or jobdiva_unavailable)
+    pending_fields = {}
+    if note_pending:
+        pending_text = _call_note_text(
+            event.direction, from_phone, to_phone, recruiter_name,
+            event.call_result, event.duration, event.start_time,
+        )
+        pending_fields = _pending_fields(pending_text, note_batched)
+
+    new_log = InteractionLog(
+        interaction_type="call",
+        direction=event.direction,
+        candidate_id=candidate_id,
+        candidate_name=candidate_name,
+        candidate_phone=candidate_phone,
+        recruiter_id=recruiter_id,
+        recruiter_name=recruiter_name,
+        recruiter_phone=recruiter_phone,
+        goto_call_id=event.call_id,
+        goto_session_id=event.session_id,
+        call_duration=event.duration,
+        call_result=call_result,
+        status=state,
+    ).model_dump()
+
+    with tracing.span("log.upsert_call", state=state):
+        transition = await call_sessions.apply_event(db, event, new_log, pending_fields)
+    log_dict = transition.log
+    if not transition.applied:
+        # Out of order: the call already moved past this event
+        return log_dict["id"]
+
+    if transition.created:
+        await activity_rollups.record(db, log_dict)
+        log_feed.publish_insert(log_dict)
+    else:
+        await activity_rollups.record_change(db, transition.before, {
+            key: log_dict.get(key) for key in ("status", "call_result", "call_duration")
+        })
+        log_feed.publish_update(log_dict)
+
+    if not note_pending:
+        return log_dict["id"]
+
+    # The note describes the whole call, not just the event that ended it
+    note_text = _call_note_text(
+        event.direction, from_phone, to_phone, recruiter_name,
+        log_dict.get("call_result") or event.call_result, log_dict.get("call_duration"), event.start_time,
+    )
+    note_candidate_id = log_dict.get("candidate_id") or candidate_id
+
+    async def store_note_text() -> None:
+        # The pending text was written with the event; backfill needs the merged one
+        if note_text == pending_text:
+            return
+        with tracing.span("log.update_note_text"):
+            await db.interaction_logs.update_one(
+                {"id": log_dict["id"], "jobdiva_note_pending": True},
+                {"$set": {"jobdiva_note_text": note_text}},
+            )
+
+    if note_batched:
+        await store_note_text()
+        with tracing.span("jobdiva.batch_note"):
+            await note_batcher.submit(note_candidate_id, note_text, log_dict["id"])
+        return log_dict["id"]
+
+    if not note_candidate_id:
+        # JobDiva is down: note_backfill.py resolves the candidate later
+        await store_note_text()
+        return log_dict["id"]
+
+    note_outcome = await _create_note(note_candidate_id, note_text)
+    if note_outcome is None:
+        await store_note_text()
+    else:
+        before = transition.before or {}
+        # Keep the note written when the call was started if this one failed
+        note_outcome["jobdiva_note_created"] = (
+            note_outcome["jobdiva_note_created"] or before.get("jobdiva_note_created", False)
+        )
+        note_outcome["jobdiva_note_id"] = note_outcome.get("jobdiva_note_id") or before.get("jobdiva_note_id")
+        if not log_dict.get("candidate_id"):
+            # The log was created while the candidate was unknown
+            note_outcome.update(candidate_id=note_candidate_id, candidate_name=candidate_name)
+        await _settle_note(db, log_dict, note_outcome)
+    return log_dict["id"]
@@ -0,0 +1,383 @@
+# backend/services/webhook_queue.py
+"""
+Durable Mongo-backed queue for GoTo webhook events.
+
+Webhook routes persist the raw event with `enqueue()` and return 202
+immediately; a pool of asyncio workers drains the queue and runs the
+processors in webhook_processor.py.
+
+- Claiming is a single `find_one_and_update`, so several workers (and
+  several replicas) can drain the same queue.
+- A claimed event holds a lease, renewed while it is processed; if the
+  worker crashes the lease expires and another worker picks the event up
+  again.
+- Failed events are retried with backoff and moved to the
+  `webhook_dead_letters` collection after WEBHOOK_MAX_ATTEMPTS.
+
+Configured with env vars:
+- WEBHOOK_INGEST_MODE        "async" (default) or "sync" to process inline
+- WEBHOOK_WORKERS            worker tasks per process (default 4)
+- WEBHOOK_LEASE_SECONDS      visibility timeout of a claimed event (default 60)
+- WEBHOOK_MAX_ATTEMPTS       attempts before dead-lettering (default 5)
+- WEBHOOK_POLL_SECONDS       idle poll interval (default 1)
+- WEBHOOK_QUEUE_RETENTION_SECONDS  how long completed events are kept (default 86400)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import BaseModel
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+
+from models.bridge_models import GoToCallEvent, GoToMessageEvent
+from services import indexes, tracing
+from services.webhook_processor import process_call_event, process_message_event
+
+logger = logging.getLogger(__name__)
+
+INGEST_MODE = os.getenv("WEBHOOK_INGEST_MODE", "async").lower()
+WORKERS = int(os.getenv("WEBHOOK_WORKERS", "4"))
+LEASE_SECONDS = float(os.getenv("WEBHOOK_LEASE_SECONDS", "60"))
+MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "5"))
+POLL_SECONDS = float(os.getenv("WEBHOOK_POLL_SECONDS", "1"))
+RETENTION_SECONDS = int(os.getenv("WEBHOOK_QUEUE_RETENTION_SECONDS", "86400"))
+
+PENDING = "pending"
+PROCESSING = "processing"
+DONE = "done"
+
+MESSAGE = "message"
+CALL = "call"
+
+# kind -> (event model, processor)
+Handler = Callable[[AsyncIOMotorDatabase, Any], Awaitable[str]]
+HANDLERS: Dict[str, Tuple[Type[BaseModel], Handler]] = {
+    MESSAGE: (GoToMessageEvent, process_message_event),
+    CALL: (GoToCallEvent, process_call_event),
+}
+
+indexes.register(
+    "webhook_queue",
+    IndexModel([("status", ASCENDING), ("available_at", ASCENDING)], name="status_available_at"),
+    IndexModel([("status", ASCENDING), ("lease_expires_at", ASCENDING)], name="status_lease_expires_at"),
+    IndexModel(
+        [("completed_at", ASCENDING)],
+        name="completed_at_ttl",
+        expireAfterSeconds=RETENTION_SECONDS,
+    ),
+)
+indexes.register(
+    "webhook_dead_letters",
+    IndexModel([("failed_at", ASCENDING)], name="failed_at"),
+)
+
+
+def async_ingest_enabled() -> bool:
+    return INGEST_MODE != "sync"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Motor returns naive datetimes (UTC) unless the client is tz_aware
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _backoff(attempts: int) -> float:
+    return min(2 ** attempts, 300)
+
+
+# --------------------------------------------------------------------------------------
+# Queue operations
+# --------------------------------------------------------------------------------------
+
+
+async def enqueue(db: AsyncIOMotorDatabase, kind: str, payload: Dict[str, Any]) -> str:
+    """Persist a raw webhook event and wake a local worker. Returns the queue id."""
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown webhook kind: {kind}")
+
+    now = _now()
+    queue_id = str(uuid.uuid4())
+    await db.webhook_queue.insert_one({
+        "_id": queue_id,
+        "kind": kind,
+        "payload": payload,
+        # Lets the worker continue the request's trace (see tracing.py)
+        "traceparent": tracing.current_traceparent(),
+        "status": PENDING,
+        "attempts": 0,
+        "enqueued_at": now,
+        "available_at": now,
+        "lease_expires_at": None,
+        "last_error": None,
+    })
+    worker_pool.wake()
+    return queue_id
+
+
+async def claim(db: AsyncIOMotorDatabase, worker_id: str) -> Optional[dict]:
+    """Atomically lease the oldest available event, or return None."""
+    now = _now()
+    return await db.webhook_queue.find_one_and_update(
+        {"$or": [
+            {"status": PENDING, "available_at": {"$lte": now}},
+            {"status": PROCESSING, "lease_expires_at": {"$lte": now}},
+        ]},
+        {
+            "$set": {
+                "status": PROCESSING,
+                "worker_id": worker_id,
+                "claimed_at": now,
+                "lease_expires_at": now + timedelta(seconds=LEASE_SECONDS),
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("enqueued_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _renew_lease(db: AsyncIOMotorDatabase, item: dict) -> bool:
+    """Extend the lease of an event this worker still holds. Returns False if it was lost."""
+    result = await db.webhook_queue.update_one(
+        {"_id": item["_id"], "worker_id": item["worker_id"], "status": PROCESSING},
+        {"$set": {"lease_expires_at": _now() + timedelta(seconds=LEASE_SECONDS)}},
+    )
+    return result.matched_count > 0
+
+
+async def _keep_leased(db: AsyncIOMotorDatabase, item: dict) -> None:
+    # Renews well before expiry, so a slow event is not claimed by a second worker
+    while True:
+        await asyncio.sleep(LEASE_SECONDS / 3)
+        try:
+            if not await _renew_lease(db, item):
+                logger.warning("Webhook %s lease was taken over by another worker", item["_id"])
+                return
+        except Exception as e:
+            logger.error("Failed to renew lease of webhook %s: %s", item["_id"], e)
+
+
+async def _complete(db: AsyncIOMotorDatabase, item: dict, interaction_log_id: Optional[str]) -> None:
+    await db.webhook_queue.update_one(
+        {"_id": item["_id"], "worker_id": item["worker_id"]},
+        {"$set": {
+            "status": DONE,
+            "completed_at": _now(),
+            "lease_expires_at": None,
+            "interaction_log_id": interaction_log_id,
+        }},
+    )
+
+
+async def _fail(db: AsyncIOMotorDatabase, item: dict, error: str) -> bool:
+    """Schedule a retry, or dead-letter the event. Returns True if dead-lettered."""
+    if item["attempts"] >= MAX_ATTEMPTS:
+        # Only while this worker still holds the lease: after a takeover the
+        # event belongs to the other worker
+        result = await db.webhook_queue.delete_one({"_id": item["_id"], "worker_id": item["worker_id"]})
+        if not result.deleted_count:
+            logger.warning("Webhook %s lease was taken over by another worker; not dead-lettered", item["_id"])
+            return False
+        dead = {**item, "status": "dead", "last_error": error, "failed_at": _now()}
+        await db.webhook_dead_letters.replace_one({"_id": item["_id"]}, dead, upsert=True)
+        return True
+
+    await db.webhook_queue.update_one(
+        {"_id": item["_id"], "worker_id": item["worker_id"]},
+        {"$set": {
+            "status": PENDING,
+            "available_at": _now() + timedelta(seconds=_backoff(item["attempts"])),
+            "lease_expires_at": None,
+            "last_error": error,
+        }},
+    )
+    return False
+
+
+async def replay_dead_letter(db: AsyncIOMotorDatabase, queue_id: str) -> bool:
+    """Move a dead-lettered event back onto the queue with a fresh attempt count."""
+    dead = await db.webhook_dead_letters.find_one({"_id": queue_id})
+    if not dead:
+        return False
+
+    now = _now()
+    await db.webhook_queue.replace_one(
+        {"_id": queue_id},
+        {
+            "_id": queue_id,
+            "kind": dead["kind"],
+            "payload": dead["payload"],
+            "traceparent": dead.get("traceparent"),
+            "status": PENDING,
+            "attempts": 0,
+            "enqueued_at": now,
+            "available_at": now,
+            "lease_expires_at": None,
+            "last_error": dead.get("last_error"),
+            "replayed_at": now,
+        },
+        upsert=True,
+    )
+    await db.webhook_dead_letters.delete_one({"_id": queue_id})
+    worker_pool.wake()
+    return True
+
+
+async def list_dead_letters(db: AsyncIOMotorDatabase, limit: int = 100) -> List[dict]:
+    docs = await db.webhook_dead_letters.find({}).sort("failed_at", -1).limit(limit).to_list(limit)
+    for doc in docs:
+        doc["id"] = doc.pop("_id")
+    return docs
+
+
+async def queue_stats(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+    """Queue depth, in-flight count, processing lag and worker counters."""
+    pending = await db.webhook_queue.count_documents({"status": PENDING})
+    processing = await db.webhook_queue.count_documents({"status": PROCESSING})
+    dead_letters = await db.webhook_dead_letters.count_documents({})
+
+    lag_seconds = 0.0
+    oldest = await db.webhook_queue.find_one(
+        {"status": {"$in": [PENDING, PROCESSING]}},
+        {"enqueued_at": 1},
+        sort=[("enqueued_at", ASCENDING)],
+    )
+    if oldest:
+        lag_seconds = (_now() - _as_utc(oldest["enqueued_at"])).total_seconds()
+
+    return {
+        "mode": "async" if async_ingest_enabled() else "sync",
+        "pending": pending,
+        "processing": processing,
+        "dead_letters": dead_letters,
+        "oldest_unprocessed_lag_seconds": round(lag_seconds, 3),
+        **worker_pool.stats(),
+    }
+
+
+# --------------------------------------------------------------------------------------
+# Worker pool
+# --------------------------------------------------------------------------------------
+
+
+class WebhookWorkerPool:
+    def __init__(self, concurrency: int = WORKERS, poll_interval: float = POLL_SECONDS) -> None:
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self.processed = 0
+        self.failed = 0
+        self.dead_lettered = 0
+        self.total_processing_seconds = 0.0
+
+    def wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _idle(self) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _process(self, db: AsyncIOMotorDatabase, item: dict) -> None:
+        started = asyncio.get_running_loop().time()
+        lease = asyncio.create_task(_keep_leased(db, item))
+        try:
+            model, processor = HANDLERS[item["kind"]]
+            with tracing.span(f"webhook.process.{item['kind']}", traceparent=item.get("traceparent")) as span:
+                span.set("queue_id", item["_id"])
+                span.set("attempt", item["attempts"])
+                interaction_log_id = await processor(db, model(**item["payload"]))
+        except Exception as e:
+            self.failed += 1
+            logger.error(
+                "Webhook %s (%s) failed on attempt %s: %s",
+                item["_id"], item["kind"], item["attempts"], e,
+            )
+            if await _fail(db, item, str(e)):
+                self.dead_lettered += 1
+                logger.error("Webhook %s moved to dead-letter queue", item["_id"])
+            return
+        finally:
+            lease.cancel()
+
+        await _complete(db, item, interaction_log_id)
+        self.processed += 1
+        self.total_processing_seconds += asyncio.get_running_loop().time() - started
+
+    async def _run(self, db: AsyncIOMotorDatabase, worker_id: str) -> None:
+        while not self._stopping:
+            try:
+                item = await claim(db, worker_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Webhook worker %s failed to claim: %s", worker_id, e)
+                item = None
+
+            if item is None:
+                await self._idle()
+                continue
+
+            try:
+                await self._process(db, item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # e.g. Mongo unavailable while completing the event; its lease
+                # expires and it is claimed again
+                logger.error("Webhook worker %s failed on %s: %s", worker_id, item["_id"], e)
+
+    async def start(self, db: AsyncIOMotorDatabase) -> None:
+        if self._tasks or not async_ingest_enabled():
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        prefix = uuid.uuid4().hex[:8]
+        self._tasks = [
+            asyncio.create_task(self._run(db, f"{prefix}-{n}"))
+            for n in range(self.concurrency)
+        ]
+        logger.info("Started %d webhook workers", self.concurrency)
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Let in-flight events finish (up to `timeout`), then cancel workers."""
+        if not self._tasks:
+            return
+        self._stopping = True
+        self.wake()
+        _, still_running = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in still_running:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Stopped webhook workers")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._tasks),
+            "processed": self.processed,
+            "failed": self.failed,
+            "dead_lettered": self.dead_lettered,
+            "avg_processing_ms": round(
+                self.total_processing_seconds / self.processed * 1000, 3
+            ) if self.processed else 0.0,
+        }
+
+
+worker_pool = WebhookWorkerPool()
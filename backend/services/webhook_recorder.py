@@ -0,0 +1,209 @@
+# backend/services/webhook_recorder.py
+"""
+Records incoming GoTo webhook payloads with their arrival times, so real
+traffic (e.g. a Monday-morning SMS burst) can be replayed offline with
+`python -m benchmarks.loadtest.replay`.
+
+Recording is off by default. Turn it on for a whole run with
+WEBHOOK_RECORD=true, or for a while on one worker with
+POST /api/admin/webhooks/recording/start (and .../stop). Events are recorded
+as they arrive, before deduplication, so redeliveries are captured too.
+
+The route handlers only append to an in-memory buffer (bounded; events
+are counted as dropped when it is full). A background task writes the
+buffer every second to WEBHOOK_RECORD_DIR (default "recordings"), one file
+per recording and process:
+
+    webhook-recording-<UTC start>-<pid>.jsonl.gz
+
+The format is gzip-compressed JSON lines. Each flush appends a gzip
+member, so a recording can be read while it is still running (up to the
+last flush). The first line is a header, and every other line is one
+event:
+
+    {"format": "webhook-recording", "version": 1, "started_at": "...", "pid": 123}
+    [1760689200123, "message", {"message_id": "...", "from_number": "...", ...}]
+
+The first field is the arrival time in epoch milliseconds, the second the
+kind ("message" or "call"), the third the payload as received. SMS bodies
+are replaced by "x" characters of the same length unless
+WEBHOOK_RECORD_REDACT=false. Phone numbers are kept because a replay needs
+them to keep per-conversation ordering and to match recruiter mappings.
+Recording stops after WEBHOOK_RECORD_MAX_EVENTS events.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import heapq
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+FORMAT = "webhook-recording"
+VERSION = 1
+
+RECORD_ON_START = os.getenv("WEBHOOK_RECORD", "false").lower() in ("1", "true", "yes")
+RECORD_DIR = os.getenv("WEBHOOK_RECORD_DIR", "recordings")
+REDACT = os.getenv("WEBHOOK_RECORD_REDACT", "true").lower() in ("1", "true", "yes")
+MAX_EVENTS = int(os.getenv("WEBHOOK_RECORD_MAX_EVENTS", "1000000"))
+BUFFER_SIZE = int(os.getenv("WEBHOOK_RECORD_BUFFER", "50000"))
+FLUSH_SECONDS = 1.0
+
+# (arrival epoch ms, kind, payload)
+Event = Tuple[int, str, Dict[str, Any]]
+
+
+def _redact(payload: Dict[str, Any]) -> Dict[str, Any]:
+    body = payload.get("body")
+    if isinstance(body, str):
+        return {**payload, "body": "x" * len(body)}
+    return payload
+
+
+def _encode(event: Event) -> str:
+    return json.dumps(event, separators=(",", ":"), default=str)
+
+
+class WebhookRecorder:
+    def __init__(
+        self,
+        directory: str = RECORD_DIR,
+        redact: bool = REDACT,
+        max_events: int = MAX_EVENTS,
+        buffer_size: int = BUFFER_SIZE,
+    ) -> None:
+        self.directory = directory
+        self.redact = redact
+        self.max_events = max_events
+        self._buffer: Deque[Event] = deque()
+        self._buffer_size = buffer_size
+        self._task: Optional[asyncio.Task] = None
+        self._header: Optional[str] = None
+        self.path: Optional[Path] = None
+        self.recording = False
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+
+    def record(self, kind: str, event: BaseModel) -> None:
+        """Buffer one incoming webhook (no-op unless recording)."""
+        if not self.recording:
+            return
+        if self.recorded >= self.max_events:
+            logger.warning("Webhook recording reached %d events; stopping", self.max_events)
+            self.recording = False
+            return
+        if len(self._buffer) >= self._buffer_size:
+            self.dropped += 1
+            return
+        payload = event.model_dump()
+        if self.redact:
+            payload = _redact(payload)
+        self._buffer.append((time.time_ns() // 1_000_000, kind, payload))
+        self.recorded += 1
+
+    def _write(self, path: Path, header: Optional[str], lines: List[str]) -> None:
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            if header is not None:
+                f.write(header + "\n")
+            f.writelines(lines)
+
+    async def flush(self) -> None:
+        if self.path is None or (not self._buffer and self._header is None):
+            return
+        lines = [_encode(self._buffer.popleft()) + "\n" for _ in range(len(self._buffer))]
+        header, self._header = self._header, None
+        try:
+            await asyncio.to_thread(self._write, self.path, header, lines)
+            self.written += len(lines)
+        except Exception as e:
+            self.dropped += len(lines)
+            logger.error(f"Failed to write webhook recording {self.path}: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_SECONDS)
+            await self.flush()
+
+    def start(self) -> Dict[str, Any]:
+        """Begin a new recording file (no-op if already recording)."""
+        if self.recording:
+            return self.stats()
+        started_at = datetime.now(timezone.utc)
+        directory = Path(self.directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / f"webhook-recording-{started_at:%Y%m%dT%H%M%SZ}-{os.getpid()}.jsonl.gz"
+        self._header = json.dumps(
+            {"format": FORMAT, "version": VERSION, "started_at": started_at.isoformat(), "pid": os.getpid()}
+        )
+        self.recorded = self.written = self.dropped = 0
+        self.recording = True
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        logger.info("Recording webhooks to %s", self.path)
+        return self.stats()
+
+    async def stop(self) -> Dict[str, Any]:
+        """Stop recording and write out what is buffered."""
+        self.recording = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self.path is not None:
+            logger.info("Webhook recording %s: %d events written", self.path, self.written)
+        return self.stats()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "recording": self.recording,
+            "path": str(self.path) if self.path else None,
+            "redact": self.redact,
+            "recorded": self.recorded,
+            "written": self.written,
+            "buffered": len(self._buffer),
+            "dropped": self.dropped,
+            "max_events": self.max_events,
+        }
+
+
+webhook_recorder = WebhookRecorder()
+
+
+# --------------------------------------------------------------------------------------
+# Reading
+# --------------------------------------------------------------------------------------
+
+
+def _read_file(path: str) -> Iterator[Event]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if isinstance(row, dict):
+                if row.get("format") != FORMAT or row.get("version") != VERSION:
+                    raise ValueError(f"{path}:{number}: not a version {VERSION} webhook recording")
+                continue
+            arrived_ms, kind, payload = row
+            yield int(arrived_ms), kind, payload
+
+
+def read_recordings(paths: Iterable[str]) -> Iterator[Event]:
+    """Events of one or more recording files (e.g. one per worker), in arrival order."""
+    return heapq.merge(*(_read_file(path) for path in paths), key=lambda event: event[0])
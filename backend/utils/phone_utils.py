@@ -1,30 +1,192 @@
+"""
+Phone number normalization to E.164.
+
+`PhoneNormalizer` does the work behind `normalize_phone_e164`:
+
+- input that is already E.164 (`+` and 8-15 digits) is returned as-is
+  after one precompiled match,
+- international input (`+44 20 ...`, `0044 ...`, `011 44 ...`) keeps its
+  country calling code, found with a prefix trie over all ITU codes,
+- national input gets the default country code (10-digit NANP numbers,
+  or 11 digits starting with 1),
+- results are memoized in a bounded LRU cache (PHONE_CACHE_SIZE entries,
+  default 65536), since the same few thousand numbers recur across events.
+
+`normalize_phones_e164` / `normalize_phone_series` normalize many numbers
+at once, doing the work once per distinct number. One normalizer (and
+cache) is kept per default country code (`normalizer_for`).
+
+Differences from the earlier regex-only normalization:
+
+- empty input (or input without digits) returns "" instead of the bare
+  default country code ("+1"),
+- digits starting with a country calling code other than 1 keep it:
+  "442079460958" returns "+442079460958" (was "+1442079460958").
+"""
+
+import os
 import re
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+# ITU-T E.164 country calling codes (prefix-free: no code is a prefix of another)
+COUNTRY_CALLING_CODES = (
+    "1", "7",
+    "20", "27", "30", "31", "32", "33", "34", "36", "39", "40", "41", "43", "44", "45", "46", "47",
+    "48", "49", "51", "52", "53", "54", "55", "56", "57", "58", "60", "61", "62", "63", "64", "65",
+    "66", "81", "82", "84", "86", "90", "91", "92", "93", "94", "95", "98",
+    "211", "212", "213", "216", "218", "220", "221", "222", "223", "224", "225", "226", "227", "228",
+    "229", "230", "231", "232", "233", "234", "235", "236", "237", "238", "239", "240", "241", "242",
+    "243", "244", "245", "246", "247", "248", "249", "250", "251", "252", "253", "254", "255", "256",
+    "257", "258", "260", "261", "262", "263", "264", "265", "266", "267", "268", "269", "290", "291",
+    "297", "298", "299", "350", "351", "352", "353", "354", "355", "356", "357", "358", "359", "370",
+    "371", "372", "373", "374", "375", "376", "377", "378", "379", "380", "381", "382", "383", "385",
+    "386", "387", "389", "420", "421", "423", "500", "501", "502", "503", "504", "505", "506", "507",
+    "508", "509", "590", "591", "592", "593", "594", "595", "596", "597", "598", "599", "670", "672",
+    "673", "674", "675", "676", "677", "678", "679", "680", "681", "682", "683", "685", "686", "687",
+    "688", "689", "690", "691", "692", "800", "808", "850", "852", "853", "855", "856", "870", "878",
+    "880", "881", "882", "883", "886", "888", "960", "961", "962", "963", "964", "965", "966", "967",
+    "968", "970", "971", "972", "973", "974", "975", "976", "977", "979", "992", "993", "994", "995",
+    "996", "998",
+)
+
+# International dialing prefixes written in place of "+"
+INTERNATIONAL_PREFIXES = ("011", "00")
+
+CACHE_SIZE = int(os.getenv("PHONE_CACHE_SIZE", "65536"))
+
+_E164 = re.compile(r'\+[1-9]\d{7,14}')
+_NON_DIGITS = re.compile(r'[^\d+]')
+
+_TERMINAL = ""
+
+
+def _build_trie(codes: Iterable[str]) -> Dict[str, dict]:
+    trie: Dict[str, dict] = {}
+    for code in codes:
+        node = trie
+        for digit in code:
+            node = node.setdefault(digit, {})
+        node[_TERMINAL] = code
+    return trie
+
+
+class PhoneNormalizer:
+    def __init__(
+        self,
+        default_country_code: str = "+1",
+        codes: Iterable[str] = COUNTRY_CALLING_CODES,
+        cache_size: int = CACHE_SIZE,
+    ) -> None:
+        self.default_country_code = default_country_code
+        self._trie = _build_trie(codes)
+        self._cached = lru_cache(maxsize=cache_size)(self._normalize)
+
+    def country_code(self, digits: str) -> Optional[str]:
+        """Calling code that `digits` (without "+") starts with, if any."""
+        node = self._trie
+        for digit in digits[:3]:
+            node = node.get(digit)
+            if node is None:
+                return None
+            if _TERMINAL in node:
+                return node[_TERMINAL]
+        return None
+
+    def _international(self, digits: str) -> Optional[str]:
+        if self.country_code(digits) and 8 <= len(digits) <= 15:
+            return "+" + digits
+        return None
+
+    def _normalize(self, phone: str) -> str:
+        cleaned = _NON_DIGITS.sub('', phone)
+        if not cleaned:
+            return ""
+        if cleaned.startswith('+'):
+            return '+' + cleaned[1:].replace('+', '')
+
+        if len(cleaned) == 10:  # national number (NANP default)
+            return f"{self.default_country_code}{cleaned}"
+        if len(cleaned) == 11 and cleaned.startswith('1'):
+            return f"+{cleaned}"
+
+        for prefix in INTERNATIONAL_PREFIXES:
+            if cleaned.startswith(prefix):
+                international = self._international(cleaned[len(prefix):])
+                if international:
+                    return international
+
+        # Country code written without "+" (e.g. 442079460958)
+        international = self._international(cleaned)
+        if international and not cleaned.startswith('1'):
+            return international
+
+        return f"{self.default_country_code}{cleaned}"
+
+    def normalize(self, phone: str) -> str:
+        """Normalize one number to E.164 (best effort; never raises)."""
+        if _E164.fullmatch(phone):
+            return phone
+        return self._cached(phone)
+
+    def normalize_many(self, phones: Iterable[str]) -> List[str]:
+        """Normalize a batch, doing the work once per distinct number."""
+        seen: Dict[str, str] = {}
+        result = []
+        for phone in phones:
+            normalized = seen.get(phone)
+            if normalized is None:
+                normalized = seen[phone] = self.normalize(phone)
+            result.append(normalized)
+        return result
+
+    def cache_info(self) -> dict:
+        info = self._cached.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
+
+    def cache_clear(self) -> None:
+        self._cached.cache_clear()
+
+
+phone_normalizer = PhoneNormalizer()
+
+
+@lru_cache(maxsize=None)
+def normalizer_for(default_country_code: str = "+1") -> PhoneNormalizer:
+    """The shared normalizer for `default_country_code`."""
+    if default_country_code == phone_normalizer.default_country_code:
+        return phone_normalizer
+    return PhoneNormalizer(default_country_code)
+
 
 def normalize_phone_e164(phone: str, default_country_code: str = "+1") -> str:
     """
     Normalize phone number to E.164 format.
-    
+
     Args:
         phone: Phone number in various formats
         default_country_code: Default country code if not provided
-    
+
     Returns:
         Phone number in E.164 format (e.g., +14155552671)
     """
-    # Remove all non-digit characters except leading +
-    cleaned = re.sub(r'[^\d+]', '', phone)
-    
-    # If no + at the beginning, add default country code
-    if not cleaned.startswith('+'):
-        if len(cleaned) == 10:  # US number without country code
-            cleaned = f"{default_country_code}{cleaned}"
-        elif len(cleaned) == 11 and cleaned.startswith('1'):
-            cleaned = f"+{cleaned}"
-        else:
-            cleaned = f"{default_country_code}{cleaned}"
-    
-    return cleaned
+    return normalizer_for(default_country_code).normalize(phone)
+
+def normalize_phones_e164(phones: Iterable[str]) -> List[str]:
+    """
+    Normalize a list of phone numbers to E.164 (see PhoneNormalizer.normalize_many).
+    """
+    return phone_normalizer.normalize_many(phones)
+
+def normalize_phone_series(phones, default_country_code: str = "+1"):
+    """
+    `normalize_phone_e164` for a pandas Series of phone numbers, computed
+    once per distinct value. Missing values become "".
+    """
+    values = phones.fillna("").astype(str)
+    uniques = values.unique()
+    normalized = normalizer_for(default_country_code).normalize_many(uniques)
+    return values.map(dict(zip(uniques, normalized)))
 
 def format_phone_display(phone: str) -> str:
     """
@@ -32,23 +194,24 @@ def format_phone_display(phone: str) -> str:
     E.g., +14155552671 -> +1 (415) 555-2671
     """
     cleaned = normalize_phone_e164(phone)
-    
+
     if cleaned.startswith('+1') and len(cleaned) == 12:
         return f"+1 ({cleaned[2:5]}) {cleaned[5:8]}-{cleaned[8:]}"
-    
+
     return cleaned
 
 def extract_phone_info(phone: str) -> dict:
     """
     Extract phone number information.
-    
+
     Returns:
         Dictionary with normalized number, display format, and country code
     """
     normalized = normalize_phone_e164(phone)
-    
+    code = phone_normalizer.country_code(normalized[1:]) if normalized.startswith('+') else None
+
     return {
         "normalized": normalized,
         "display": format_phone_display(normalized),
-        "country_code": normalized[:2] if normalized.startswith('+') else None
+        "country_code": f"+{code}" if code else None
     }
@@ -6,7 +6,11 @@ const API = `${BACKEND_URL}/api`;
 
 const InteractionLog = () => {
   const [logs, setLogs] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [feedCursor, setFeedCursor] = useState(null); // null until the first page has loaded
+  const [live, setLive] = useState(true);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [filter, setFilter] = useState('all'); // all, sms, call
   const [error, setError] = useState('');
 
@@ -14,12 +18,42 @@ const InteractionLog = () => {
     fetchLogs();
   }, [filter]);
 
+  // Live feed: new logs are prepended, updated ones replaced in place.
+  // On reconnect EventSource sends Last-Event-ID and the server replays what was missed.
+  useEffect(() => {
+    if (!live || loading || feedCursor === null) return undefined;
+
+    const params = new URLSearchParams(filterParams());
+    if (feedCursor) params.set('cursor', feedCursor);
+    const source = new EventSource(`${API}/admin/logs/stream?${params.toString()}`);
+
+    source.addEventListener('log', (event) => {
+      const { op, log } = JSON.parse(event.data);
+      setLogs((current) => {
+        const index = current.findIndex((item) => item.id === log.id);
+        if (index === -1) {
+          return op === 'insert' ? [log, ...current] : current;
+        }
+        const next = [...current];
+        next[index] = log;
+        return next;
+      });
+    });
+    // Too much was missed to replay: reload the list
+    source.addEventListener('reset', () => fetchLogs());
+
+    return () => source.close();
+  }, [live, loading, feedCursor, filter]);
+
+  const filterParams = () => (filter !== 'all' ? { interaction_type: filter } : {});
+
   const fetchLogs = async () => {
     try {
       setLoading(true);
-      const params = filter !== 'all' ? { interaction_type: filter } : {};
-      const response = await axios.get(`${API}/admin/logs`, { params });
+      const response = await axios.get(`${API}/admin/logs`, { params: filterParams() });
       setLogs(response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+      setFeedCursor(response.headers['x-feed-cursor'] || '');
       setError('');
     } catch (err) {
       console.error('Error fetching logs:', err);
@@ -29,6 +63,28 @@ const InteractionLog = () => {
     }
   };
 
+  const fetchMoreLogs = async () => {
+    try {
+      setLoadingMore(true);
+      const response = await axios.get(`${API}/admin/logs`, {
+        params: { ...filterParams(), cursor: nextCursor },
+      });
+      setLogs((current) => [...current, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+      setError('');
+    } catch (err) {
+      console.error('Error fetching more logs:', err);
+      setError('Failed to load more interaction logs');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const exportUrl = (format) => {
+    const params = new URLSearchParams({ ...filterParams(), format });
+    return `${API}/admin/logs/export?${params.toString()}`;
+  };
+
   const formatTimestamp = (timestamp) => {
     const date = new Date(timestamp);
     return date.toLocaleString();
@@ -86,6 +142,17 @@ const InteractionLog = () => {
           >
             Calls
           </button>
+          <button
+            onClick={() => setLive(!live)}
+            className={`px-4 py-2 rounded-lg transition ${
+              live
+                ? 'bg-green-600 hover:bg-green-700 text-white'
+                : 'bg-gray-200 text-gray-700 hover:bg-gray-300'
+            }`}
+            data-testid="live-logs-btn"
+          >
+            {live ? 'Live' : 'Paused'}
+          </button>
           <button
             onClick={fetchLogs}
             className="bg-gray-600 hover:bg-gray-700 text-white px-4 py-2 rounded-lg transition"
@@ -93,6 +160,13 @@ const InteractionLog = () => {
           >
             Refresh
           </button>
+          <a
+            href={exportUrl('csv')}
+            className="bg-gray-600 hover:bg-gray-700 text-white px-4 py-2 rounded-lg transition"
+            data-testid="export-logs-btn"
+          >
+            Export CSV
+          </a>
         </div>
       </div>
 
@@ -190,6 +264,18 @@ const InteractionLog = () => {
               </div>
             </div>
           ))}
+          {nextCursor && (
+            <div className="text-center">
+              <button
+                onClick={fetchMoreLogs}
+                disabled={loadingMore}
+                className="bg-gray-200 hover:bg-gray-300 text-gray-700 px-4 py-2 rounded-lg transition disabled:opacity-50"
+                data-testid="load-more-logs-btn"
+              >
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The app's packages (models, services, ...) are imported from backend/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
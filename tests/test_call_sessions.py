@@ -0,0 +1,279 @@
+import asyncio
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from models.bridge_models import GoToCallEvent  # noqa: E402
+from models.mapping_models import InteractionLog  # noqa: E402
+from services import activity_rollups, call_sessions, indexes  # noqa: E402
+
+CALL_ID = "call-1"
+
+
+def make_db():
+    db = mongomock_motor.AsyncMongoMockClient()["test"]
+    # mongomock ignores partialFilterExpression, which only matters for SMS logs
+    asyncio.run(db.interaction_logs.create_indexes(
+        [index for index in indexes.INDEXES["interaction_logs"] if index.document["name"] == call_sessions.UNIQUE_INDEX]
+    ))
+    assert asyncio.run(call_sessions.check_unique_index(db))
+    return db
+
+
+def event(call_result, **kwargs):
+    return GoToCallEvent(**{
+        "call_id": CALL_ID,
+        "from_number": "+14155550100",
+        "to_number": "+14155550111",
+        "direction": "outbound",
+        "call_result": call_result,
+        "start_time": "2026-10-17T09:00:00Z",
+        **kwargs,
+    })
+
+
+def new_log(ev):
+    state, result = call_sessions.event_state(ev)
+    return InteractionLog(
+        interaction_type="call",
+        direction=ev.direction,
+        candidate_name="Candidate",
+        candidate_phone=ev.to_number,
+        recruiter_name="Recruiter",
+        recruiter_phone=ev.from_number,
+        goto_call_id=ev.call_id,
+        call_duration=ev.duration,
+        call_result=result,
+        status=state,
+    ).model_dump()
+
+
+async def apply(db, ev, extra_fields=None):
+    return await call_sessions.apply_event(db, ev, new_log(ev), extra_fields)
+
+
+async def call_logs(db):
+    return await db.interaction_logs.find({"goto_call_id": CALL_ID}, {"_id": 0}).to_list(None)
+
+
+def test_event_state():
+    assert call_sessions.event_state(event("ringing")) == (call_sessions.RINGING, None)
+    assert call_sessions.event_state(event("connected")) == (call_sessions.IN_PROGRESS, None)
+    assert call_sessions.event_state(event("ended")) == (call_sessions.COMPLETED, None)
+    # Final outcomes complete the call, with or without an end time
+    assert call_sessions.event_state(event("answered")) == (call_sessions.COMPLETED, "answered")
+    assert call_sessions.event_state(event("missed")) == (call_sessions.COMPLETED, "missed")
+
+
+def test_events_in_order_merge_into_one_log():
+    db = make_db()
+
+    async def run():
+        ringing = await apply(db, event("ringing"))
+        connected = await apply(db, event("connected"))
+        answered = await apply(db, event("answered", duration=42))
+        return ringing, connected, answered, await call_logs(db)
+
+    ringing, connected, answered, logs = asyncio.run(run())
+    assert ringing.created and not ringing.terminal
+    assert connected.applied and not connected.created and not connected.terminal
+    assert answered.applied and answered.terminal
+    assert len(logs) == 1
+    assert logs[0]["id"] == ringing.log["id"] == answered.log["id"]
+    assert logs[0]["status"] == call_sessions.COMPLETED
+    assert logs[0]["call_result"] == "answered"
+    assert logs[0]["call_duration"] == 42
+    assert answered.log == logs[0]
+
+
+def test_out_of_order_events_are_stale_and_never_insert():
+    db = make_db()
+
+    async def run():
+        missed = await apply(db, event("missed", end_time="2026-10-17T09:00:30Z"))
+        late = [await apply(db, event(result)) for result in ("ringing", "connected")]
+        return missed, late, await call_logs(db)
+
+    missed, late, logs = asyncio.run(run())
+    assert missed.created and missed.terminal
+    assert all(not transition.applied and not transition.terminal for transition in late)
+    assert len(logs) == 1
+    assert logs[0]["status"] == call_sessions.COMPLETED
+    assert logs[0]["call_result"] == "missed"
+
+
+def test_second_terminal_event_is_stale():
+    db = make_db()
+
+    async def run():
+        first = await apply(db, event("answered", duration=30), {"jobdiva_note_pending": True})
+        second = await apply(db, event("ended", duration=31), {"jobdiva_note_pending": True})
+        return first, second, await call_logs(db)
+
+    first, second, logs = asyncio.run(run())
+    assert first.terminal
+    assert not second.applied and not second.terminal
+    assert len(logs) == 1
+    assert logs[0]["call_duration"] == 30
+
+
+def test_duration_keeps_the_longest():
+    db = make_db()
+
+    async def run():
+        await apply(db, event("connected", duration=50))
+        await apply(db, event("answered", duration=20))
+        return await call_logs(db)
+
+    [log] = asyncio.run(run())
+    assert log["call_duration"] == 50
+
+
+def test_concurrent_first_events_create_one_log():
+    db = make_db()
+
+    async def run():
+        transitions = await asyncio.gather(
+            apply(db, event("ringing")), apply(db, event("connected")), apply(db, event("busy"))
+        )
+        return transitions, await call_logs(db)
+
+    transitions, logs = asyncio.run(run())
+    assert len(logs) == 1
+    assert sum(transition.created for transition in transitions) == 1
+    assert sum(transition.terminal for transition in transitions) == 1
+    assert logs[0]["status"] == call_sessions.COMPLETED
+
+
+class RacingCollection:
+    """interaction_logs where another worker inserts the log just before our first upsert."""
+
+    def __init__(self, collection, other_log):
+        self._collection = collection
+        self._other_log = other_log
+        self.raced = False
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    async def find_one_and_update(self, *args, **kwargs):
+        if not self.raced:
+            self.raced = True
+            await self._collection.insert_one(dict(self._other_log))
+            raise DuplicateKeyError("E11000 duplicate key error")
+        return await self._collection.find_one_and_update(*args, **kwargs)
+
+
+def test_racing_insert_is_retried_as_update():
+    db = make_db()
+    other_log = new_log(event("ringing"))
+    racing = RacingCollection(db.interaction_logs, other_log)
+
+    class RacingDb:
+        interaction_logs = racing
+
+    async def run():
+        return await apply(RacingDb(), event("answered")), await call_logs(db)
+
+    answered, logs = asyncio.run(run())
+    assert racing.raced
+    assert answered.applied and answered.terminal and not answered.created
+    assert answered.before["status"] == call_sessions.RINGING
+    assert len(logs) == 1
+    assert logs[0]["id"] == other_log["id"]
+    assert logs[0]["call_result"] == "answered"
+
+
+def test_events_refused_without_unique_index():
+    db = mongomock_motor.AsyncMongoMockClient()["test"]
+
+    async def run():
+        assert not await call_sessions.check_unique_index(db)
+        with pytest.raises(call_sessions.CallSessionsUnavailable):
+            await apply(db, event("answered"))
+        return await call_logs(db)
+
+    assert asyncio.run(run()) == []
+
+
+def start_log(**kwargs):
+    return InteractionLog(**{
+        "interaction_type": "call",
+        "direction": "outbound",
+        "candidate_id": "cand-1",
+        "candidate_name": "Candidate",
+        "candidate_phone": "+14155550111",
+        "recruiter_id": "rec-1",
+        "recruiter_name": "Recruiter",
+        "recruiter_phone": "+14155550100",
+        "goto_call_id": CALL_ID,
+        "status": call_sessions.INITIATED,
+        **kwargs,
+    }).model_dump()
+
+
+def test_record_start_merges_into_webhook_log():
+    db = make_db()
+
+    async def run():
+        webhook = await apply(db, event("ringing"))
+        existing = await call_sessions.record_start(db, start_log())
+        return webhook, existing, await call_logs(db)
+
+    webhook, existing, logs = asyncio.run(run())
+    assert existing["id"] == webhook.log["id"]
+    assert len(logs) == 1
+    assert logs[0]["status"] == call_sessions.RINGING
+    assert logs[0]["recruiter_id"] == "rec-1"
+    assert logs[0]["candidate_id"] == "cand-1"
+
+
+def test_record_start_merges_created_note():
+    db = make_db()
+
+    async def run():
+        await apply(db, event("ringing"))
+        await call_sessions.record_start(db, start_log(jobdiva_note_created=True, jobdiva_note_id="note-1"))
+        return await call_logs(db)
+
+    logs = asyncio.run(run())
+    assert len(logs) == 1
+    assert logs[0]["jobdiva_note_created"] is True
+    assert logs[0]["jobdiva_note_id"] == "note-1"
+    assert logs[0]["jobdiva_note_error"] is None
+
+
+def test_record_start_failed_note_keeps_webhook_note():
+    db = make_db()
+
+    async def run():
+        await apply(db, event("answered"), {"jobdiva_note_created": True, "jobdiva_note_id": "note-webhook"})
+        await call_sessions.record_start(db, start_log(jobdiva_note_error="JobDiva down"))
+        return await call_logs(db)
+
+    logs = asyncio.run(run())
+    assert logs[0]["jobdiva_note_created"] is True
+    assert logs[0]["jobdiva_note_id"] == "note-webhook"
+    assert logs[0].get("jobdiva_note_error") is None
+
+
+def test_record_start_moves_rollup_to_recruiter():
+    # The path /call/start takes when a webhook created the call log first
+    db = make_db()
+
+    async def run():
+        webhook = await apply(db, event("ringing"))
+        await activity_rollups.record(db, webhook.log)
+        start = start_log()
+        existing = await call_sessions.record_start(db, start)
+        await activity_rollups.record_change(db, existing, call_sessions.start_changes(start))
+        rollups = await db[activity_rollups.COLLECTION].find({}, {"_id": 0}).to_list(None)
+        return {rollup["recruiter_id"]: rollup for rollup in rollups}
+
+    rollups = asyncio.run(run())
+    assert rollups[None]["interactions"] == 0
+    assert rollups[None]["counts"]["call"]["outbound"]["ringing"] == 0
+    assert rollups["rec-1"]["interactions"] == 1
+    assert rollups["rec-1"]["counts"]["call"]["outbound"]["ringing"] == 1
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from services.candidate_cache import CandidateCache
+
+PHONE = "+14155552671"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_concurrent_misses_share_one_load():
+    cache = CandidateCache()
+    calls = []
+
+    async def loader(phone):
+        calls.append(phone)
+        await asyncio.sleep(0)
+        return {"id": "cand-1"}
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load(PHONE, loader) for _ in range(3)))
+
+    assert asyncio.run(run()) == [{"id": "cand-1"}] * 3
+    assert calls == [PHONE]
+    assert cache.coalesced == 2
+
+
+def test_negative_results_expire_sooner():
+    clock = FakeClock()
+    cache = CandidateCache(ttl=300, negative_ttl=60, clock=clock)
+    cache.set(PHONE, None)
+    cache.set("+14155550000", {"id": "cand-1"})
+    clock.now += 61
+    assert cache.get(PHONE) == (False, None)
+    assert cache.get("+14155550000") == (True, {"id": "cand-1"})
+
+
+def test_loader_errors_are_not_cached():
+    cache = CandidateCache()
+
+    async def failing(phone):
+        raise RuntimeError("JobDiva down")
+
+    async def found(phone):
+        return {"id": "cand-1"}
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_load(PHONE, failing))
+    assert asyncio.run(cache.get_or_load(PHONE, found)) == {"id": "cand-1"}
+
+
+def test_waiter_reloads_when_loading_caller_is_cancelled():
+    cache = CandidateCache()
+    started = []
+
+    async def loader(phone):
+        started.append(phone)
+        if len(started) == 1:
+            await asyncio.sleep(3600)
+        return {"id": "cand-1"}
+
+    async def run():
+        owner = asyncio.create_task(cache.get_or_load(PHONE, loader))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_load(PHONE, loader))
+        await asyncio.sleep(0)
+        owner.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        return await asyncio.wait_for(waiter, 1)
+
+    assert asyncio.run(run()) == {"id": "cand-1"}
+    assert len(started) == 2
+    assert cache.get(PHONE) == (True, {"id": "cand-1"})
+
+
+def test_cancelled_waiter_leaves_the_load_running():
+    cache = CandidateCache()
+    release = None
+
+    async def loader(phone):
+        await release.wait()
+        return {"id": "cand-1"}
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        owner = asyncio.create_task(cache.get_or_load(PHONE, loader))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_load(PHONE, loader))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        release.set()
+        return await owner
+
+    assert asyncio.run(run()) == {"id": "cand-1"}
@@ -0,0 +1,172 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    counts_as_failure,
+)
+from services.goto_service import GoToError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(clock, **kwargs):
+    settings = dict(min_calls=4, window_seconds=10, open_seconds=30, half_open_calls=2, slow_seconds=5)
+    settings.update(kwargs)
+    return CircuitBreaker("test", clock=clock, **settings)
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.min_calls):
+        breaker.before_call()
+        breaker.record(failed=True, elapsed=0.1)
+    assert breaker.state == OPEN
+
+
+def test_opens_on_failure_rate_after_min_calls():
+    breaker = make_breaker(FakeClock())
+    for failed in (True, True, False):
+        breaker.before_call()
+        breaker.record(failed=failed, elapsed=0.1)
+    assert breaker.state == CLOSED  # below min_calls
+    breaker.before_call()
+    breaker.record(failed=False, elapsed=0.1)
+    assert breaker.state == OPEN  # 2 of 4 failed
+
+
+def test_opens_on_slow_rate():
+    breaker = make_breaker(FakeClock(), slow_rate=0.75)
+    for elapsed in (6, 6, 6, 0.1):
+        breaker.before_call()
+        breaker.record(failed=False, elapsed=elapsed)
+    assert breaker.state == OPEN
+
+
+def test_old_outcomes_leave_the_window():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        breaker.record(failed=True, elapsed=0.1)
+    clock.now += 11
+    breaker.record(failed=True, elapsed=0.1)
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["window_calls"] == 1
+
+
+def test_open_rejects_until_timeout_then_half_opens():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    open_breaker(breaker)
+
+    clock.now += 10
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_in == pytest.approx(20)
+    assert not breaker.allows_calls
+    assert breaker.rejected == 1
+
+    clock.now += 20
+    assert breaker.allows_calls
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+
+
+def test_half_open_limits_trials_and_closes_after_successes():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    open_breaker(breaker)
+    clock.now += 30
+
+    breaker.before_call()
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # both trial slots taken
+    breaker.record(failed=False, elapsed=0.1)
+    assert breaker.state == HALF_OPEN
+    breaker.record(failed=False, elapsed=0.1)
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["window_calls"] == 0
+    assert [t["to"] for t in breaker.transitions] == [OPEN, HALF_OPEN, CLOSED]
+
+
+@pytest.mark.parametrize("failed, elapsed", [(True, 0.1), (False, 6)])
+def test_failed_or_slow_trial_reopens(failed, elapsed):
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    open_breaker(breaker)
+    clock.now += 30
+
+    breaker.before_call()
+    breaker.record(failed=failed, elapsed=elapsed)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_in == pytest.approx(30)
+
+
+def test_release_frees_a_trial_slot():
+    clock = FakeClock()
+    breaker = make_breaker(clock, half_open_calls=1)
+    open_breaker(breaker)
+    clock.now += 30
+
+    breaker.before_call()
+    breaker.release()
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+
+
+def test_call_records_outcomes_and_cancellation():
+    clock = FakeClock()
+    breaker = make_breaker(clock, half_open_calls=1)
+    open_breaker(breaker)
+    clock.now += 30
+
+    async def cancelled():
+        raise asyncio.CancelledError
+
+    async def ok():
+        return "ok"
+
+    async def run():
+        with pytest.raises(asyncio.CancelledError):
+            await breaker.call(cancelled)
+        # The cancelled trial gave its slot back
+        return await breaker.call(ok)
+
+    assert asyncio.run(run()) == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_reset_closes():
+    breaker = make_breaker(FakeClock())
+    open_breaker(breaker)
+    breaker.reset()
+    assert breaker.state == CLOSED
+    breaker.before_call()
+
+
+def test_counts_as_failure():
+    request = httpx.Request("GET", "https://example.invalid")
+    assert counts_as_failure(httpx.ConnectError("down"))
+    assert counts_as_failure(GoToError("unavailable", status_code=503))
+    assert counts_as_failure(GoToError("throttled", status_code=429))
+    assert not counts_as_failure(GoToError("bad request", status_code=400))
+    assert not counts_as_failure(
+        httpx.HTTPStatusError("not found", request=request, response=httpx.Response(404, request=request))
+    )
+    assert counts_as_failure(
+        httpx.HTTPStatusError("bad gateway", request=request, response=httpx.Response(502, request=request))
+    )
@@ -0,0 +1,104 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from services import log_export  # noqa: E402
+from services.log_export import InvalidCursor  # noqa: E402
+
+T0 = datetime(2026, 10, 17, 9, 0, tzinfo=timezone.utc)
+
+
+def make_db(logs):
+    db = mongomock_motor.AsyncMongoMockClient()["test"]
+    asyncio.run(db.interaction_logs.insert_many([dict(log) for log in logs]))
+    return db
+
+
+def make_logs():
+    # Three logs share a timestamp, so pages must break ties on id
+    logs = [{"id": f"log-{i}", "timestamp": T0, "interaction_type": "call"} for i in range(3)]
+    logs += [
+        {"id": f"log-{i}", "timestamp": T0 + timedelta(minutes=i), "interaction_type": "sms"}
+        for i in range(3, 7)
+    ]
+    return logs
+
+
+def expected_order(logs):
+    return [log["id"] for log in sorted(logs, key=lambda log: (log["timestamp"], log["id"]), reverse=True)]
+
+
+def all_pages(db, limit, **filters):
+    async def run():
+        pages, cursor = [], None
+        while True:
+            page, cursor = await log_export.fetch_page(db, log_export.build_query(cursor=cursor, **filters), limit)
+            pages.append([log["id"] for log in page])
+            if cursor is None:
+                return pages
+
+    return asyncio.run(run())
+
+
+def test_cursor_round_trip():
+    cursor = log_export.encode_cursor({"timestamp": T0, "id": "log-1"})
+    assert "=" not in cursor
+    assert log_export.decode_cursor(cursor) == (T0, "log-1")
+
+
+def test_cursor_naive_timestamp_is_utc():
+    cursor = log_export.encode_cursor({"timestamp": T0.replace(tzinfo=None), "id": "log-1"})
+    assert log_export.decode_cursor(cursor) == (T0, "log-1")
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "W10", "WyIyMDI2LTEwLTE3IiwgMV0"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        log_export.decode_cursor(cursor)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7, 10])
+def test_pages_visit_every_log_once_in_order(limit):
+    logs = make_logs()
+    pages = all_pages(make_db(logs), limit)
+    assert [log_id for page in pages for log_id in page] == expected_order(logs)
+    assert all(len(page) == limit for page in pages[:-1])
+    assert 0 < len(pages[-1]) <= limit
+
+
+def test_exact_page_has_no_next_cursor():
+    logs = make_logs()
+    db = make_db(logs)
+    page, cursor = asyncio.run(log_export.fetch_page(db, log_export.build_query(), len(logs)))
+    assert len(page) == len(logs)
+    assert cursor is None
+
+
+def test_pages_with_filters():
+    logs = make_logs()
+    pages = all_pages(make_db(logs), 2, interaction_type="call")
+    assert pages == [["log-2", "log-1"], ["log-0"]]
+    pages = all_pages(make_db(logs), 2, since=T0 + timedelta(minutes=4), until=T0 + timedelta(minutes=6))
+    assert pages == [["log-5", "log-4"]]
+
+
+def test_export_ndjson_and_csv():
+    logs = make_logs()
+    db = make_db(logs)
+
+    async def run(fmt):
+        return "".join([chunk async for chunk in log_export.export_logs(db, {}, fmt)])
+
+    lines = [json.loads(line) for line in asyncio.run(run(log_export.NDJSON)).splitlines()]
+    assert [line["id"] for line in lines] == expected_order(logs)
+    assert lines[0]["timestamp"] == (T0 + timedelta(minutes=6)).isoformat()
+
+    rows = list(csv.reader(io.StringIO(asyncio.run(run(log_export.CSV)))))
+    assert rows[0] == log_export.CSV_COLUMNS
+    assert [row[rows[0].index("id")] for row in rows[1:]] == expected_order(logs)
@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from services import mapping_import  # noqa: E402
+
+HEADER = "jobdiva_user_id,jobdiva_user_name,goto_user_id,goto_phone_number,is_active\n"
+
+
+def run_import(df):
+    db = mongomock_motor.AsyncMongoMockClient()["test"]
+    return asyncio.run(mapping_import.import_mappings(db, df, dry_run=True))
+
+
+def mapping(user_id, phone, **extra):
+    return {
+        "jobdiva_user_id": user_id,
+        "jobdiva_user_name": f"Recruiter {user_id}",
+        "goto_user_id": f"goto_{user_id}",
+        "goto_phone_number": phone,
+        **extra,
+    }
+
+
+def statuses(report):
+    return {row["jobdiva_user_id"]: (row["status"], row.get("error")) for row in report["rows"]}
+
+
+def test_json_rows_with_and_without_is_active():
+    body = json.dumps([
+        mapping("u1", "+14155550101", is_active=True),
+        mapping("u2", "+14155550102", is_active=False),
+        mapping("u3", "+14155550103", is_active="yes"),
+        mapping("u9", "+14155550109"),
+        mapping("u10", "+14155550110", is_active=None),
+    ]).encode()
+    report = run_import(mapping_import.read_table(body, "application/json"))
+    assert report["error"] == 0, report["rows"]
+    assert report["created"] == 5
+
+
+def test_csv_blank_is_active_cell():
+    body = (HEADER + "u1,A,g1,4155550101,true\nu2,B,g2,4155550102,\nu3,C,g3,4155550103,0\n").encode()
+    report = run_import(mapping_import.read_table(body, "text/csv"))
+    assert report["error"] == 0, report["rows"]
+    assert report["created"] == 3
+
+
+def test_unrecognised_is_active_is_rejected():
+    body = json.dumps([mapping("u1", "+14155550101", is_active="maybe"), mapping("u2", "+14155550102")]).encode()
+    report = run_import(mapping_import.read_table(body, "application/json"))
+    assert statuses(report) == {
+        "u1": ("error", "is_active must be true or false"),
+        "u2": ("created", None),
+    }
+
+
+def test_parse_active_treats_missing_as_none():
+    df = mapping_import.read_table(
+        json.dumps([mapping("u1", "+14155550101", is_active=False), mapping("u2", "+14155550102")]).encode(),
+        "application/json",
+    )
+    assert mapping_import._parse_active(df["is_active"]).tolist() == [False, None]
@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+from utils import phone_utils
+from utils.phone_utils import normalize_phone_e164
+
+
+@pytest.mark.parametrize("phone, expected", [
+    # Unchanged from the regex-only normalization
+    ("+14155552671", "+14155552671"),
+    ("(415) 555-2671", "+14155552671"),
+    ("415.555.2671", "+14155552671"),
+    ("1-415-555-2671", "+14155552671"),
+    ("+1 (415) 555-2671", "+14155552671"),
+    ("+44 20 7946 0958", "+442079460958"),
+    ("5552671", "+15552671"),
+])
+def test_legacy_cases(phone, expected):
+    assert normalize_phone_e164(phone) == expected
+
+
+@pytest.mark.parametrize("phone, expected", [
+    # Was "+1"
+    ("", ""),
+    ("ext.", ""),
+    # Was "+1442079460958"
+    ("442079460958", "+442079460958"),
+    ("0044 20 7946 0958", "+442079460958"),
+    ("011 44 20 7946 0958", "+442079460958"),
+])
+def test_changed_cases(phone, expected):
+    assert normalize_phone_e164(phone) == expected
+
+
+def test_default_country_code():
+    assert normalize_phone_e164("2079460958", default_country_code="+44") == "+442079460958"
+    assert normalize_phone_e164("4155552671") == "+14155552671"
+
+
+def test_one_normalizer_per_country_code():
+    assert phone_utils.normalizer_for("+1") is phone_utils.phone_normalizer
+    assert phone_utils.normalizer_for("+44") is phone_utils.normalizer_for("+44")
+    assert phone_utils.normalizer_for("+44").default_country_code == "+44"
+
+
+def test_normalize_many_matches_single():
+    phones = ["(415) 555-2671", "442079460958", "", "(415) 555-2671"]
+    assert phone_utils.normalize_phones_e164(phones) == [normalize_phone_e164(phone) for phone in phones]
+
+
+def test_normalize_phone_series_missing_values():
+    series = pd.Series(["415 555 2671", None, "+442079460958"])
+    assert phone_utils.normalize_phone_series(series).tolist() == ["+14155552671", "", "+442079460958"]
+
+
+def test_extract_phone_info():
+    info = phone_utils.extract_phone_info("+44 20 7946 0958")
+    assert info == {"normalized": "+442079460958", "display": "+442079460958", "country_code": "+44"}
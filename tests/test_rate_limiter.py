@@ -0,0 +1,134 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from services import rate_limiter
+from services.rate_limiter import KeyedRateLimiter, RetryBudget, RetryPolicy, TokenBucket, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay):
+        # Waiting advances the fake clock instead of real time
+        clock.now += delay
+        await real_sleep(0)
+
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", sleep)
+    return clock
+
+
+def test_bucket_allows_burst_then_paces(clock):
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+
+    async def run():
+        return [await bucket.acquire() for _ in range(5)]
+
+    waits = asyncio.run(run())
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3:] == [pytest.approx(0.5), pytest.approx(0.5)]
+    assert bucket.acquired == 5
+    assert bucket.throttled == 2
+    assert bucket.total_wait_seconds == pytest.approx(1.0)
+
+
+def test_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1, capacity=2, clock=clock)
+
+    async def run():
+        await bucket.acquire()
+        await bucket.acquire()
+        clock.now += 10
+        return [await bucket.acquire() for _ in range(3)]
+
+    assert asyncio.run(run()) == [0, 0, pytest.approx(1.0)]
+
+
+def test_block_for_holds_acquirers(clock):
+    bucket = TokenBucket(rate=10, capacity=10, clock=clock)
+    bucket.block_for(5)
+    assert bucket.snapshot()["blocked_for_seconds"] == 5
+
+    async def run():
+        return await bucket.acquire()
+
+    assert asyncio.run(run()) == pytest.approx(5.0)
+    assert bucket.throttled == 1
+
+
+def test_keyed_limiter_disabled_with_zero_rate():
+    limiter = KeyedRateLimiter(rate=0, capacity=1)
+    assert asyncio.run(limiter.acquire("sms")) == 0.0
+    limiter.block_for("sms", 10)
+    assert limiter.snapshot() == {}
+
+
+def test_keyed_limiter_buckets_are_independent():
+    limiter = KeyedRateLimiter(rate=1, capacity=1)
+
+    async def run():
+        await limiter.acquire("a")
+        await limiter.acquire("b")
+
+    asyncio.run(run())
+    assert set(limiter.snapshot()) == {"a", "b"}
+    assert limiter.bucket("a").throttled == limiter.bucket("b").throttled == 0
+
+
+def test_retry_budget_caps_retries():
+    budget = RetryBudget(ratio=0.5, reserve=2)
+    assert budget.try_spend() and budget.try_spend()
+    assert not budget.try_spend()
+    assert budget.exhausted == 1
+    budget.deposit()
+    budget.deposit()
+    assert budget.try_spend()
+    # Deposits never exceed the reserve
+    for _ in range(10):
+        budget.deposit()
+    assert budget.snapshot()["balance"] == 2
+
+
+def test_retry_policy_stops_at_max_retries_and_budget():
+    policy = RetryPolicy(max_retries=2, budget=RetryBudget(ratio=0, reserve=1))
+    assert policy.should_retry("sms", 0)
+    assert not policy.should_retry("sms", 1)  # budget spent
+    assert not policy.should_retry("sms", 2)  # past max_retries
+    assert policy.retries == {"sms": 1}
+    assert policy.gave_up == {"sms": 2}
+
+
+def test_backoff_is_bounded():
+    policy = RetryPolicy(base_delay=0.5, max_delay=4)
+    for attempt in range(10):
+        assert 0 <= policy.backoff(attempt) <= min(4, 0.5 * 2 ** attempt)
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None),
+    ("", None),
+    ("120", 120.0),
+    (" 1.5 ", 1.5),
+    ("-3", 0.0),
+    ("soon", None),
+    ("Wed, 21 Oct 2015 07:28:00 GMT", 0.0),  # in the past
+])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert parse_retry_after(format_datetime(when, usegmt=True)) == pytest.approx(30, abs=2)
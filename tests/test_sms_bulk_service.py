@@ -0,0 +1,125 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from services import sms_bulk_service  # noqa: E402
+from services.sms_bulk_service import BulkSmsService  # noqa: E402
+
+RECIPIENTS = [
+    {"candidate_phone": "+14155550101", "message": "Hi"},
+    {"candidate_phone": "+14155550102", "message": "Hi"},
+]
+
+
+def make_db():
+    return mongomock_motor.AsyncMongoMockClient()["test"]
+
+
+def ago(seconds):
+    return sms_bulk_service._timestamp(datetime.now(timezone.utc) - timedelta(seconds=seconds))
+
+
+async def collect(stream):
+    return [json.loads(line) async for line in stream]
+
+
+def test_fail_stale_jobs_marks_only_stale_running_jobs():
+    db = make_db()
+
+    async def run():
+        await db.sms_bulk_jobs.insert_many([
+            {"id": "stale", "status": sms_bulk_service.RUNNING, "heartbeat_at": ago(3600)},
+            {"id": "legacy", "status": sms_bulk_service.RUNNING},
+            {"id": "live", "status": sms_bulk_service.RUNNING, "heartbeat_at": ago(1)},
+            {"id": "done", "status": sms_bulk_service.COMPLETED, "heartbeat_at": ago(3600)},
+        ])
+        marked = await BulkSmsService().fail_stale_jobs(db)
+        jobs = await db.sms_bulk_jobs.find({}, {"_id": 0}).to_list(None)
+        return marked, {job["id"]: job["status"] for job in jobs}
+
+    marked, statuses = asyncio.run(run())
+    assert marked == 2
+    assert statuses == {
+        "stale": sms_bulk_service.FAILED,
+        "legacy": sms_bulk_service.FAILED,
+        "live": sms_bulk_service.RUNNING,
+        "done": sms_bulk_service.COMPLETED,
+    }
+
+
+def test_stream_of_crashed_job_ends_with_failed_summary():
+    db = make_db()
+
+    async def run():
+        await db.sms_bulk_jobs.insert_one(
+            {"id": "job-1", "status": sms_bulk_service.RUNNING, "total": 2, "heartbeat_at": ago(3600)}
+        )
+        await db.sms_bulk_results.insert_one({"job_id": "job-1", "seq": 1, "status": "sent"})
+        return await asyncio.wait_for(collect(BulkSmsService().stream(db, "job-1")), 5)
+
+    events = asyncio.run(run())
+    assert [event["type"] for event in events] == ["job", "result", "summary"]
+    assert events[-1]["status"] == sms_bulk_service.FAILED
+
+
+def test_local_job_streams_results_and_summary(monkeypatch):
+    db = make_db()
+    sent = []
+
+    async def send_sms(owner_phone_number, contact_phone_numbers, body, user_key=None):
+        sent.append(contact_phone_numbers[0])
+        return {"id": f"msg-{len(sent)}"}
+
+    monkeypatch.setattr(sms_bulk_service.goto_service, "send_sms", send_sms)
+
+    async def run():
+        service = BulkSmsService()
+        job = await service.start_job(db, "+14155551000", RECIPIENTS)
+        events = await asyncio.wait_for(collect(service.stream(db, job.job_id)), 5)
+        return events, await service.get_job(db, job.job_id)
+
+    events, job_doc = asyncio.run(run())
+    assert [event["type"] for event in events] == ["job", "result", "result", "summary"]
+    assert events[-1]["status"] == sms_bulk_service.COMPLETED
+    assert job_doc["sent"] == 2
+    assert job_doc["heartbeat_at"]
+
+
+def test_stream_ends_when_local_job_makes_no_progress(monkeypatch):
+    db = make_db()
+
+    async def send_sms(owner_phone_number, contact_phone_numbers, body, user_key=None):
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(sms_bulk_service.goto_service, "send_sms", send_sms)
+    monkeypatch.setattr(sms_bulk_service, "STALE_SECONDS", 0.05)
+
+    async def run():
+        service = BulkSmsService()
+        job = await service.start_job(db, "+14155551000", RECIPIENTS)
+        events = await asyncio.wait_for(collect(service.stream(db, job.job_id)), 5)
+        await service.stop()
+        return events
+
+    events = asyncio.run(run())
+    assert [event["type"] for event in events] == ["job", "stalled"]
+
+
+def test_stream_ends_when_remote_job_makes_no_progress(monkeypatch):
+    db = make_db()
+    monkeypatch.setattr(sms_bulk_service, "STALE_SECONDS", 0.05)
+    monkeypatch.setattr(sms_bulk_service, "_POLL_SECONDS", 0.01)
+
+    async def run():
+        # Its process is alive (fresh heartbeat) but no result arrives
+        await db.sms_bulk_jobs.insert_one(
+            {"id": "job-1", "status": sms_bulk_service.RUNNING, "heartbeat_at": ago(-3600)}
+        )
+        return await asyncio.wait_for(collect(BulkSmsService().stream(db, "job-1")), 5)
+
+    events = asyncio.run(run())
+    assert [event["type"] for event in events] == ["job", "stalled"]
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from services import webhook_queue  # noqa: E402
+
+
+def make_db():
+    return mongomock_motor.AsyncMongoMockClient()["test"]
+
+
+async def enqueue_and_claim(db, worker_id="worker-1", attempts=0):
+    queue_id = await webhook_queue.enqueue(db, webhook_queue.MESSAGE, {"id": "msg-1"})
+    await db.webhook_queue.update_one({"_id": queue_id}, {"$set": {"attempts": attempts}})
+    return await webhook_queue.claim(db, worker_id)
+
+
+def test_fail_schedules_retry():
+    db = make_db()
+
+    async def run():
+        item = await enqueue_and_claim(db)
+        dead = await webhook_queue._fail(db, item, "boom")
+        return dead, await db.webhook_queue.find_one({"_id": item["_id"]})
+
+    dead, queued = asyncio.run(run())
+    assert not dead
+    assert queued["status"] == webhook_queue.PENDING
+    assert queued["last_error"] == "boom"
+
+
+def test_fail_dead_letters_after_max_attempts():
+    db = make_db()
+
+    async def run():
+        item = await enqueue_and_claim(db, attempts=webhook_queue.MAX_ATTEMPTS - 1)
+        dead = await webhook_queue._fail(db, item, "boom")
+        return (
+            dead,
+            await db.webhook_queue.count_documents({}),
+            await db.webhook_dead_letters.find_one({"_id": item["_id"]}),
+        )
+
+    dead, queued, letter = asyncio.run(run())
+    assert dead
+    assert queued == 0
+    assert letter["status"] == "dead"
+    assert letter["last_error"] == "boom"
+
+
+def test_fail_after_lease_takeover_does_not_dead_letter():
+    db = make_db()
+
+    async def run():
+        item = await enqueue_and_claim(db, attempts=webhook_queue.MAX_ATTEMPTS - 1)
+        # The lease expired and another worker claimed the event
+        await db.webhook_queue.update_one({"_id": item["_id"]}, {"$set": {"worker_id": "worker-2"}})
+        dead = await webhook_queue._fail(db, item, "boom")
+        return (
+            dead,
+            await db.webhook_queue.find_one({"_id": item["_id"]}),
+            await db.webhook_dead_letters.count_documents({}),
+        )
+
+    dead, queued, letters = asyncio.run(run())
+    assert not dead
+    assert queued["worker_id"] == "worker-2"
+    assert letters == 0